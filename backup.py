@@ -0,0 +1,40 @@
+"""
+Export or import all bot data as one gzip NDJSON file
+
+Usage:
+    python backup.py export [--output backups/backup.ndjson.gz]
+    python backup.py import <file> [--batch-size 500]
+
+Run imports while the bot is stopped; a running bot keeps its own in-memory copy.
+"""
+import argparse
+from rich import print
+from utils import backup
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write every guild, prefix, no-prefix user and dev to one file")
+    export_parser.add_argument("--output", default=None, help=f"Output file (default: {backup.DEFAULT_DIR}/backup-<time>.ndjson.gz)")
+    import_parser = commands.add_parser("import", help="Apply a file written by export")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        result = backup.export(args.output)
+        print(
+            f"[green][bold]✓[/] Exported {result['guilds']} guilds, {result['prefixes']} prefixes, "
+            f"{result['noprefix']} no-prefix users and {result['devs']} devs to {result['path']} "
+            f"({result['bytes'] / 1024:.1f} KiB in {result['seconds']:.2f}s)[/]"
+        )
+    else:
+        progress = lambda counts: print(f"[yellow][bold]![/] Imported {counts['guilds']} guilds, {counts['prefixes']} prefixes[/]")
+        result = backup.import_file(args.file, args.batch_size, progress)
+        print(
+            f"[green][bold]✓[/] Imported {result['guilds']} guilds, {result['prefixes']} prefixes, "
+            f"{result['noprefix']} no-prefix users and {result['devs']} devs in {result['seconds']:.2f}s[/]"
+        )
+
+if __name__ == "__main__":
+    main()
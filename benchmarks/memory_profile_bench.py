@@ -0,0 +1,170 @@
+"""
+Memory profiles: resident memory and startup-to-ready cost on a synthetic gateway
+
+Each profile runs in its own process. The client is fed synthetic
+GUILD_CREATE payloads shaped like the real gateway's: large guilds only
+carry their voice (and, with the presences intent, online) members, and
+profiles that chunk at startup also receive every member before ready.
+Network time is not simulated; instead the number of chunk requests sent
+before ready is reported, together with the wait the gateway's command
+rate limit (120 per minute per shard) puts on them.
+
+Usage: python -m benchmarks.memory_profile_bench [--guilds 200] [--members 200000]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.ext import commands
+from utils.memory_profile import MemoryProfile, PROFILES
+
+GATEWAY_COMMANDS_PER_SECOND = 120 / 60
+ONLINE_SHARE = 0.1
+VOICE_SHARE = 0.01
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def guild_sizes(guilds: int, members: int) -> list:
+    """Power-law sizes: a few big guilds, many small ones"""
+    weights = [1 / (rank + 1) for rank in range(guilds)]
+    total = sum(weights)
+    return [max(2, int(members * weight / total)) for weight in weights]
+
+def member_payload(user_id: int) -> dict:
+    return {
+        "user": {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None, "bot": user_id % 20 == 0},
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0
+    }
+
+def presence_payload(user_id: int) -> dict:
+    return {
+        "user": {"id": str(user_id)},
+        "status": "online",
+        "activities": [{"name": "Some Game", "type": 0, "created_at": 0}],
+        "client_status": {"desktop": "online"}
+    }
+
+def guild_payload(guild_id: int, size: int, first_user: int, intents, all_members: bool) -> dict:
+    text_id, voice_id = guild_id * 10 + 1, guild_id * 10 + 2
+    user_ids = range(first_user, first_user + size)
+    online = user_ids[:int(size * ONLINE_SHARE)]
+    voice = user_ids[:max(1, int(size * VOICE_SHARE))]
+    if all_members:
+        sent = user_ids
+    elif intents.presences:
+        sent = online
+    else:
+        sent = voice
+    return {
+        "id": str(guild_id),
+        "name": f"guild{guild_id}",
+        "icon": None,
+        "owner_id": str(first_user),
+        "member_count": size,
+        "large": size > 250,
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "verification_level": 0,
+        "default_message_notifications": 0,
+        "explicit_content_filter": 0,
+        "mfa_level": 0,
+        "premium_tier": 0,
+        "system_channel_flags": 0,
+        "nsfw_level": 0,
+        "preferred_locale": "en-US",
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [
+            {"id": str(text_id), "type": 0, "name": "general", "position": 0, "permission_overwrites": []},
+            {"id": str(voice_id), "type": 2, "name": "voice", "position": 1, "permission_overwrites": [], "bitrate": 64000, "user_limit": 0}
+        ],
+        "voice_states": [
+            {"user_id": str(user_id), "channel_id": str(voice_id), "session_id": "s", "deaf": False, "mute": False, "self_deaf": False, "self_mute": False, "suppress": False}
+            for user_id in voice
+        ],
+        "members": [member_payload(user_id) for user_id in sent],
+        "presences": [presence_payload(user_id) for user_id in online] if intents.presences else []
+    }
+
+async def measure(name: str, sizes: list, large_threshold: int) -> dict:
+    profile = MemoryProfile(name, large_threshold)
+    options = profile.client_options()
+    client = commands.Bot(command_prefix="!", help_command=None, **options)
+    state = client._connection
+    startup = profile.chunking == "startup"
+
+    # Payloads are built first so their memory is part of the baseline
+    payloads, first_user = [], 1
+    for guild_id, size in enumerate(sizes, start=1):
+        payloads.append(guild_payload(guild_id, size, first_user, options["intents"], startup))
+        first_user += size
+    baseline = rss_mb()
+
+    started = time.perf_counter()
+    guilds = [state._add_guild_from_data(payload) for payload in payloads]
+    ready_s = time.perf_counter() - started
+    ready_mb = rss_mb() - baseline
+    chunk_requests = len(guilds) if startup else 0
+    cached_at_ready = sum(len(guild.members) for guild in guilds)
+
+    # What the "small" strategy's background chunking after ready adds
+    for guild, payload in zip(guilds, payloads):
+        if profile.chunking == "small" and guild.member_count <= large_threshold:
+            full = guild_payload(guild.id, guild.member_count, int(payload["owner_id"]), options["intents"], True)
+            for data in full["members"]:
+                guild._add_member(discord.Member(data=data, guild=guild, state=state))
+    settled_mb = rss_mb() - baseline
+
+    return {
+        "profile": name,
+        "ready_ms": ready_s * 1000,
+        "chunk_requests": chunk_requests,
+        "gateway_wait_s": chunk_requests / GATEWAY_COMMANDS_PER_SECOND,
+        "ready_mb": ready_mb,
+        "settled_mb": settled_mb,
+        "cached_at_ready": cached_at_ready,
+        "cached_settled": sum(len(guild.members) for guild in guilds)
+    }
+
+def child(name, sizes, large_threshold, results):
+    results.put(asyncio.run(measure(name, sizes, large_threshold)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--members", type=int, default=200000)
+    parser.add_argument("--large-threshold", type=int, default=1000)
+    args = parser.parse_args()
+
+    sizes = guild_sizes(args.guilds, args.members)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    print(f"guilds: {args.guilds}, members: {sum(sizes)}, largest guild: {sizes[0]}")
+    print(f"{'profile':10} {'ready':>10} {'chunk reqs':>11} {'gateway wait':>13} {'RSS ready':>10} {'RSS settled':>12} {'members cached':>22}")
+    for name in PROFILES:
+        process = context.Process(target=child, args=(name, sizes, args.large_threshold, results))
+        process.start()
+        result = results.get()
+        process.join()
+        print(
+            f"{result['profile']:10} {result['ready_ms']:8.0f}ms {result['chunk_requests']:11} {result['gateway_wait_s']:12.1f}s "
+            f"{result['ready_mb']:8.1f}MB {result['settled_mb']:10.1f}MB {result['cached_at_ready']:>10} -> {result['cached_settled']:<10}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+No-prefix command resolution cost per message: legacy scan vs NoPrefixIndex
+
+Usage: python -m benchmarks.noprefix_bench [--messages 200000] [--cog-commands 40]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.noprefix import NoPrefixIndex
+
+UTILITY = ["ping", "uptime", "stats", "avatar", "userinfo", "serverinfo", "emojiinfo"]
+DEV = {name: f"process_noprefix_{name.replace('-', '_')}" for name in (
+    "dev-add", "dev-remove", "dev-list", "lockdown", "restart", "reload-cogs", "shutdown", "status", "guild-list", "guild-leave"
+)}
+CHAT = [
+    "hey everyone, what's up?",
+    "lol",
+    "did anyone see the match yesterday? it was absolutely wild from start to finish",
+    "https://example.com/some/very/long/link/that/people/paste/into/chat?with=query&and=more",
+    "ok",
+    "I'll be back in 10 minutes, brb",
+]
+
+class FakeClient:
+    def __init__(self, cog_commands):
+        commands = [SimpleNamespace(name=f"cmd{i}", aliases=[f"c{i}", f"alias{i}"]) for i in range(cog_commands)]
+        self.cogs = {
+            "NoPrefixCommands": SimpleNamespace(get_commands=lambda: commands),
+            "PrefixDevCommands": SimpleNamespace(**{method: (lambda *a: None) for method in DEV.values()}),
+            "HelpCommands": SimpleNamespace(process_noprefix_help=lambda *a: None),
+        }
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+def legacy_resolve(client, content):
+    # What process_noprefix_commands did for every message
+    content = content.strip()
+    command_parts = content.split(" ", 1)
+    command_name = command_parts[0].lower()
+    utility_commands = list(UTILITY)
+    if command_name == "help" and client.get_cog("HelpCommands"):
+        return "help"
+    dev_commands = dict(DEV)
+    if command_name in dev_commands and client.get_cog("PrefixDevCommands"):
+        return "dev"
+    if command_name in utility_commands:
+        return "utility"
+    no_prefix_cog = client.get_cog("NoPrefixCommands")
+    if no_prefix_cog:
+        for command in no_prefix_cog.get_commands():
+            if command.name == command_name or command_name in getattr(command, "aliases", []):
+                return "command"
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--cog-commands", type=int, default=40)
+    args = parser.parse_args()
+
+    client = FakeClient(args.cog_commands)
+    messages = [random.choice(CHAT) for _ in range(args.messages)]
+
+    start = time.perf_counter()
+    for content in messages:
+        legacy_resolve(client, content)
+    legacy_us = (time.perf_counter() - start) / args.messages * 1e6
+
+    index = NoPrefixIndex(client, UTILITY, DEV)
+    start = time.perf_counter()
+    index.build()
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    for content in messages:
+        index.lookup(content)
+    index_us = (time.perf_counter() - start) / args.messages * 1e6
+
+    assert all(index.lookup(name) for name in (*UTILITY, *DEV, "help", "cmd0", "C1"))
+    print(f"indexed names: {len(index.entries)}")
+    print(f"legacy scan, chat message  {legacy_us:8.2f} us")
+    print(f"index build                {build_ms:8.2f} ms (per cog load/reload)")
+    print(f"index lookup, chat message {index_us:8.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+No-prefix command context cost: content rewrite + get_context vs direct Context
+
+Usage: python -m benchmarks.noprefix_invoke_bench [--invocations 100000]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.ext import commands
+from discord.ext.commands.view import StringView
+from utils.prefix import resolver
+
+CONTENT = "userinfo 123456789012345678 with some trailing words"
+
+async def legacy_context(client, message):
+    # What NoPrefixHandler.get_context did before direct invocation
+    content = message.content
+    message.content = resolver.get(message.guild.id)[0] + content.strip()
+    try:
+        return await client.get_context(message)
+    finally:
+        message.content = content
+
+async def direct_context(client, message, name, rest):
+    return commands.Context(
+        prefix=resolver.get(message.guild.id)[0],
+        view=StringView(rest),
+        bot=client,
+        message=message,
+        invoked_with=name,
+        command=client.all_commands.get(name)
+    )
+
+async def run(invocations):
+    client = commands.Bot(command_prefix=resolver, intents=discord.Intents.none(), help_command=None)
+    client._connection.user = SimpleNamespace(id=1)
+
+    @client.command(name="userinfo")
+    async def userinfo(ctx, user_id: int, *, rest: str = ""):
+        pass
+
+    message = SimpleNamespace(content=CONTENT, guild=SimpleNamespace(id=1), author=SimpleNamespace(id=2))
+
+    start = time.perf_counter()
+    for _ in range(invocations):
+        ctx = await legacy_context(client, message)
+    legacy_us = (time.perf_counter() - start) / invocations * 1e6
+    assert ctx.command is userinfo and ctx.view.read_rest().strip() == CONTENT.split(" ", 1)[1]
+
+    name, rest = CONTENT.split(" ", 1)
+    start = time.perf_counter()
+    for _ in range(invocations):
+        ctx = await direct_context(client, message, name, rest)
+    direct_us = (time.perf_counter() - start) / invocations * 1e6
+    assert ctx.command is userinfo and ctx.view.read_rest().strip() == rest
+
+    print(f"rewrite + get_context  {legacy_us:8.2f} us")
+    print(f"direct Context         {direct_us:8.2f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--invocations", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(run(args.invocations))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-message prefix resolution cost at 100k guilds
+
+Compares the old `command_prefix` lambda (decode the whole prefix map per
+message) with the compiled PrefixResolver.
+
+Usage: python -m benchmarks.prefix_bench [--guilds 100000] [--messages 20000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.prefix import PrefixResolver
+
+CUSTOM = ["?", "$", ">>", "m!", ["!", "?"], ["bot ", "b!"]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=100000)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--legacy-messages", type=int, default=200)
+    args = parser.parse_args()
+
+    # A third of the guilds use a custom prefix
+    prefix_map = {str(guild_id): random.choice(CUSTOM) for guild_id in range(1, args.guilds + 1) if guild_id % 3 == 0}
+    encoded = json.dumps(prefix_map)
+    bot = SimpleNamespace(user=SimpleNamespace(id=1234567890))
+    contents = ["hello there", "!ping", "?help", "<@1234567890> stats", "m!play song"]
+    messages = [
+        SimpleNamespace(guild=SimpleNamespace(id=random.randint(1, args.guilds)), content=random.choice(contents))
+        for _ in range(args.messages)
+    ]
+
+    # Legacy: decode the whole map, look up one key, startswith
+    start = time.perf_counter()
+    for message in messages[:args.legacy_messages]:
+        prefix = json.loads(encoded).get(str(message.guild.id), "!")
+        message.content.startswith(prefix if isinstance(prefix, str) else tuple(prefix))
+    legacy_us = (time.perf_counter() - start) / args.legacy_messages * 1e6
+
+    resolver = PrefixResolver()
+    start = time.perf_counter()
+    resolver.load(prefix_map)
+    resolver.bind_user(bot.user.id)
+    load_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    for message in messages:
+        resolver(bot, message)
+    call_us = (time.perf_counter() - start) / args.messages * 1e6
+
+    start = time.perf_counter()
+    for message in messages:
+        resolver.match(message)
+    match_us = (time.perf_counter() - start) / args.messages * 1e6
+
+    print(f"guilds: {args.guilds}, custom prefixes: {len(prefix_map)}, distinct matchers: {len(resolver._matchers)}")
+    print(f"legacy lambda        {legacy_us:10.2f} us/message")
+    print(f"resolver load        {load_ms:10.2f} ms (once)")
+    print(f"resolver prefixes    {call_us:10.2f} us/message")
+    print(f"resolver match       {match_us:10.2f} us/message")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Memory held by cached guild settings: decoded JSON dicts vs GuildSettings
+
+Usage: python -m benchmarks.settings_memory_bench [--sizes 10000 50000 100000]
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import GuildSettings, DEFAULT_GUILD_CONFIG
+
+def stored_rows(guild_count):
+    """Encoded settings as the engines store them, with a realistic mix of configured IDs"""
+    rng = random.Random(guild_count)
+    snowflake = lambda: rng.randint(10**17, 2 * 10**18)
+    for guild_id in range(1, guild_count + 1):
+        data = dict(DEFAULT_GUILD_CONFIG)
+        for key in GuildSettings.IDS:
+            if rng.random() < 0.5:
+                data[key] = snowflake()
+        data["ticket_cmds"] = rng.random() < 0.8
+        yield guild_id, json.dumps(data)
+
+def measure(rows, decode):
+    tracemalloc.start()
+    cache = {guild_id: decode(encoded) for guild_id, encoded in rows}
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cache, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'guilds':>8} {'dict (MB)':>10} {'slots (MB)':>11} {'B/guild dict':>13} {'B/guild slots':>14} {'saved':>7}")
+    for size in args.sizes:
+        rows = list(stored_rows(size))
+        dicts, dict_bytes = measure(rows, json.loads)
+        slots, slot_bytes = measure(rows, lambda encoded: GuildSettings.from_dict(json.loads(encoded)))
+        assert all(slots[guild_id].to_dict() == data for guild_id, data in dicts.items())
+        del dicts, slots
+        print(
+            f"{size:>8} {dict_bytes / 2**20:>10.1f} {slot_bytes / 2**20:>11.1f} "
+            f"{dict_bytes / size:>13.0f} {slot_bytes / size:>14.0f} {1 - slot_bytes / dict_bytes:>7.0%}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Shared settings cache: lookup cost and cross-process visibility delay
+
+Two local processes open the same data directory. The writer updates guild
+settings and prefixes; the reader measures how long each change takes to
+become visible to it, and how much a lookup costs compared to a private dict.
+
+Usage: python -m benchmarks.shared_cache_bench [--guilds 50000] [--writes 200]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import SQLiteBackend, WriteBehind, GuildSettings
+from utils.shared_cache import SharedCache
+
+def open_store(directory):
+    shared = SharedCache(os.path.join(directory, "shared-cache.bin"), poll_interval=0.05)
+    return WriteBehind(SQLiteBackend(os.path.join(directory, "bot.db")), interval=0.05, shared=shared)
+
+# Guilds the writer changes; small so the reader can watch all of them continuously
+WATCHED = 100
+
+def writer(directory, writes, ready):
+    write_behind = open_store(directory)
+    ready.wait()
+    for n in range(writes):
+        # The value written is the write time, so the reader can compute the delay
+        write_behind.set_guild(random.randint(1, WATCHED), GuildSettings(mod_log_ch=time.time_ns()))
+        if n % 10 == 0:
+            write_behind.set_prefix(1, f"{time.time_ns()}!")
+        time.sleep(0.005)
+    write_behind.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=50000)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_behind = open_store(tmp)
+        for guild_id in range(1, args.guilds + 1):
+            write_behind.set_guild(guild_id, GuildSettings(mod_log_ch=guild_id))
+        write_behind.flush()
+
+        ids = [random.randint(1, args.guilds) for _ in range(args.lookups)]
+        private = {guild_id: GuildSettings(mod_log_ch=guild_id) for guild_id in range(1, args.guilds + 1)}
+        start = time.perf_counter()
+        for guild_id in ids:
+            private.get(guild_id)
+        dict_us = (time.perf_counter() - start) / args.lookups * 1e6
+        start = time.perf_counter()
+        for guild_id in ids:
+            write_behind.guild(guild_id)
+        shared_us = (time.perf_counter() - start) / args.lookups * 1e6
+
+        prefix_delays = []
+        write_behind.shared.subscribe("prefixes", lambda: prefix_delays.append(time.time_ns() - int(write_behind.prefixes()["1"][:-1])))
+
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(target=writer, args=(tmp, args.writes, ready))
+        process.start()
+        ready.set()
+        seen, guild_delays = {}, []
+        while process.is_alive():
+            # Record the first sighting of each write
+            for guild_id in range(1, WATCHED + 1):
+                value = write_behind.guild(guild_id).mod_log_ch
+                if value > args.guilds and seen.get(guild_id) != value:
+                    seen[guild_id] = value
+                    guild_delays.append(time.time_ns() - value)
+        process.join()
+
+        guild_delays.sort()
+        prefix_delays.sort()
+        print(f"guilds: {args.guilds}, writes: {args.writes}")
+        print(f"lookup, private dict        {dict_us:8.2f} us")
+        print(f"lookup, shared cache        {shared_us:8.2f} us")
+        if guild_delays:
+            print(f"guild write visible after   {guild_delays[len(guild_delays) // 2] / 1e6:8.2f} ms median, {guild_delays[-1] / 1e6:.2f} ms max ({len(guild_delays)} seen)")
+        if prefix_delays:
+            print(f"prefix write visible after  {prefix_delays[len(prefix_delays) // 2] / 1e6:8.2f} ms median, {prefix_delays[-1] / 1e6:.2f} ms max ({len(prefix_delays)} seen)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Guild settings get/set latency: JSON files vs SQLite
+
+Usage: python -m benchmarks.storage_bench [--sizes 1000 10000 100000] [--samples 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import JSONBackend, SQLiteBackend, DEFAULT_GUILD_CONFIG
+
+def populate(backend, guild_count):
+    rows = ((guild_id, dict(DEFAULT_GUILD_CONFIG, mod_log_ch=guild_id)) for guild_id in range(1, guild_count + 1))
+    if hasattr(backend, "transaction"):
+        with backend.transaction():
+            for guild_id, data in rows:
+                backend.save_guild(guild_id, data)
+    else:
+        for guild_id, data in rows:
+            backend.save_guild(guild_id, data)
+
+def measure(backend, guild_count, samples):
+    ids = [random.randint(1, guild_count) for _ in range(samples)]
+
+    start = time.perf_counter()
+    for guild_id in ids:
+        backend.load_guild(guild_id)
+    get_us = (time.perf_counter() - start) / samples * 1e6
+
+    start = time.perf_counter()
+    for guild_id in ids:
+        data = backend.load_guild(guild_id)
+        data["msg_log_ch"] = guild_id
+        backend.save_guild(guild_id, data)
+    set_us = (time.perf_counter() - start) / samples * 1e6
+    return get_us, set_us
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'guilds':>8} {'engine':>7} {'get (us)':>10} {'set (us)':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engines = [
+                JSONBackend(os.path.join(tmp, "database"), os.path.join(tmp, "data")),
+                SQLiteBackend(os.path.join(tmp, "bot.db")),
+            ]
+            for backend in engines:
+                populate(backend, size)
+                get_us, set_us = measure(backend, size, args.samples)
+                print(f"{size:>8} {backend.name:>7} {get_us:>10.1f} {set_us:>10.1f}")
+                backend.close()
+
+if __name__ == "__main__":
+    main()
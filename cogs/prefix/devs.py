@@ -5,6 +5,7 @@ import os, sys
 import math
 from utils import database as db, emoji
 from utils import check
+from utils.log_aggregator import log_aggregator
 from discord.ext import commands
 
 class GuildListView(discord.ui.View):
@@ -197,6 +198,8 @@ class PrefixDevCommands(commands.Cog, name="PrefixDevCommands"):
         if check.is_dev(ctx.author.id):
             restart_em = discord.Embed(title=f"{emoji.restart} Restarting", color=db.theme_color)
             await ctx.send(embed=restart_em)
+            await log_aggregator.flush_all()
+            db.flush()
             os.system("clear")
             os.execv(sys.executable, [sys.executable] + sys.argv)
         else:
@@ -215,9 +218,9 @@ class PrefixDevCommands(commands.Cog, name="PrefixDevCommands"):
         if check.is_dev(ctx.author.id):
             reload_em = discord.Embed(title=f"{emoji.restart} Reloaded Cogs", color=db.theme_color)
             await ctx.send(embed=reload_em)
-            for filename in os.listdir("./cogs"):
-                if filename.endswith(".py"):
-                    self.client.reload_extension(f"cogs.{filename[:-3]}")
+            for extension in list(self.client.extensions):
+                self.client.reload_extension(extension)
+            self.client.get_cog("NoPrefixHandler").rebuild_index()
         else:
             error_em = discord.Embed(description=f"{emoji.error} You are not authorized to use the command", color=db.error_color)
             await ctx.send(embed=error_em)
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from utils import database as db, emoji
+from utils.memory_profile import memory_profile
 import datetime, time
 import platform
 
@@ -94,6 +95,8 @@ class Utility(commands.Cog):
     @commands.command(name="serverinfo")
     async def server_info(self, ctx):
         """Shows info of the current server."""
+        # Member counts below need every member
+        members = await memory_profile.ensure_members(ctx.guild)
         server_info_em = discord.Embed(
             title=f"{ctx.guild.name}'s Info",
             description=(
@@ -107,9 +110,9 @@ class Utility(commands.Cog):
                 f"{emoji.bullet} **Text Channel(s)**: `{len(ctx.guild.text_channels)}`\n"
                 f"{emoji.bullet} **Voice Channel(s)**: `{len(ctx.guild.voice_channels)}`\n"
                 f"{emoji.bullet} **Stage Channel(s)**: `{len(ctx.guild.stage_channels)}`\n"
-                f"{emoji.bullet} **Total Member(s)**: `{len(ctx.guild.members)}`\n"
-                f"{emoji.bullet} **Human(s)**: `{len([m for m in ctx.guild.members if not m.bot])}`\n"
-                f"{emoji.bullet} **Bot(s)**: `{len([m for m in ctx.guild.members if m.bot])}`\n"
+                f"{emoji.bullet} **Total Member(s)**: `{len(members)}`\n"
+                f"{emoji.bullet} **Human(s)**: `{len([m for m in members if not m.bot])}`\n"
+                f"{emoji.bullet} **Bot(s)**: `{len([m for m in members if m.bot])}`\n"
                 f"{emoji.bullet} **Role(s)**: `{len(ctx.guild.roles)}`\n"
                 f"{emoji.bullet} **Server Created**: {discord.utils.format_dt(ctx.guild.created_at, 'R')}"
             ),
@@ -1,5 +1,5 @@
 import discord
-from utils import database as db
+from utils.async_storage import store
 from discord.ext import commands
 
 class AutoMod(commands.Cog):
@@ -9,13 +9,13 @@ class AutoMod(commands.Cog):
 # Autorole
     @commands.Cog.listener()
     async def on_member_join(self, user: discord.Member):
-        autorole = db.autorole(user.guild.id)
+        autorole = await store.guild(user.guild.id).get("autorole")
         if autorole != None and user.bot == False:
             role = user.guild.get_role(autorole)
             if role != None:
                 await user.add_roles(role)
             else:
-                db.autorole(user.guild.id, None, "set")
+                await store.guild(user.guild.id).set("autorole", None)
 
 def setup(client: discord.Client):
     client.add_cog(AutoMod(client))
\ No newline at end of file
@@ -2,8 +2,12 @@ import discord
 import discord.ui
 import os, sys
 import math
+import time
 from utils import database as db, emoji
-from utils import check
+from utils import check, backup
+from utils.log_sink import log_sink
+from utils.log_aggregator import log_aggregator
+from utils.memory_profile import memory_profile
 from discord.ext import commands
 from discord.commands import slash_command, option, SlashCommandGroup
 
@@ -94,39 +98,39 @@ class Devs(commands.Cog):
 # On start
     @commands.Cog.listener("on_ready")
     async def when_bot_gets_ready(self):
-        start_log_ch = await self.client.fetch_channel(db.system_ch_id())
         start_log_em = discord.Embed(title=f"{emoji.restart} Restarted", description=f"Logged in as **{self.client.user}** with ID `{self.client.user.id}`", color=db.theme_color)
-        await start_log_ch.send(embed=start_log_em)
+        await log_sink.send(db.system_ch_id(), embed=start_log_em)
 
 # On guild joined
     @commands.Cog.listener("on_guild_join")
     async def when_guild_joined(self, guild: discord.Guild):
         db.create(guild.id)
-        join_log_ch = await self.client.fetch_channel(db.system_ch_id())
+        # Not cached under the lighter memory profiles
+        members = await memory_profile.ensure_members(guild)
         join_log_em = discord.Embed(
             title=f"{emoji.plus} Someone Added Me!",
             description=f"{emoji.bullet} **Name**: {guild.name}\n"
                         f"{emoji.bullet} **ID**: `{guild.id}`\n"
                         f"{emoji.bullet} **Total Members**: `{guild.member_count}`\n"
-                        f"{emoji.bullet} **Total Humans**: `{len([m for m in guild.members if not m.bot])}`\n"
-                        f"{emoji.bullet} **Total Bots**: `{len([m for m in guild.members if m.bot])}`",
+                        f"{emoji.bullet} **Total Humans**: `{len([m for m in members if not m.bot])}`\n"
+                        f"{emoji.bullet} **Total Bots**: `{len([m for m in members if m.bot])}`",
             color=db.theme_color)
-        await join_log_ch.send(embed=join_log_em)
+        await log_sink.send(db.system_ch_id(), embed=join_log_em)
 
 # On guild leave
     @commands.Cog.listener("on_guild_remove")
     async def when_removed_from_guild(self, guild: discord.Guild):
         db.delete(guild.id)
-        leave_log_ch = await self.client.fetch_channel(db.system_ch_id())
         leave_log_em = discord.Embed(
             title=f"{emoji.minus} Someone Removed Me!",
             description=f"{emoji.bullet2} **Name**: {guild.name}\n"
                         f"{emoji.bullet2} **ID**: `{guild.id}`\n"
-                        f"{emoji.bullet2} **Total Members**: `{guild.member_count}`\n"
-                        f"{emoji.bullet2} **Total Humans**: `{len([m for m in guild.members if not m.bot])}`\n"
-                        f"{emoji.bullet2} **Total Bots**: `{len([m for m in guild.members if m.bot])}`",
+                        f"{emoji.bullet2} **Total Members**: `{guild.member_count}`" +
+                        # The guild can no longer be chunked; only a full member cache has the split
+                        (f"\n{emoji.bullet2} **Total Humans**: `{len([m for m in guild.members if not m.bot])}`\n"
+                         f"{emoji.bullet2} **Total Bots**: `{len([m for m in guild.members if m.bot])}`" if guild.chunked else ""),
             color=db.error_color)
-        await leave_log_ch.send(embed=leave_log_em)
+        await log_sink.send(db.system_ch_id(), embed=leave_log_em)
 
 # Dev slash cmd group
     dev = SlashCommandGroup(guild_ids=db.guild_ids(), name="dev", description="Developer related commands.")
@@ -199,6 +203,8 @@ class Devs(commands.Cog):
         if check.is_dev(ctx.author.id):
             restart_em = discord.Embed(title=f"{emoji.restart} Restarting", color=db.theme_color)
             await ctx.respond(embed=restart_em)
+            await log_aggregator.flush_all()
+            db.flush()
             os.system("clear")
             os.execv(sys.executable, [sys.executable] + sys.argv)
         else:
@@ -212,9 +218,9 @@ class Devs(commands.Cog):
         if check.is_dev(ctx.author.id):
             reload_em = discord.Embed(title=f"{emoji.restart} Reloaded Cogs", color=db.theme_color)
             await ctx.respond(embed=reload_em, ephemeral=True, delete_after=2)
-            for filename in os.listdir("./cogs"):
-                if filename.endswith(".py"):
-                    self.client.reload_extension(f"cogs.{filename[:-3]}")
+            for extension in list(self.client.extensions):
+                self.client.reload_extension(extension)
+            self.client.get_cog("NoPrefixHandler").rebuild_index()
         else:
             error_em = discord.Embed(description=f"{emoji.error} You are not authorized to use the command", color=db.error_color)
             await ctx.respond(embed=error_em, ephemeral=True)
@@ -253,6 +259,72 @@ class Devs(commands.Cog):
                 error_em = discord.Embed(description=f"{emoji.error} You are not authorized to use the command", color=db.error_color)
                 await ctx.respond(embed=error_em, ephemeral=True)
 
+    # Backup slash cmd group
+    backups = SlashCommandGroup(guild_ids=db.owner_guild_ids(), name="backup", description="Backup related commands.")
+
+    # Export backup
+    @backups.command(name="export")
+    async def export_backup(self, ctx: discord.ApplicationContext):
+        """Exports all bot data to one compressed file."""
+        if check.is_owner(ctx.author.id):
+            await ctx.defer()
+            result = await backup.export_async()
+            export_em = discord.Embed(
+                title=f"{emoji.console} Backup Exported",
+                description=f"{emoji.bullet} **Guilds**: `{result['guilds']}`\n"
+                            f"{emoji.bullet} **Prefixes**: `{result['prefixes']}`\n"
+                            f"{emoji.bullet} **No-Prefix Users**: `{result['noprefix']}`\n"
+                            f"{emoji.bullet} **Devs**: `{result['devs']}`\n"
+                            f"{emoji.bullet} **File**: `{result['path']}` ({result['bytes'] / 1024:.1f} KiB)\n"
+                            f"{emoji.bullet} **Time**: `{result['seconds']:.2f}s`",
+                color=db.theme_color
+            )
+            # Attach it when it fits the upload limit
+            file = discord.File(result["path"]) if result["bytes"] <= ctx.guild.filesize_limit else None
+            await ctx.respond(embed=export_em, file=file)
+        else:
+            error_em = discord.Embed(description=f"{emoji.error} You are not authorized to use the command", color=db.error_color)
+            await ctx.respond(embed=error_em, ephemeral=True)
+
+    # Import backup
+    @backups.command(name="import")
+    @option("file", description="Upload a backup file made by /backup export")
+    async def import_backup(self, ctx: discord.ApplicationContext, file: discord.Attachment):
+        """Imports all bot data from a backup file."""
+        if check.is_owner(ctx.author.id):
+            await ctx.defer()
+            path = os.path.join(backup.DEFAULT_DIR, f"import-{int(time.time())}-{os.path.basename(file.filename)}")
+            os.makedirs(backup.DEFAULT_DIR, exist_ok=True)
+            await file.save(path)
+            last_report = [time.monotonic()]
+
+            async def progress(counts):
+                # Edit at most every 2 seconds to stay clear of rate limits
+                if time.monotonic() - last_report[0] >= 2:
+                    last_report[0] = time.monotonic()
+                    progress_em = discord.Embed(description=f"{emoji.restart} Imported `{counts['guilds']}` guilds and `{counts['prefixes']}` prefixes...", color=db.theme_color)
+                    await ctx.edit(embed=progress_em)
+
+            try:
+                result = await backup.import_async(path, progress=progress)
+            except (OSError, ValueError) as e:
+                error_em = discord.Embed(description=f"{emoji.error} Unable to import the backup: {e}", color=db.error_color)
+                await ctx.respond(embed=error_em)
+                return
+            import_em = discord.Embed(
+                title=f"{emoji.console} Backup Imported",
+                description=f"{emoji.bullet} **Guilds**: `{result['guilds']}`\n"
+                            f"{emoji.bullet} **Prefixes**: `{result['prefixes']}`\n"
+                            f"{emoji.bullet} **No-Prefix Users**: `{result['noprefix']}`\n"
+                            f"{emoji.bullet} **Devs**: `{result['devs']}`\n"
+                            f"{emoji.bullet} **Time**: `{result['seconds']:.2f}s`",
+                color=db.theme_color
+            )
+            await ctx.respond(embed=import_em)
+        else:
+            error_em = discord.Embed(description=f"{emoji.error} You are not authorized to use the command", color=db.error_color)
+            await ctx.respond(embed=error_em, ephemeral=True)
+
     # Guild slash cmd group
     guild = SlashCommandGroup(guild_ids=db.owner_guild_ids(), name="guild", description="Guild related commands.")
 
@@ -3,6 +3,7 @@ import platform
 import aiohttp
 import datetime, time
 from utils import database as db, emoji
+from utils.memory_profile import memory_profile
 from discord.ext import commands
 from discord.commands import slash_command, option, SlashCommandGroup
 
@@ -97,6 +98,10 @@ class Info(commands.Cog):
     @info.command(name="server")
     async def server_info(self, ctx: discord.ApplicationContext):
         """Shows info of the current server."""
+        if not ctx.guild.chunked:
+            # Member counts below need every member; fetching them can take a while in big servers
+            await ctx.defer()
+        members = await memory_profile.ensure_members(ctx.guild)
         server_info_em = discord.Embed(
             title=f"{ctx.guild.name}'s Info",
             description=(
@@ -110,9 +115,9 @@ class Info(commands.Cog):
                 f"{emoji.bullet} **Text Channel(s)**: `{len(ctx.guild.text_channels)}`\n"
                 f"{emoji.bullet} **Voice Channel(s)**: `{len(ctx.guild.voice_channels)}`\n"
                 f"{emoji.bullet} **Stage Channel(s)**: `{len(ctx.guild.stage_channels)}`\n"
-                f"{emoji.bullet} **Total Member(s)**: `{len(ctx.guild.members)}`\n"
-                f"{emoji.bullet} **Human(s)**: `{len([m for m in ctx.guild.members if not m.bot])}`\n"
-                f"{emoji.bullet} **Bot(s)**: `{len([m for m in ctx.guild.members if m.bot])}`\n"
+                f"{emoji.bullet} **Total Member(s)**: `{len(members)}`\n"
+                f"{emoji.bullet} **Human(s)**: `{len([m for m in members if not m.bot])}`\n"
+                f"{emoji.bullet} **Bot(s)**: `{len([m for m in members if m.bot])}`\n"
                 f"{emoji.bullet} **Role(s)**: `{len(ctx.guild.roles)}`\n"
                 f"{emoji.bullet} **Server Created**: {discord.utils.format_dt(ctx.guild.created_at, 'R')}"
             ),
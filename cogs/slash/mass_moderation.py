@@ -1,9 +1,13 @@
 import discord
 import datetime
 from utils import database as db, emoji
+from utils.async_storage import store
+from utils.log_aggregator import log_aggregator
 from discord.ext import commands
 from discord.commands import option, SlashCommandGroup
 from utils.utils import parse_duration
+from utils.ratelimit import limit
+from utils.scheduler import scheduler
 from babel.dates import format_timedelta
 
 class MassModeration(commands.Cog):
@@ -24,10 +28,9 @@ class MassModeration(commands.Cog):
         return discord.Embed(title=title, description=desc, color=db.error_color)
 
     async def _log_action(self, guild, embed):
-        log_channel_id = db.mod_cmd_log_ch(guild.id)
+        log_channel_id = await store.guild(guild.id).get("mod_cmd_log_ch")
         if log_channel_id:
-            log_ch = await self.client.fetch_channel(log_channel_id)
-            await log_ch.send(embed=embed)
+            await log_aggregator.send(log_channel_id, embed)
 
     async def _convert_user(self, ctx, user_str):
         try:
@@ -36,6 +39,7 @@ class MassModeration(commands.Cog):
             return None
 
     @mass.command(name="kick")
+    @limit("mass")
     @discord.default_permissions(kick_members=True)
     @option("users", description="Mention the users to kick. Use ',' to separate users.", required=True)
     @option("reason", description="Reason for kicking the users", required=False)
@@ -45,7 +49,7 @@ class MassModeration(commands.Cog):
         kicked, errors = [], []
 
         if len(user_list) > 10:
-            await ctx.respond(embed=discord.Embed(description=f"{emoji.error} You can only mass kick up to 10 users.", color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(description=f"{emoji.error} You can only mass kick up to 10 users.", color=db.error_color), ephemeral=True)
             return
 
         for u in user_list:
@@ -59,21 +63,22 @@ class MassModeration(commands.Cog):
                 errors.append((member.mention, "User has same or higher role than you."))
             else:
                 try:
-                    await member.kick(reason=reason)
+                    await scheduler.call("moderation", member.kick, reason=reason, bucket=("members", ctx.guild.id))
                     kicked.append(member.mention)
                 except Exception as e:
                     errors.append((member.mention, str(e)))
 
         if kicked:
             embed = self._build_log_embed(f"{emoji.kick} Mass Kicked Users", reason, kicked, ctx.author)
-            await ctx.respond(embed=embed)
+            await scheduler.call("interaction", ctx.respond, embed=embed)
             await self._log_action(ctx.guild, embed)
 
         if errors:
             msg = "\n".join([f"{emoji.bullet2} **{u}**: {r}" for u, r in errors])
-            await ctx.respond(embed=discord.Embed(title=f"{emoji.error} Couldn't kick some users", description=msg, color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(title=f"{emoji.error} Couldn't kick some users", description=msg, color=db.error_color), ephemeral=True)
 
     @mass.command(name="ban")
+    @limit("mass")
     @discord.default_permissions(ban_members=True)
     @option("users", description="Mention the users to ban. Use ',' to separate users.", required=True)
     @option("reason", description="Reason for banning the users", required=False)
@@ -83,7 +88,7 @@ class MassModeration(commands.Cog):
         banned, errors = [], []
 
         if len(user_list) > 10:
-            await ctx.respond(embed=discord.Embed(description=f"{emoji.error} You can only mass ban up to 10 users.", color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(description=f"{emoji.error} You can only mass ban up to 10 users.", color=db.error_color), ephemeral=True)
             return
 
         for u in user_list:
@@ -97,21 +102,22 @@ class MassModeration(commands.Cog):
                 errors.append((member.mention, "User has same or higher role than you."))
             else:
                 try:
-                    await member.ban(reason=reason)
+                    await scheduler.call("moderation", member.ban, reason=reason, bucket=("members", ctx.guild.id))
                     banned.append(member.mention)
                 except Exception as e:
                     errors.append((member.mention, str(e)))
 
         if banned:
             embed = self._build_log_embed(f"{emoji.mod2} Mass Banned Users", reason, banned, ctx.author)
-            await ctx.respond(embed=embed)
+            await scheduler.call("interaction", ctx.respond, embed=embed)
             await self._log_action(ctx.guild, embed)
 
         if errors:
             msg = "\n".join([f"{emoji.bullet2} **{u}**: {r}" for u, r in errors])
-            await ctx.respond(embed=discord.Embed(title=f"{emoji.error} Couldn't ban some users", description=msg, color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(title=f"{emoji.error} Couldn't ban some users", description=msg, color=db.error_color), ephemeral=True)
 
     @mass.command(name="timeout")
+    @limit("mass")
     @discord.default_permissions(moderate_members=True)
     @option("users", description="Mention users separated by ','", required=True)
     @option("duration", description="Timeout duration (e.g. 10m, 1h, 1d)", required=True)
@@ -120,7 +126,7 @@ class MassModeration(commands.Cog):
         await ctx.defer()
         duration_seconds = parse_duration(duration)
         if duration_seconds is None:
-            await ctx.respond(embed=discord.Embed(description=f"{emoji.error} Invalid duration.", color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(description=f"{emoji.error} Invalid duration.", color=db.error_color), ephemeral=True)
             return
 
         until = datetime.datetime.utcnow() + datetime.timedelta(seconds=duration_seconds)
@@ -129,7 +135,7 @@ class MassModeration(commands.Cog):
         timed_out, errors = [], []
 
         if len(user_list) > 10:
-            await ctx.respond(embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
             return
 
         for u in user_list:
@@ -143,7 +149,7 @@ class MassModeration(commands.Cog):
                 errors.append((member.mention, "User has same or higher role than you."))
             else:
                 try:
-                    await member.timeout(until, reason=reason)
+                    await scheduler.call("moderation", member.timeout, until, reason=reason, bucket=("members", ctx.guild.id))
                     timed_out.append(member.mention)
                 except Exception as e:
                     errors.append((member.mention, str(e)))
@@ -151,14 +157,15 @@ class MassModeration(commands.Cog):
         if timed_out:
             extra = f"{emoji.bullet2} **Duration**: {readable}"
             embed = self._build_log_embed(f"{emoji.time} Mass Timed Out Users", reason, timed_out, ctx.author, extra=extra)
-            await ctx.respond(embed=embed)
+            await scheduler.call("interaction", ctx.respond, embed=embed)
             await self._log_action(ctx.guild, embed)
 
         if errors:
             msg = "\n".join([f"{emoji.bullet2} **{u}**: {r}" for u, r in errors])
-            await ctx.respond(embed=discord.Embed(title=f"{emoji.error} Couldn't timeout some users", description=msg, color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(title=f"{emoji.error} Couldn't timeout some users", description=msg, color=db.error_color), ephemeral=True)
 
     @mass.command(name="untimeout")
+    @limit("mass")
     @discord.default_permissions(moderate_members=True)
     @option("users", description="Mention users to untimeout", required=True)
     @option("reason", description="Reason for untimeout", required=False)
@@ -168,7 +175,7 @@ class MassModeration(commands.Cog):
         untimeouts, errors = [], []
 
         if len(user_list) > 10:
-            await ctx.respond(embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
             return
 
         for u in user_list:
@@ -177,21 +184,22 @@ class MassModeration(commands.Cog):
                 errors.append((u.strip(), "User not found."))
                 continue
             try:
-                await member.timeout(None, reason=reason)
+                await scheduler.call("moderation", member.timeout, None, reason=reason, bucket=("members", ctx.guild.id))
                 untimeouts.append(member.mention)
             except Exception as e:
                 errors.append((member.mention, str(e)))
 
         if untimeouts:
             embed = self._build_log_embed(f"{emoji.success} Mass Untimeout Users", reason, untimeouts, ctx.author)
-            await ctx.respond(embed=embed)
+            await scheduler.call("interaction", ctx.respond, embed=embed)
             await self._log_action(ctx.guild, embed)
 
         if errors:
             msg = "\n".join([f"{emoji.bullet2} **{u}**: {r}" for u, r in errors])
-            await ctx.respond(embed=discord.Embed(title=f"{emoji.error} Couldn't untimeout some users", description=msg, color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(title=f"{emoji.error} Couldn't untimeout some users", description=msg, color=db.error_color), ephemeral=True)
 
     @mass.command(name="role-add")
+    @limit("mass")
     @discord.default_permissions(manage_roles=True)
     @option("users", description="Mention users to add role to", required=True)
     @option("role", discord.Role, description="Role to add", required=True)
@@ -201,7 +209,7 @@ class MassModeration(commands.Cog):
         added, errors = [], []
 
         if len(user_list) > 10:
-            await ctx.respond(embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
             return
 
         for u in user_list:
@@ -210,21 +218,22 @@ class MassModeration(commands.Cog):
                 errors.append((u.strip(), "User not found."))
                 continue
             try:
-                await member.add_roles(role)
+                await scheduler.call("moderation", member.add_roles, role, bucket=("members", ctx.guild.id))
                 added.append(member.mention)
             except Exception as e:
                 errors.append((member.mention, str(e)))
 
         if added:
             embed = self._build_log_embed(f"{emoji.plus} Mass Role Add", f"Added {role.mention}", added, ctx.author)
-            await ctx.respond(embed=embed)
+            await scheduler.call("interaction", ctx.respond, embed=embed)
             await self._log_action(ctx.guild, embed)
 
         if errors:
             msg = "\n".join([f"{emoji.bullet2} **{u}**: {r}" for u, r in errors])
-            await ctx.respond(embed=discord.Embed(title=f"{emoji.error} Couldn't add role to some users", description=msg, color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(title=f"{emoji.error} Couldn't add role to some users", description=msg, color=db.error_color), ephemeral=True)
 
     @mass.command(name="role-remove")
+    @limit("mass")
     @discord.default_permissions(manage_roles=True)
     @option("users", description="Mention users to remove role from", required=True)
     @option("role", discord.Role, description="Role to remove", required=True)
@@ -234,7 +243,7 @@ class MassModeration(commands.Cog):
         removed, errors = [], []
 
         if len(user_list) > 10:
-            await ctx.respond(embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(description=f"{emoji.error} Max 10 users allowed.", color=db.error_color), ephemeral=True)
             return
 
         for u in user_list:
@@ -243,18 +252,18 @@ class MassModeration(commands.Cog):
                 errors.append((u.strip(), "User not found."))
                 continue
             try:
-                await member.remove_roles(role)
+                await scheduler.call("moderation", member.remove_roles, role, bucket=("members", ctx.guild.id))
                 removed.append(member.mention)
             except Exception as e:
                 errors.append((member.mention, str(e)))
 
         if removed:
             embed = self._build_log_embed(f"{emoji.minus} Mass Role Remove", f"Removed {role.mention}", removed, ctx.author)
-            await ctx.respond(embed=embed)
+            await scheduler.call("interaction", ctx.respond, embed=embed)
             await self._log_action(ctx.guild, embed)
 
         if errors:
             msg = "\n".join([f"{emoji.bullet2} **{u}**: {r}" for u, r in errors])
-            await ctx.respond(embed=discord.Embed(title=f"{emoji.error} Couldn't remove role from some users", description=msg, color=db.error_color), ephemeral=True)
+            await scheduler.call("interaction", ctx.respond, embed=discord.Embed(title=f"{emoji.error} Couldn't remove role from some users", description=msg, color=db.error_color), ephemeral=True)
 def setup(client):
     client.add_cog(MassModeration(client))
\ No newline at end of file
@@ -1,44 +1,68 @@
 import discord
 from utils import database as db, emoji
+from utils.async_storage import store
+from utils.message_cache import message_cache, CachedMessage
+from utils.log_aggregator import log_aggregator
+from utils.raid import raid_monitor
 from discord.ext import commands
 
 class Logs(commands.Cog):
     def __init__(self, client):
         self.client = client
+        raid_monitor.report = self.report_raid
 
     # Join
     @commands.Cog.listener()
     async def on_member_join(self, user: discord.Member):
-        if db.mod_log_ch(user.guild.id) is not None:
-            join_ch = await self.client.fetch_channel(db.mod_log_ch(user.guild.id))
+        mod_log_ch = await store.guild(user.guild.id).get("mod_log_ch")
+        if mod_log_ch is not None and raid_monitor.record(user.guild.id, "join", user):
             join_em = discord.Embed(
                 title=f"{emoji.plus} Member Joined",
                 description=f"{emoji.bullet} **Name**: {user.mention}\n" +
                             f"{emoji.bullet} **Account Created**: {discord.utils.format_dt(user.created_at, 'R')}",
                 color=db.theme_color)
             join_em.set_thumbnail(url=f"{user.avatar.url}")
-            await join_ch.send(embed=join_em)
+            await log_aggregator.send(mod_log_ch, join_em)
 
-    # Leave
+    # Leave (raw, so members missing from a restricted member cache are logged too)
     @commands.Cog.listener()
-    async def on_member_remove(self, user: discord.Member):
-        if db.mod_log_ch(user.guild.id) is not None:
-            leave_ch = await self.client.fetch_channel(db.mod_log_ch(user.guild.id))
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # A discord.Member when it was cached, else a discord.User without joined_at
+        user = payload.user
+        mod_log_ch = await store.guild(payload.guild_id).get("mod_log_ch")
+        if mod_log_ch is not None and raid_monitor.record(payload.guild_id, "leave", user):
+            joined_at = getattr(user, "joined_at", None)
             leave_em = discord.Embed(
                 title=f"{emoji.minus} Member Left",
                 description=f"{emoji.bullet2} **Name**: {user.mention}\n" +
-                            f"{emoji.bullet2} **Account Created**: {discord.utils.format_dt(user.created_at, 'R')}\n" +
-                            f"{emoji.bullet2} **Server Joined**: {discord.utils.format_dt(user.joined_at, 'R')}",
+                            f"{emoji.bullet2} **Account Created**: {discord.utils.format_dt(user.created_at, 'R')}" +
+                            (f"\n{emoji.bullet2} **Server Joined**: {discord.utils.format_dt(joined_at, 'R')}" if joined_at else ""),
                 color=db.error_color)
             leave_em.set_thumbnail(url=f"{user.avatar.url}")
-            await leave_ch.send(embed=leave_em)
+            await log_aggregator.send(mod_log_ch, leave_em)
 
+    # Join/leave digest while many members join or leave at once
+    async def report_raid(self, guild_id: int, digest, ended: bool):
+        mod_log_ch = await store.guild(guild_id).get("mod_log_ch")
+        if mod_log_ch is not None:
+            raid_em = discord.Embed(
+                title=f"{emoji.mod2} Join/Leave Surge{' Ended' if ended else ''}",
+                description=f"{emoji.bullet2} **Since**: <t:{int(digest.started)}:R>\n" +
+                            f"{emoji.bullet2} **Joined**: `{digest.counts['join']}`\n" +
+                            f"{emoji.bullet2} **Left**: `{digest.counts['leave']}`",
+                color=db.theme_color if ended else db.error_color)
+            if digest.seen:
+                raid_em.add_field(name="Account Age", value="\n".join(f"{emoji.bullet} {label}: `{count}`" for label, count in digest.histogram()))
+                raid_em.add_field(name="Sample", value="\n".join(f"{emoji.plus if kind == 'join' else emoji.minus} <@{member_id}> ({name})" for kind, member_id, name in digest.samples)[:1024])
+            if not ended:
+                raid_em.set_footer(text="Joins and leaves are summarized until the rate drops.")
+            await log_aggregator.send(mod_log_ch, raid_em)
 
     # Ban
     @commands.Cog.listener()
     async def on_member_ban(self, user: discord.Member):
-        if db.mod_log_ch(user.guild.id) is not None:
-            ban_ch = await self.client.fetch_channel(db.mod_log_ch(user.guild.id))
+        mod_log_ch = await store.guild(user.guild.id).get("mod_log_ch")
+        if mod_log_ch is not None:
             ban_em = discord.Embed(
                 title=f"{emoji.mod2} Member Banned",
                 description=f"{emoji.bullet2} **Name**: {user.mention}\n" +
@@ -46,100 +70,115 @@ class Logs(commands.Cog):
                             f"{emoji.bullet2} **Server Joined**: {discord.utils.format_dt(user.joined_at, 'R')}",
                 color=db.error_color)
             ban_em.set_thumbnail(url=f"{user.avatar.url}")
-            await ban_ch.send(embed=ban_em)
+            await log_aggregator.send(mod_log_ch, ban_em)
 
     # Unban
     @commands.Cog.listener()
     async def on_member_unban(self, user: discord.Member):
-        if db.mod_log_ch(user.guild.id) is not None:
-            unban_ch = await self.client.fetch_channel(db.mod_log_ch(user.guild.id))
+        mod_log_ch = await store.guild(user.guild.id).get("mod_log_ch")
+        if mod_log_ch is not None:
             unban_em = discord.Embed(
                 title=f"{emoji.mod} Member Unbanned",
                 description=f"{emoji.bullet} **Name**: {user.mention}\n" +
                             f"{emoji.bullet} **Account Created**: {discord.utils.format_dt(user.created_at, 'R')}",
                 color=db.theme_color)
             unban_em.set_thumbnail(url=f"{user.avatar.url}")
-            await unban_ch.send(embed=unban_em)
+            await log_aggregator.send(mod_log_ch, unban_em)
+
+    # Cache messages of guilds with a message log channel
+    @commands.Cog.listener()
+    async def on_message(self, msg: discord.Message):
+        if msg.guild is None or msg.author.bot:
+            return
+        if await store.guild(msg.guild.id).get("msg_log_ch") is None:
+            message_cache.drop_guild(msg.guild.id)
+            return
+        message_cache.add(msg.guild.id, CachedMessage.from_message(msg))
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        message_cache.drop_guild(guild.id)
 
     # Edit
     @commands.Cog.listener()
-    async def on_message_edit(self, msg_before: discord.Message, msg_after: discord.Message):
-        msg_ch = db.msg_log_ch(msg_before.guild.id) if msg_before.guild else None
-        if msg_before.author and msg_after.author == self.client.user:
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        if payload.guild_id is None or "content" not in payload.data:
             return
-        elif msg_before.author.bot:
+        msg_before = message_cache.get(payload.guild_id, payload.message_id)
+        if msg_before is None or msg_before.content == payload.data["content"]:
+            # Not cached (bot message, no message log, too old), or only embeds changed
             return
-        elif msg_ch is not None:
-            edit_ch= await self.client.fetch_channel(msg_ch)
+        attachments = payload.data.get("attachments")
+        msg_after = msg_before.replace(payload.data["content"], None if attachments is None else tuple(attachment["url"] for attachment in attachments))
+        message_cache.add(payload.guild_id, msg_after)
+        msg_ch = await store.guild(payload.guild_id).get("msg_log_ch")
+        if msg_ch is not None:
             edit_em = discord.Embed(
                 title=f"{emoji.edit} Message Edited",
-                description=f"{emoji.bullet} **Author**: {msg_before.author.mention}\n" +
-                            f"{emoji.bullet} **Channel**: {msg_before.channel.mention}\n" +
-                            f"{emoji.bullet} **Message:** [Jump to Message]({msg_before.jump_url})\n" +
+                description=f"{emoji.bullet} **Author**: <@{msg_before.author_id}>\n" +
+                            f"{emoji.bullet} **Channel**: <#{msg_before.channel_id}>\n" +
+                            f"{emoji.bullet} **Message:** [Jump to Message]({msg_before.jump_url(payload.guild_id)})\n" +
                             f"{emoji.bullet2} **Original Message**: {msg_before.content}\n" +
                             f"{emoji.bullet} **Edited Message**: {msg_after.content}",
                 color=db.theme_color)
             if msg_before.attachments:
-                edit_em.description += f"\n{emoji.bullet} **Removed Attachment**: [Click Here]({msg_before.attachments[0].url})"
-                edit_em.set_image(url=msg_before.attachments[0].url)
-            await edit_ch.send(embed=edit_em)
+                edit_em.description += f"\n{emoji.bullet} **Removed Attachment**: [Click Here]({msg_before.attachments[0]})"
+                edit_em.set_image(url=msg_before.attachments[0])
+            await log_aggregator.send(msg_ch, edit_em)
 
     # Delete
     @commands.Cog.listener()
-    async def on_message_delete(self, msg: discord.Message):
-        msg_ch = db.msg_log_ch(msg.guild.id) if msg.guild else None
-        if msg.author == self.client.user:
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if payload.guild_id is None:
             return
-        elif msg.author.bot:
+        msg = message_cache.pop(payload.guild_id, payload.message_id)
+        if msg is None:
             return
-        elif msg_ch is not None:
-            del_ch = await self.client.fetch_channel(msg_ch)
+        msg_ch = await store.guild(payload.guild_id).get("msg_log_ch")
+        if msg_ch is not None:
             del_em = discord.Embed(
                 title=f"{emoji.bin} Message Deleted",
-                description=f"{emoji.bullet2} **Author**: {msg.author.mention}\n" +
-                            f"{emoji.bullet2} **Channel**: {msg.channel.mention}\n" +
+                description=f"{emoji.bullet2} **Author**: <@{msg.author_id}>\n" +
+                            f"{emoji.bullet2} **Channel**: <#{msg.channel_id}>\n" +
                             f"{emoji.bullet2} **Message**: {msg.content}",
                 color=db.error_color)
             if msg.attachments:
-                del_em.description += f"\n{emoji.bullet2} **Attachment(s)**: {', '.join([f'[Click Here]({attachment.url})' for attachment in msg.attachments])}"
-            await del_ch.send(embed=del_em)
+                del_em.description += f"\n{emoji.bullet2} **Attachment(s)**: {', '.join([f'[Click Here]({url})' for url in msg.attachments])}"
+            await log_aggregator.send(msg_ch, del_em)
             # Deleted Attachments
             if msg.attachments:
                 del_list: list = []
-                for attachment in msg.attachments:
+                for url in msg.attachments:
                     del_em_attach = discord.Embed(
                         title=f"{emoji.bin} Attachment Deleted",
-                        description=f"{emoji.bullet2} **Author**: {msg.author.mention}\n" +
-                                    f"{emoji.bullet2} **Channel**: {msg.channel.mention}\n" +
-                                    f"{emoji.bullet2} **Attachment**: [Click Here]({attachment.url})",
+                        description=f"{emoji.bullet2} **Author**: <@{msg.author_id}>\n" +
+                                    f"{emoji.bullet2} **Channel**: <#{msg.channel_id}>\n" +
+                                    f"{emoji.bullet2} **Attachment**: [Click Here]({url})",
                         color=db.error_color)
-                    del_em_attach.set_image(url=attachment.url)
+                    del_em_attach.set_image(url=url)
                     del_list.append(del_em_attach)
-                await del_ch.send(embeds=del_list) # Limited to send 10 embeds because of discord limitations, user: discord.Members are also limited to 10 attachments per message so this will work fine.
+                await log_aggregator.send(msg_ch, *del_list) # Limited to send 10 embeds because of discord limitations, user: discord.Members are also limited to 10 attachments per message so this will work fine.
 
     # Bulk delete
     @commands.Cog.listener()
-    async def on_bulk_message_delete(self, msgs: list[discord.Message]):
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        if payload.guild_id is None:
+            return
+        msgs = [msg for msg in (message_cache.pop(payload.guild_id, message_id) for message_id in payload.message_ids) if msg is not None]
         if not msgs:
-            return  # Handle empty list of messages
+            return  # Only bot messages, or none we know of
 
-        msg_ch = db.msg_log_ch(msgs[0].guild.id)
-        if msgs[0].author == self.client.user:
-            return
-        elif msgs[0].author.bot:
-            return
-        elif msg_ch is not None:
-            bulk_ch = await self.client.fetch_channel(msg_ch)
-            # Get a sample author and channel as bulk delete can involve multiple
-            sample_author = msgs[0].author
-            sample_channel = msgs[0].channel
+        msg_ch = await store.guild(payload.guild_id).get("msg_log_ch")
+        if msg_ch is not None:
+            # Get a sample author as bulk delete can involve multiple
+            sample_author = msgs[0].author_id
             bulk_em = discord.Embed(
                 title=f"{emoji.bin} Bulk Message Deleted",
-                description=f"{emoji.bullet2} **Author**: {sample_author.mention}\n" +
-                            f"{emoji.bullet2} **Channel**: {sample_channel.mention}\n" +
-                            f"{emoji.bullet2} **Messages Deleted**: {len(msgs)}",
+                description=f"{emoji.bullet2} **Author**: <@{sample_author}>\n" +
+                            f"{emoji.bullet2} **Channel**: <#{payload.channel_id}>\n" +
+                            f"{emoji.bullet2} **Messages Deleted**: {len(payload.message_ids)}",
                 color=db.error_color)
-            await bulk_ch.send(embed=bulk_em)
+            await log_aggregator.send(msg_ch, bulk_em)
 
 def setup(client: discord.Client):
     client.add_cog(Logs(client))
\ No newline at end of file
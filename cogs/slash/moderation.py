@@ -4,6 +4,7 @@ from utils import database as db, emoji
 from discord.ext import commands
 from discord.commands import slash_command, option, SlashCommandGroup
 from utils.utils import parse_duration
+from utils.ratelimit import limit
 from babel.dates import format_timedelta
 
 class Moderation(commands.Cog):
@@ -15,6 +16,7 @@ class Moderation(commands.Cog):
 
     # Purge any
     @purge.command(name="any")
+    @limit("purge")
     @discord.default_permissions(manage_messages=True)
     @option("amount", description="Enter an integer between 1 to 1000.")
     async def purge_any(self, ctx: discord.ApplicationContext, amount: int):
@@ -34,6 +36,7 @@ class Moderation(commands.Cog):
 
     # Purge humans
     @purge.command(name="humans")
+    @limit("purge")
     @discord.default_permissions(manage_messages=True)
     @option("amount", description="Enter an integer between 1 to 1000.")
     async def purge_humans(self, ctx: discord.ApplicationContext, amount: int):
@@ -53,6 +56,7 @@ class Moderation(commands.Cog):
 
     # Purge bots
     @purge.command(name="bots")
+    @limit("purge")
     @discord.default_permissions(manage_messages=True)
     @option("amount", description="Enter an integer between 1 to 1000.")
     async def purge_bots(self, ctx: discord.ApplicationContext, amount: int):
@@ -72,6 +76,7 @@ class Moderation(commands.Cog):
 
     # Purge user
     @purge.command(name="user")
+    @limit("purge")
     @discord.default_permissions(manage_messages=True)
     @option("amount", description="Enter an integer between 1 to 1000.")
     @option("user", description="Mention the user whose messages you want to purge.")
@@ -92,6 +97,7 @@ class Moderation(commands.Cog):
 
     # Purge containing phrase
     @purge.command(name="contains")
+    @limit("purge")
     @discord.default_permissions(manage_messages=True)
     @option("amount", description="Enter an integer between 1 to 1000.")
     @option("phrase", description="Enter the phrase to purge messages containing it.")
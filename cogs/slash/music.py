@@ -1,5 +1,4 @@
 import datetime
-import aiohttp
 import discord
 import asyncio
 import math
@@ -8,7 +7,9 @@ import lavalink
 import discord.ui
 import asyncio
 from typing import Tuple
-from utils import database as db, emoji
+from utils import database as db, emoji, http
+from utils.ratelimit import limiter, limit
+from utils.scheduler import scheduler
 from discord.ext import commands, tasks
 from discord.commands import slash_command, option
 from babel.dates import format_timedelta
@@ -91,28 +92,25 @@ class SpotifySource(lavalink.Source):
 # Spotify source
     async def get(self):
         token = ""
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://open.spotify.com/get_access_token?reason=transport&productType=web_player") as resp:
-                res = await resp.json()
-                token = res['accessToken']
+        session = http.session()
+        async with session.get("https://open.spotify.com/get_access_token?reason=transport&productType=web_player") as resp:
+            res = await resp.json()
+            token = res['accessToken']
         if "playlist" in self.url:
             pl_id = self.url.split("/playlist/")[1]
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"https://api.spotify.com/v1/playlists/{pl_id}", headers={"Authorization": f"Bearer {token}"}) as resp:
-                    res = await resp.json()
-                    return res
+            async with session.get(f"https://api.spotify.com/v1/playlists/{pl_id}", headers={"Authorization": f"Bearer {token}"}) as resp:
+                res = await resp.json()
+                return res
         elif "album" in self.url:
             al_id = self.url.split("/album/")[1]
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"https://api.spotify.com/v1/albums/{al_id}", headers={"Authorization": f"Bearer {token}"}) as resp:
-                    res = await resp.json()
-                    return res
+            async with session.get(f"https://api.spotify.com/v1/albums/{al_id}", headers={"Authorization": f"Bearer {token}"}) as resp:
+                res = await resp.json()
+                return res
         elif "track" in self.url:
             track_id = self.url.split("/track/")[1]
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"https://api.spotify.com/v1/tracks/{track_id}", headers={"Authorization": f"Bearer {token}"}) as resp:
-                    res = await resp.json()
-                    return res
+            async with session.get(f"https://api.spotify.com/v1/tracks/{track_id}", headers={"Authorization": f"Bearer {token}"}) as resp:
+                res = await resp.json()
+                return res
 
 # Load playlist
     async def _load_pl(self) -> Tuple[list[SpotifyAudioTrack], lavalink.PlaylistInfo]:
@@ -245,7 +243,7 @@ class MusicView(discord.ui.View):
         await interaction.response.edit_message(view=self)
         await guild.voice_client.disconnect(force=True)
         await interaction.followup.send(embed=stop_embed, delete_after=5)
-        await Disable(self.client, guild.id).queue_msg()
+        await Disable(self.client, guild.id).player_destroyed()
 
 # Skip
     @discord.ui.button(emoji=f"{emoji.skip2}", custom_id="skip", style=discord.ButtonStyle.grey)
@@ -393,25 +391,34 @@ class Disable:
         self.guild_id = guild_id
 
     # Disable queue menu
-    async def edit_messages_async(self, queue_view, messages) -> None:
-        tasks = [msg.edit(view=queue_view) for msg in messages]
-        await asyncio.gather(*tasks)
+    async def edit_messages_async(self, queue_view, handles) -> None:
+        tasks = [scheduler.call("background", handle.resolve(self.client).edit, view=queue_view, bucket=("channel", handle.channel_id)) for handle in handles]
+        # A queue message may have been deleted meanwhile
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     async def queue_msg(self) -> None:
-        if len(db.queue_msg(self.guild_id)) > 0:
+        handles = db.queue_msg(self.guild_id)
+        if len(handles) > 0:
             queue_view = QueueView(self.client, page=1, timeout=None)
             for child in queue_view.children:
                 child.disabled = True
-            await self.edit_messages_async(queue_view, db.queue_msg(self.guild_id))
-            db.queue_msg(self.guild_id, "clear")
+            await self.edit_messages_async(queue_view, handles)
+            db.queue_msg(self.guild_id, mode="clear")
 
     # Disable play message
     async def play_msg(self) -> None:
-        play_msg = db.play_msg(self.guild_id)
+        handle = db.play_msg(self.guild_id)
+        if handle is None:
+            return
         music_view = MusicView(self.client, timeout=None)
         for child in music_view.children:
             child.disabled = True
-        await play_msg.edit(view=music_view)
+        await scheduler.call("background", handle.resolve(self.client).edit, view=music_view, bucket=("channel", handle.channel_id))
+
+    # Player destroyed
+    async def player_destroyed(self) -> None:
+        await self.queue_msg()
+        db.clear_runtime(self.guild_id)
 
 class Music(commands.Cog):
     def __init__(self, client: discord.Client):
@@ -433,6 +440,11 @@ class Music(commands.Cog):
             )
             self.client.lavalink.add_event_hook(self.track_hook)
 
+# Play channel
+    def play_channel(self, guild_id: int):
+        channel_id = db.play_ch_id(guild_id)
+        return self.client.get_partial_messageable(channel_id) if channel_id else None
+
 # Current voice
     def current_voice_channel(self, ctx: discord.ApplicationContext):
         if ctx.guild and ctx.guild.me.voice:
@@ -447,7 +459,9 @@ class Music(commands.Cog):
     async def track_hook(self, event: lavalink.Event):
         if isinstance(event, lavalink.events.TrackStartEvent):
             player: lavalink.DefaultPlayer = self.client.lavalink.player_manager.get(int(event.player.guild_id))
-            channel = db.play_ch_id(event.player.guild_id)
+            channel = self.play_channel(event.player.guild_id)
+            if channel is None:
+                return
             requester = f"<@{player.current.requester}>"
             if player.current.stream:
                 duration = "🔴 LIVE"
@@ -482,21 +496,23 @@ class Music(commands.Cog):
         if isinstance(event, lavalink.events.TrackEndEvent):
             await Disable(self.client, event.player.guild_id).play_msg()
         if isinstance(event, lavalink.events.TrackStuckEvent):
-            channel = db.play_ch_id(event.player.guild_id)
+            channel = self.play_channel(event.player.guild_id)
             error_em = discord.Embed(description=f"{emoji.error} Error while playing the track. Please try again later.", color=db.error_color)
             await Disable(self.client, event.player.guild_id).play_msg()
-            await channel.send(embed=error_em, delete_after=5)
+            if channel:
+                await channel.send(embed=error_em, delete_after=5)
         if isinstance(event, lavalink.events.TrackExceptionEvent):
-            channel = db.play_ch_id(event.player.guild_id)
+            channel = self.play_channel(event.player.guild_id)
             error_em = discord.Embed(description=f"{emoji.error} Error while playing the track. Please try again later.", color=db.error_color)
             await Disable(self.client, event.player.guild_id).play_msg()
-            await channel.send(embed=error_em, delete_after=5)
+            if channel:
+                await channel.send(embed=error_em, delete_after=5)
         if isinstance(event, lavalink.events.QueueEndEvent):
             player: lavalink.DefaultPlayer = self.client.lavalink.player_manager.get(int(event.player.guild_id))
             guild: discord.Guild = self.client.get_guild(int(event.player.guild_id))
             await player.clear_filters()
             await guild.voice_client.disconnect(force=True)
-            await Disable(self.client, event.player.guild_id).queue_msg()
+            await Disable(self.client, event.player.guild_id).player_destroyed()
 
 # Ensures voice parameters
     async def ensure_voice(self, ctx: discord.ApplicationContext):
@@ -545,6 +561,8 @@ class Music(commands.Cog):
 # Search autocomplete
     async def search(self, ctx: discord.AutocompleteContext):
         """Searches a track from a given query."""
+        if limiter.hit("music_autocomplete", ctx.interaction):
+            return []
         player: lavalink.DefaultPlayer = self.client.lavalink.player_manager.create(ctx.interaction.guild_id)
         if ctx.value != "":
             result = await player.node.get_tracks(f"ytsearch:{ctx.value}")
@@ -575,6 +593,7 @@ class Music(commands.Cog):
 
 # Play
     @slash_command(guild_ids=db.guild_ids(), name="play")
+    @limit("music_search")
     @option("query", description="Enter your track name/link or playlist link", autocomplete=search)
     async def play(self, ctx: discord.ApplicationContext, query: str):
         """Searches and plays a track from a given query."""
@@ -714,7 +733,7 @@ class Music(commands.Cog):
             disable = Disable(self.client, ctx.guild.id)
             await disable.play_msg()
             await ctx.respond(embed=stop_embed)
-            await disable.queue_msg()
+            await disable.player_destroyed()
 
 # Seek
     @slash_command(guild_ids=db.guild_ids(), name="seek")
@@ -851,6 +870,8 @@ class Music(commands.Cog):
                 if pages > 1:
                     queue_view = QueueView(client=self.client, page=page, timeout=60)
                     queue_msg = await ctx.respond(embed=queue_em, view=queue_view)
+                    if isinstance(queue_msg, discord.Interaction):
+                        queue_msg = await queue_msg.original_response()
                     db.queue_msg(ctx.guild.id, queue_msg, "set")
                 else:
                     await ctx.respond(embed=queue_em)
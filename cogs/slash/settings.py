@@ -1,5 +1,7 @@
 import discord
 from utils import database as db, emoji
+from utils.async_storage import store
+from utils.channels import channels
 from discord.ext import commands
 from discord.commands import slash_command, option, SlashCommandGroup
 
@@ -15,18 +17,20 @@ class Settings(commands.Cog):
 
         # Fetch channel mention util func
         async def fetch_channel_mention(channel_id):
-            return (await self.client.fetch_channel(channel_id)).mention if channel_id else emoji.off
+            channel = await channels.get(channel_id)
+            return channel.mention if channel else emoji.off
 
-        mod_channel = await fetch_channel_mention(db.mod_log_ch(ctx.guild.id))
-        mod_cmd_channel = await fetch_channel_mention(db.mod_cmd_log_ch(ctx.guild.id))
-        msg_channel = await fetch_channel_mention(db.msg_log_ch(ctx.guild.id))
-        ticket_cmds = emoji.on if db.ticket_cmds(ctx.guild.id) else emoji.off
-        ticket_channel = await fetch_channel_mention(db.ticket_log_ch(ctx.guild.id))
+        guild_settings = await store.guild(ctx.guild.id).snapshot()
+        mod_channel = await fetch_channel_mention(guild_settings.mod_log_ch)
+        mod_cmd_channel = await fetch_channel_mention(guild_settings.mod_cmd_log_ch)
+        msg_channel = await fetch_channel_mention(guild_settings.msg_log_ch)
+        ticket_cmds = emoji.on if guild_settings.ticket_cmds else emoji.off
+        ticket_channel = await fetch_channel_mention(guild_settings.ticket_log_ch)
 
-        role_id = db.autorole(ctx.guild.id)
+        role_id = guild_settings.autorole
         autorole = (ctx.guild.get_role(role_id).mention if (role_id and ctx.guild.get_role(role_id)) else emoji.off)
         if role_id and not ctx.guild.get_role(role_id):
-            db.autorole(ctx.guild.id, None, "set")
+            await store.guild(ctx.guild.id).set("autorole", None)
 
         set_em = discord.Embed(
             title=f"{emoji.settings} {ctx.guild.name}'s Settings",
@@ -54,17 +58,17 @@ class Settings(commands.Cog):
         else:
             match setting.lower():
                 case "mod log":
-                    db.mod_log_ch(guild_id=ctx.guild.id, channel_id=None, mode="set")
+                    await store.guild(ctx.guild.id).update(mod_log_ch=None)
                 case "mod command log":
-                    db.mod_cmd_log_ch(guild_id=ctx.guild.id, channel_id=None, mode="set")
+                    await store.guild(ctx.guild.id).update(mod_cmd_log_ch=None)
                 case "message log":
-                    db.msg_log_ch(guild_id=ctx.guild.id, channel_id=None, mode="set")
+                    await store.guild(ctx.guild.id).update(msg_log_ch=None)
                 case "ticket commands":
-                    db.ticket_cmds(guild_id=ctx.guild.id, status=True, mode="set")
+                    await store.guild(ctx.guild.id).update(ticket_cmds=True)
                 case "ticket log":
-                    db.ticket_log_ch(guild_id=ctx.guild.id, channel_id=None, mode="set")
+                    await store.guild(ctx.guild.id).update(ticket_log_ch=None)
                 case "auto role":
-                    db.autorole(guild_id=ctx.guild.id, role_id=None, mode="set")
+                    await store.guild(ctx.guild.id).update(autorole=None)
         reset_em = discord.Embed(
             title=f"{emoji.settings} Reset Settings",
             description=f"Successfully reset the {setting.lower()} settings.",
@@ -78,7 +82,7 @@ class Settings(commands.Cog):
     @option("channel", description="Mention the mod log channel")
     async def set_mod_log(self, ctx: discord.ApplicationContext, channel: discord.TextChannel):
         """Sets mod log channel."""
-        db.mod_log_ch(guild_id=ctx.guild.id, channel_id=int(channel.id), mode="set")
+        await store.guild(ctx.guild.id).update(mod_log_ch=int(channel.id))
         logging_em = discord.Embed(
             title=f"{emoji.settings} Mod Log Settings",
             description=f"Successfully set mod log channel to {channel.mention}.",
@@ -92,7 +96,7 @@ class Settings(commands.Cog):
     @option("channel", description="Mention the mod command log channel")
     async def set_mod_cmd_log(self, ctx: discord.ApplicationContext, channel: discord.TextChannel):
         """Sets mod command log channel."""
-        db.mod_cmd_log_ch(guild_id=ctx.guild.id, channel_id=int(channel.id), mode="set")
+        await store.guild(ctx.guild.id).update(mod_cmd_log_ch=int(channel.id))
         logging_em = discord.Embed(
             title=f"{emoji.settings} Mod Command Log Settings",
             description=f"Successfully set mod command log channel to {channel.mention}.",
@@ -106,7 +110,7 @@ class Settings(commands.Cog):
     @option("channel", description="Mention the message log channel")
     async def set_msg_log(self, ctx: discord.ApplicationContext, channel: discord.TextChannel):
         """Sets message log channel."""
-        db.msg_log_ch(guild_id=ctx.guild.id, channel_id=int(channel.id), mode="set")
+        await store.guild(ctx.guild.id).update(msg_log_ch=int(channel.id))
         logging_em = discord.Embed(
             title=f"{emoji.settings} Message Log Settings",
             description=f"Successfully set message log channel to {channel.mention}.",
@@ -122,9 +126,9 @@ class Settings(commands.Cog):
         """Enables or disables ticket commands."""
         match status.lower():
             case "enable":
-                db.ticket_cmds(guild_id=ctx.guild.id, status=True, mode="set")
+                await store.guild(ctx.guild.id).update(ticket_cmds=True)
             case "disable":
-                db.ticket_cmds(guild_id=ctx.guild.id, status=False, mode="set")
+                await store.guild(ctx.guild.id).update(ticket_cmds=False)
         ticket_cmds_em = discord.Embed(
             title=f"{emoji.settings} Ticket Commands Settings",
             description=f"Successfully {status.lower()}d ticket commands.",
@@ -138,7 +142,7 @@ class Settings(commands.Cog):
     @option("channel", description="Mention the ticket log channel")
     async def set_ticket_log(self, ctx: discord.ApplicationContext, channel: discord.TextChannel):
         """Sets ticket log channel."""
-        db.ticket_log_ch(guild_id=ctx.guild.id, channel_id=int(channel.id), mode="set")
+        await store.guild(ctx.guild.id).update(ticket_log_ch=int(channel.id))
         logging_em = discord.Embed(
             title=f"{emoji.settings} Ticket Log Settings",
             description=f"Successfully set ticket log channel to {channel.mention}.",
@@ -159,7 +163,7 @@ class Settings(commands.Cog):
             error_em = discord.Embed(description=f"{emoji.error} I can't assign the @everyone role.", color=db.error_color)
             await ctx.respond(embed=error_em, ephemeral=True)
         else:
-            db.autorole(guild_id=ctx.guild.id, role_id=int(role.id), mode="set")
+            await store.guild(ctx.guild.id).update(autorole=int(role.id))
             autorole_em = discord.Embed(
                 title=f"{emoji.settings} Auto Role Settings",
                 description=f"Successfully set autorole to {role.mention}.",
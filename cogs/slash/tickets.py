@@ -2,6 +2,8 @@ import discord
 import asyncio
 import io
 from utils import database as db, emoji
+from utils.async_storage import store
+from utils.log_sink import log_sink
 from discord.ext import commands
 from discord.commands import option, SlashCommandGroup
 
@@ -49,15 +51,15 @@ class TicketView(discord.ui.View):
         await interaction.followup.send(embed=close_em)
         await asyncio.sleep(5)
         await interaction.channel.delete()
-        if db.ticket_log_ch(interaction.guild.id) is not None:
-            logging_ch = await interaction.channel.guild.fetch_channel(db.ticket_log_ch(interaction.guild.id))
+        ticket_log_ch = await store.guild(interaction.guild.id).get("ticket_log_ch")
+        if ticket_log_ch is not None:
             close_log_em = discord.Embed(
                 title=f"{emoji.ticket2} Ticket Closed",
                 description=f"{emoji.bullet} **Author**: <@{interaction.channel.name.split('-')[1]}>\n" +
                             f"{emoji.bullet} **Closed By**: {interaction.user.mention}",
                 color=db.theme_color
             )
-            await logging_ch.send(embed=close_log_em)
+            await log_sink.send(ticket_log_ch, embed=close_log_em)
 
 # Ticket summary
     @discord.ui.button(label="Transcript", emoji=emoji.embed, style=discord.ButtonStyle.grey, custom_id="ticket_summary")
@@ -83,7 +85,8 @@ class Tickets(commands.Cog):
     @option("reason", description="Enter your reason for creating the ticket", required=False)
     async def create_ticket(self, ctx: discord.ApplicationContext, reason: str = "No reason provided"):
         """Creates a ticket."""
-        if db.ticket_cmds(ctx.guild.id) is False:
+        guild_settings = await store.guild(ctx.guild.id).snapshot()
+        if guild_settings.ticket_cmds is False:
             error_em = discord.Embed(description=f"{emoji.error} Ticket commands are disabled", color=db.error_color)
             await ctx.respond(embed=error_em, ephemeral=True)
         else:
@@ -113,21 +116,21 @@ class Tickets(commands.Cog):
             )
             await ctx.respond(embed=create_done_em)
 
-            if db.ticket_log_ch(ctx.guild.id) is not None:
-                logging_ch = await self.client.fetch_channel(db.ticket_log_ch(ctx.guild.id))
+            if guild_settings.ticket_log_ch is not None:
                 create_log_em = discord.Embed(
                     title=f"{emoji.ticket} Ticket Created",
                     description=f"{emoji.bullet} **Author**: {ctx.author.mention}\n" +
                                 f"{emoji.bullet} **Reason**: {reason}",
                     color=db.theme_color
                 )
-                await logging_ch.send(embed=create_log_em)
+                await log_sink.send(guild_settings.ticket_log_ch, embed=create_log_em)
 
 # Ticket close
     @ticket.command(name="close")
     async def close_ticket(self, ctx: discord.ApplicationContext):
         """Closes a created ticket."""
-        if db.ticket_cmds(ctx.guild.id) is False:
+        guild_settings = await store.guild(ctx.guild.id).snapshot()
+        if guild_settings.ticket_cmds is False:
             error_em = discord.Embed(description=f"{emoji.error} Ticket commands are disabled", color=db.error_color)
             await ctx.respond(embed=error_em, ephemeral=True)
         else:
@@ -141,15 +144,14 @@ class Tickets(commands.Cog):
                 await ctx.respond(embed=close_em)
                 await asyncio.sleep(5)
                 await ctx.channel.delete()
-                if db.ticket_log_ch(ctx.guild.id) is not None:
-                    logging_ch = await self.client.fetch_channel(db.ticket_log_ch(ctx.guild.id))
+                if guild_settings.ticket_log_ch is not None:
                     close_log_em = discord.Embed(
                         title=f"{emoji.ticket2} Ticket Closed",
                         description=f"{emoji.bullet} **Author**: <@{ctx.channel.name.split('-')[1]}>\n" +
                                     f"{emoji.bullet} **Closed By**: {ctx.author.mention}",
                         color=db.theme_color
                     )
-                    await logging_ch.send(embed=close_log_em)
+                    await log_sink.send(guild_settings.ticket_log_ch, embed=close_log_em)
             else:
                 error_em = discord.Embed(description=f"{emoji.error} This is not a ticket channel", color=db.error_color)
                 await ctx.respond(embed=error_em, ephemeral=True)
@@ -0,0 +1,99 @@
+import time
+from utils import database as db
+from utils.prefix import resolver
+from utils.ratelimit import limiter
+
+# Message routes
+BOT = "bot"
+DM = "dm"
+PREFIXED = "prefixed"
+NOPREFIX = "noprefix"
+IGNORED = "ignored"
+
+class Dispatcher:
+    """
+    Single entry point for every message
+
+    Each message is classified once, gets at most one context, and goes to
+    exactly one executor: the command framework for prefixed messages, or
+    the NoPrefixHandler for no-prefix users. Commands over the user's rate
+    limit are dropped before they run; text that merely starts with a
+    prefix but names no command is never charged. Route counts and per-stage
+    timings are kept so per-message cost can be compared across changes.
+    """
+
+    STAGES = ("classify", "context", "execute")
+
+    def __init__(self, client):
+        self.client = client
+        self.routes = dict.fromkeys((BOT, DM, PREFIXED, NOPREFIX, IGNORED), 0)
+        # stage -> [calls, total nanoseconds]
+        self.timings = {stage: [0, 0] for stage in self.STAGES}
+
+    def _record(self, stage: str, started: int) -> int:
+        now = time.perf_counter_ns()
+        timing = self.timings[stage]
+        timing[0] += 1
+        timing[1] += now - started
+        return now
+
+    def classify(self, message) -> str:
+        """Decide which executor (if any) handles `message`"""
+        if message.author.bot:
+            return BOT
+        if resolver.match(message):
+            return PREFIXED
+        if not message.guild:
+            # No-prefix commands only work in servers
+            return DM
+        if db.permissions().has_noprefix(message.author.id):
+            return NOPREFIX
+        return IGNORED
+
+    async def dispatch(self, message):
+        started = time.perf_counter_ns()
+        route = self.classify(message)
+        self.routes[route] += 1
+        started = self._record("classify", started)
+
+        if route == PREFIXED:
+            ctx = await self.client.get_context(message)
+            started = self._record("context", started)
+            # Only messages naming a real command count against the user's limit
+            if ctx.command is not None and limiter.hit("prefix", message):
+                return
+            await self.client.invoke(ctx)
+            self._record("execute", started)
+        elif route == NOPREFIX:
+            handler = self.client.get_cog("NoPrefixHandler")
+            resolved = handler.resolve(message) if handler else None
+            if resolved is None or limiter.hit("noprefix", message):
+                return
+            ctx = await handler.get_context(message, *resolved)
+            started = self._record("context", started)
+            await handler.execute(ctx, *resolved)
+            self._record("execute", started)
+
+    def stats(self) -> dict:
+        """Messages per route and average microseconds per stage"""
+        return {
+            "routes": dict(self.routes),
+            "stages_us": {stage: (total / calls / 1000 if calls else 0.0) for stage, (calls, total) in self.timings.items()}
+        }
+
+def setup_dispatch(client) -> Dispatcher:
+    """Routes every message through one Dispatcher"""
+    dispatcher = Dispatcher(client)
+    client.message_dispatcher = dispatcher
+
+    async def bind_mentions():
+        # classify() only sees mention prefixes once the bot user is known
+        resolver.bind_user(client.user.id)
+
+    client.add_listener(bind_mentions, "on_ready")
+
+    @client.event
+    async def on_message(message):
+        await dispatcher.dispatch(message)
+
+    return dispatcher
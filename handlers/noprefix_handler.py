@@ -1,133 +1,90 @@
 import discord
 from discord.ext import commands
-import json
-import os
+from discord.ext.commands.view import StringView
 from utils import database as db
 from utils import check
+from utils.prefix import resolver
+from utils.noprefix import NoPrefixIndex
+
+# Utility commands that can be used without a prefix
+utility_commands = [
+    "ping", "uptime", "stats", "avatar", "userinfo", "serverinfo", "emojiinfo"
+]
+
+# No-prefix dev command names and the PrefixDevCommands methods handling them
+dev_commands = {
+    "dev-add": "process_noprefix_dev_add",
+    "dev-remove": "process_noprefix_dev_remove",
+    "dev-list": "process_noprefix_dev_list",
+    "lockdown": "process_noprefix_lockdown",
+    "restart": "process_noprefix_restart",
+    "reload-cogs": "process_noprefix_reload_cogs",
+    "shutdown": "process_noprefix_shutdown",
+    "status": "process_noprefix_status",
+    "guild-list": "process_noprefix_guild_list",
+    "guild-leave": "process_noprefix_guild_leave"
+}
 
 class NoPrefixHandler(commands.Cog):
+    """
+    Runs commands sent without a prefix by no-prefix users
+
+    Messages arrive from the dispatch pipeline (handlers/dispatch_handler.py)
+    already classified. `resolve` picks the target from the command index
+    without building a context, `get_context` builds the one context the
+    target needs, and `execute` runs it. The message itself is never
+    modified or re-parsed: contexts are built from the name and arguments
+    the index already split off.
+    """
+
     def __init__(self, client):
         self.client = client
-        
-        # Create the noprefix.json file if it doesn't exist
-        if not os.path.exists('./data'):
-            os.makedirs('./data')
-        
-        if not os.path.exists('./data/noprefix.json'):
-            with open('./data/noprefix.json', 'w') as f:
-                json.dump({"users": []}, f, indent=4)
-    
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Listen for messages and process no-prefix commands if applicable"""
-        # Skip processing bot messages
-        if message.author.bot:
-            return
-            
-        # Skip messages in DMs (no-prefix only works in servers)
-        if not message.guild:
-            return
-            
-        # Check if user has no-prefix permission
-        if not (db.is_owner(message.author.id) or 
-                db.is_dev(message.author.id) or 
-                message.author.id in db._load_noprefix().get("users", [])):
-            return
-            
-        # Don't process messages that start with a prefix
-        prefix = db.get_prefix(message.guild.id)
-        if message.content.startswith(prefix):
-            return
-            
-        # Create context
-        ctx = await self.client.get_context(message)
-        
-        # Process the potential command
-        await self.process_noprefix_commands(ctx)
-    
-    async def process_noprefix_commands(self, ctx):
-        """Process commands without prefix for authorized users"""
-        message = ctx.message
-        content = message.content.strip()
-        
-        # Get first word as command
-        command_parts = content.split(' ', 1)
-        command_name = command_parts[0].lower()
-        
-        # Check for specific utility commands
-        utility_commands = [
-            "ping", "uptime", "stats", "avatar", "userinfo", "serverinfo", "emojiinfo"
-        ]
-        
-        # Special handling for help command
-        if command_name == "help":
-            help_cog = self.client.get_cog("HelpCommands")
-            if help_cog and hasattr(help_cog, "process_noprefix_help"):
-                await help_cog.process_noprefix_help(ctx)
-                return
-        
-        # Special handling for dev commands
-        dev_commands = {
-            "dev-add": "process_noprefix_dev_add",
-            "dev-remove": "process_noprefix_dev_remove", 
-            "dev-list": "process_noprefix_dev_list",
-            "lockdown": "process_noprefix_lockdown",
-            "restart": "process_noprefix_restart",
-            "reload-cogs": "process_noprefix_reload_cogs",
-            "shutdown": "process_noprefix_shutdown",
-            "status": "process_noprefix_status",
-            "guild-list": "process_noprefix_guild_list",
-            "guild-leave": "process_noprefix_guild_leave"
-        }
-        
-        if command_name in dev_commands:
-            dev_cog = self.client.get_cog("PrefixDevCommands")
-            if dev_cog and hasattr(dev_cog, dev_commands[command_name]):
-                # Parse arguments if any
-                args = []
-                if len(command_parts) > 1:
-                    args = command_parts[1].strip().split()
-                
-                # Call the method with appropriate arguments
-                method = getattr(dev_cog, dev_commands[command_name])
-                if args:
-                    await method(ctx, *args)
-                else:
-                    await method(ctx)
-                return
-        
-        # Otherwise, check if this is a standard utility command
-        if command_name in utility_commands:
-            # Create a fake context with the command name prefixed
-            default_prefix = self.client.command_prefix(self.client, message)[0]
-            new_content = default_prefix + content
-            message.content = new_content
-            
-            # Process this command
-            new_ctx = await self.client.get_context(message)
-            await self.client.invoke(new_ctx)
-            
-            # Restore original content
-            message.content = content
-            return
-        
-        # Otherwise, check the NoPrefixCommands cog for any other commands
-        no_prefix_cog = self.client.get_cog("NoPrefixCommands")
-        if no_prefix_cog:
-            for command in no_prefix_cog.get_commands():
-                if command.name == command_name or command_name in getattr(command, "aliases", []):
-                    # Create a fake context with the command name prefixed
-                    default_prefix = self.client.command_prefix(self.client, message)[0]
-                    new_content = default_prefix + content
-                    message.content = new_content
-                    
-                    # Process this command
-                    new_ctx = await self.client.get_context(message)
-                    await self.client.invoke(new_ctx)
-                    
-                    # Restore original content
-                    message.content = content
-                    return
+        self.index = NoPrefixIndex(client, utility_commands, dev_commands)
+
+    def rebuild_index(self):
+        """Pick up commands of (re)loaded cogs"""
+        self.index.build()
+
+    def resolve(self, message):
+        """Return (kind, target) for a no-prefix message, or None if it isn't a command"""
+        found = self.index.lookup(message.content)
+        if found is None:
+            return None
+        name, kind, method, rest = found
+        if kind == "method":
+            # Parse arguments if any (help takes none)
+            return "method", (method, [] if name == "help" else rest.split())
+        return "command", (name, rest)
+
+    async def get_context(self, message, kind: str, target):
+        """Build the single context a resolved target runs with"""
+        if kind == "method":
+            return commands.Context(prefix=None, view=StringView(""), bot=self.client, message=message)
+        # Same context `client.get_context` would build for the default prefix,
+        # with the view already past the command name
+        name, rest = target
+        return commands.Context(
+            prefix=resolver.get(message.guild.id)[0],
+            view=StringView(rest),
+            bot=self.client,
+            message=message,
+            invoked_with=name,
+            command=self.client.all_commands.get(name)
+        )
+
+    async def execute(self, ctx, kind: str, target):
+        if kind == "method":
+            method, args = target
+            await method(ctx, *args)
+        else:
+            await self.client.invoke(ctx)
+
+    async def process_noprefix_commands(self, message):
+        """Process a message without prefix for authorized users"""
+        resolved = self.resolve(message)
+        if resolved is not None:
+            ctx = await self.get_context(message, *resolved)
+            await self.execute(ctx, *resolved)
 
 def setup_noprefix_commands(client):
     """Sets up no-prefix command functionality"""
@@ -1,33 +1,28 @@
 import discord
 from discord.ext import commands
-import json
-import os
 from utils import database as db
 from utils import check
+from utils.prefix import resolver, MAX_PREFIXES
+
+def format_prefixes(prefixes):
+    """Format prefixes as inline code"""
+    return ", ".join(f"`{prefix}`" for prefix in prefixes)
 
 def setup_prefix_commands(client):
     """Sets up prefix command functionality"""
     
-    # Create the prefixes.json file if it doesn't exist
-    if not os.path.exists('./data'):
-        os.makedirs('./data')
-    
-    if not os.path.exists('./data/prefixes.json'):
-        with open('./data/prefixes.json', 'w') as f:
-            json.dump({}, f, indent=4)
-    
     # Hook into database to manage prefixes
     @client.event
     async def on_guild_join(guild):
         """Set default prefix when joining a new guild"""
-        db.set_prefix(guild.id, "!")
+        resolver.set(guild.id, resolver.default)
         # Also create guild config database
         db.create(guild.id)
     
     @client.event
     async def on_guild_remove(guild):
         """Remove prefix data when leaving a guild"""
-        db.remove_prefix(guild.id)
+        resolver.remove(guild.id)
         # Also delete guild config database
         try:
             db.delete(guild.id)
@@ -35,35 +30,49 @@ def setup_prefix_commands(client):
             pass
     
     # Add prefix command (both slash and prefix version)
-    @client.slash_command(name="prefix", description="View or change the bot's prefix for this server")
+    @client.slash_command(name="prefix", description="View or change the bot's prefix(es) for this server")
     @commands.has_permissions(manage_guild=True)
     async def prefix_slash(ctx, new_prefix: str = None):
-        """Change the server's command prefix (slash version)"""
+        """Change the server's command prefix (slash version). Separate several prefixes with spaces."""
         if new_prefix is None:
-            current_prefix = db.get_prefix(ctx.guild.id)
-            await ctx.respond(f"Current prefix is: `{current_prefix}`")
+            current_prefix = resolver.get(ctx.guild.id)
+            await ctx.respond(f"Current prefix is: {format_prefixes(current_prefix)}")
         else:
-            if len(new_prefix) > 5:
+            prefixes = new_prefix.split()
+            if not prefixes:
+                await ctx.respond("Prefix cannot be empty.", ephemeral=True)
+                return
+            if len(prefixes) > MAX_PREFIXES:
+                await ctx.respond(f"You can set up to {MAX_PREFIXES} prefixes.", ephemeral=True)
+                return
+            if any(len(prefix) > 5 for prefix in prefixes):
                 await ctx.respond("Prefix cannot be longer than 5 characters.", ephemeral=True)
                 return
                 
-            db.set_prefix(ctx.guild.id, new_prefix)
-            await ctx.respond(f"Prefix changed to `{new_prefix}`")
+            resolver.set(ctx.guild.id, prefixes)
+            await ctx.respond(f"Prefix changed to {format_prefixes(prefixes)}")
     
     @client.command(name="prefix")
     @commands.has_permissions(manage_guild=True)
-    async def prefix_text(ctx, new_prefix: str = None):
-        """Change the server's command prefix (text version)"""
+    async def prefix_text(ctx, *, new_prefix: str = None):
+        """Change the server's command prefix (text version). Separate several prefixes with spaces."""
         if new_prefix is None:
-            current_prefix = db.get_prefix(ctx.guild.id)
-            await ctx.send(f"Current prefix is: `{current_prefix}`")
+            current_prefix = resolver.get(ctx.guild.id)
+            await ctx.send(f"Current prefix is: {format_prefixes(current_prefix)}")
         else:
-            if len(new_prefix) > 5:
+            prefixes = new_prefix.split()
+            if not prefixes:
+                await ctx.send("Prefix cannot be empty.")
+                return
+            if len(prefixes) > MAX_PREFIXES:
+                await ctx.send(f"You can set up to {MAX_PREFIXES} prefixes.")
+                return
+            if any(len(prefix) > 5 for prefix in prefixes):
                 await ctx.send("Prefix cannot be longer than 5 characters.")
                 return
                 
-            db.set_prefix(ctx.guild.id, new_prefix)
-            await ctx.send(f"Prefix changed to `{new_prefix}`")
+            resolver.set(ctx.guild.id, prefixes)
+            await ctx.send(f"Prefix changed to {format_prefixes(prefixes)}")
     
     # Setup prefix command error handling
     @client.event
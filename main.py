@@ -2,9 +2,18 @@ import discord
 import os
 import asyncio
 from utils import database as db
+from utils.prefix import resolver
+from utils.async_storage import store
+from utils.warmup import WarmUp
+from utils.reconcile import Reconciler
+from utils.memory_profile import memory_profile
+from utils.channels import channels
+from utils.log_sink import log_sink
+from utils.log_aggregator import log_aggregator
 from handlers.slash_handler import setup_slash_commands
 from handlers.prefix_handler import setup_prefix_commands
 from handlers.noprefix_handler import setup_noprefix_commands
+from handlers.dispatch_handler import setup_dispatch
 from rich import print
 from rich.progress import Progress, SpinnerColumn
 from pyfiglet import Figlet
@@ -13,16 +22,21 @@ from discord.ext import commands
 # Discord vars
 status = discord.Status.idle if not db.lockdown(status_only=True) else discord.Status.dnd
 activity = discord.Activity(type=discord.ActivityType.listening, name="Managing Your Cute Servers") if not db.lockdown(status_only=True) else discord.Activity(type=discord.ActivityType.playing, name="Maintenance")
-intents = discord.Intents.all()
+
+# Opt-in settings preload after startup (`warmup` config block)
+warmup = WarmUp.from_config()
+# Opt-in cleanup of data left by guilds removed while offline (`reconcile` config block)
+reconciler = Reconciler.from_config()
 
 # Create the bot client with default prefix (will be overridden per server)
-DEFAULT_PREFIX = "!"
+DEFAULT_PREFIX = resolver.default
 client = commands.Bot(
-    command_prefix=lambda bot, message: db.get_prefix(message.guild.id) if message.guild else DEFAULT_PREFIX,
+    command_prefix=resolver,
     status=status, 
     activity=activity, 
-    intents=intents, 
-    help_command=None
+    help_command=None,
+    # Intents, member cache and chunking (`memory_profile` config block)
+    **memory_profile.client_options()
 )
 
 # Startup printing
@@ -34,6 +48,11 @@ def load_handlers():
     setup_slash_commands(client)
     setup_prefix_commands(client)
     setup_noprefix_commands(client)
+    setup_dispatch(client)
+    channels.bind(client)
+    # Bound after the sink so buffered logs are sent before its HTTP session closes
+    log_sink.bind(client)
+    log_aggregator.bind(client)
 
 # Loading all cog files
 cogs_progress_bar = Progress(
@@ -63,6 +82,9 @@ with cogs_progress_bar as progress:
     
     progress.update(task, description="[green]Loaded Cogs[/]")
 
+# Index no-prefix command names now that every cog is loaded
+client.get_cog("NoPrefixHandler").rebuild_index()
+
 # On connect event
 @client.event
 async def on_connect():
@@ -84,28 +106,24 @@ async def on_ready():
     print(f"[green][bold]✓[/] Logged in as {client.user} [ID: {client.user.id}][/]")
     print(f"[green][bold]✓[/] Connected to {len(client.guilds)} guild{'' if len(client.guilds) <= 1 else 's'}[/]")
     print(f"[green][bold]✓[/] Default prefix: {DEFAULT_PREFIX}[/]")
-
-# Handle messages - for no prefix commands
-@client.event
-async def on_message(message):
-    # Ignore messages from bots
-    if message.author.bot:
-        return
-    
-    # Check if user has noprefix permission
-    has_noprefix = db.has_noprefix(message.author.id)
-    
-    # Process commands with prefixes first
-    await client.process_commands(message)
-    
-    # Then check for no-prefix commands if user has permission
-    if has_noprefix:
-        # Let the noprefix handler handle this
-        ctx = await client.get_context(message)
-        await client.get_cog("NoPrefixHandler").process_noprefix_commands(ctx)
+    # Open storage and compile prefixes off the event loop
+    await store.run(resolver.load)
+    # Preload guild settings in the background; commands don't wait for it
+    if warmup.enabled:
+        warmup.start(client.guilds)
+    if reconciler.enabled:
+        reconciler.start(guild.id for guild in client.guilds)
+    # Members of guilds not chunked at startup are fetched when first needed
+    if memory_profile.chunking == "small":
+        asyncio.create_task(memory_profile.chunk_small(client.guilds))
+    # Deliver log messages spooled before the last shutdown
+    log_aggregator.start()
 
 # Starting bot
 try:
     client.run(db.discord_api_token())
 except Exception as e:
-    print(f"[red][bold]✗[/] Unable to login due to {e}[/]")
\ No newline at end of file
+    print(f"[red][bold]✗[/] Unable to login due to {e}[/]")
+finally:
+    # Persist any settings still waiting in the write-behind buffer
+    db.flush()
\ No newline at end of file
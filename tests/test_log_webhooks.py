@@ -0,0 +1,30 @@
+"""Persistence of the log sink's webhook map (utils.log_webhooks)"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log_webhooks import WebhookStore
+
+def test_webhooks_survive_a_reload(tmp_path):
+    path = str(tmp_path / "log-webhooks.json")
+    webhooks = WebhookStore(path)
+    assert webhooks.get(10) is None
+    webhooks.set(10, 1001, "token-a")
+    webhooks.set(20, 2002, "token-b")
+
+    reloaded = WebhookStore(path)
+    assert reloaded.get(10) == (1001, "token-a")
+    assert reloaded.get(20) == (2002, "token-b")
+
+def test_forget_removes_only_that_channel(tmp_path):
+    path = str(tmp_path / "log-webhooks.json")
+    webhooks = WebhookStore(path)
+    webhooks.set(10, 1001, "token-a")
+    webhooks.set(20, 2002, "token-b")
+    assert webhooks.forget(10)
+    assert not webhooks.forget(10)
+
+    reloaded = WebhookStore(path)
+    assert reloaded.get(10) is None
+    assert reloaded.get(20) == (2002, "token-b")
@@ -0,0 +1,77 @@
+"""Prefix resolution (utils.prefix) and message classification"""
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils.storage logs through rich
+pytest.importorskip("rich")
+
+from utils.prefix import PrefixResolver, resolver
+
+BOT_ID = 1234
+
+def message(content: str, guild_id: int = 1):
+    return SimpleNamespace(
+        content=content,
+        guild=SimpleNamespace(id=guild_id),
+        author=SimpleNamespace(id=99, bot=False)
+    )
+
+def test_mention_prefix_after_bind():
+    prefixes = PrefixResolver()
+    prefixes.load({"1": "?"})
+    assert prefixes.match(message(f"<@{BOT_ID}> ping")) is None
+    prefixes.bind_user(BOT_ID)
+    assert prefixes.match(message(f"<@{BOT_ID}> ping")) == f"<@{BOT_ID}> "
+    assert prefixes.match(message(f"<@!{BOT_ID}> ping")) == f"<@!{BOT_ID}> "
+    assert prefixes.match(message("?ping")) == "?"
+
+def test_empty_prefix_set_is_rejected():
+    with pytest.raises(ValueError):
+        PrefixResolver().set(1, [])
+
+def test_mention_is_prefixed_before_any_text_prefix():
+    pytest.importorskip("discord")
+    from handlers.dispatch_handler import setup_dispatch, PREFIXED
+
+    listeners = {}
+    client = SimpleNamespace(
+        user=SimpleNamespace(id=BOT_ID),
+        event=lambda func: func,
+        add_listener=lambda func, name: listeners.setdefault(name, []).append(func)
+    )
+    resolver.load({})
+    dispatcher = setup_dispatch(client)
+    for listener in listeners["on_ready"]:
+        asyncio.run(listener())
+    # The first message after startup is a mention; no text prefix was used yet
+    assert dispatcher.classify(message(f"<@{BOT_ID}> ping")) == PREFIXED
+
+def test_unknown_command_is_not_rate_limited(monkeypatch):
+    pytest.importorskip("discord")
+    from handlers.dispatch_handler import Dispatcher
+    from utils.ratelimit import limiter
+
+    charged = []
+    monkeypatch.setattr(limiter, "hit", lambda rule, message: charged.append(rule) or False)
+    invoked = []
+
+    async def get_context(message):
+        name = message.content[1:]
+        return SimpleNamespace(command=name if name == "ping" else None)
+
+    async def invoke(ctx):
+        invoked.append(ctx.command)
+
+    resolver.load({"1": "?"})
+    dispatcher = Dispatcher(SimpleNamespace(get_context=get_context, invoke=invoke))
+    asyncio.run(dispatcher.dispatch(message("?nothing")))
+    assert charged == []
+    asyncio.run(dispatcher.dispatch(message("?ping")))
+    assert charged == ["prefix"]
+    assert invoked == [None, "ping"]
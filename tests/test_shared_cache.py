@@ -0,0 +1,106 @@
+"""Two bot processes sharing one data directory through utils.shared_cache"""
+import os
+import sys
+import time
+import multiprocessing
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils.storage logs through rich
+pytest.importorskip("rich")
+
+from utils.storage import SQLiteBackend, WriteBehind, GuildSettings
+from utils.shared_cache import SharedCache, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="the shared cache needs POSIX")
+
+_MISSING = object()
+# Poll interval of the test stores; prefix changes must show up well within the deadline
+POLL = 0.05
+DEADLINE = 5.0
+
+def open_store(directory) -> WriteBehind:
+    shared = SharedCache(os.path.join(directory, "shared-cache.bin"), capacity=1024, poll_interval=POLL)
+    return WriteBehind(SQLiteBackend(os.path.join(directory, "bot.db")), interval=POLL, shared=shared)
+
+def run_in_other_process(target, *args):
+    # Spawned, so nothing (the memory map included) is inherited from this process
+    process = multiprocessing.get_context("spawn").Process(target=target, args=args)
+    process.start()
+    process.join(DEADLINE * 2)
+    assert process.exitcode == 0
+
+def wait_for(condition) -> bool:
+    deadline = time.monotonic() + DEADLINE
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+def set_guild(directory, guild_id, data: dict):
+    # A settings dict, since GuildSettings doesn't pickle
+    write_behind = open_store(directory)
+    write_behind.set_guild(guild_id, data)
+    write_behind.flush()
+
+def drop_guild(directory, guild_id):
+    open_store(directory).shared.guilds.pop(guild_id)
+
+def set_prefix(directory, guild_id, prefix):
+    write_behind = open_store(directory)
+    write_behind.set_prefix(guild_id, prefix)
+    write_behind.flush()
+
+def test_guild_write_is_visible(tmp_path):
+    write_behind = open_store(tmp_path)
+    assert write_behind.guild(1) is None
+    run_in_other_process(set_guild, tmp_path, 1, {"mod_log_ch": 42})
+    # No reload or engine read: the value comes straight from shared memory
+    assert write_behind.cached_guild(1).mod_log_ch == 42
+
+def test_stale_slot_is_not_served(tmp_path):
+    write_behind = open_store(tmp_path)
+    write_behind.set_guild(2, GuildSettings(mod_log_ch=7))
+    write_behind.flush()
+    assert write_behind.cached_guild(2).mod_log_ch == 7
+    run_in_other_process(drop_guild, tmp_path, 2)
+    assert write_behind.cached_guild(2, _MISSING) is _MISSING
+    # The next lookup goes to the engine
+    assert write_behind.guild(2).mod_log_ch == 7
+
+def test_local_copy_is_rejected_after_other_write(tmp_path):
+    write_behind = open_store(tmp_path)
+    write_behind.set_guild(3, GuildSettings.from_dict({"mod_log_ch": 1, "custom": "mine"}))
+    write_behind.flush()
+    assert write_behind.cached_guild(3).get("custom") == "mine"
+    run_in_other_process(set_guild, tmp_path, 3, {"mod_log_ch": 2, "custom": "theirs"})
+    # The slot was rewritten since this process kept its copy
+    assert write_behind.cached_guild(3, _MISSING) is _MISSING
+    settings = write_behind.guild(3)
+    assert (settings.mod_log_ch, settings.get("custom")) == (2, "theirs")
+
+def test_prefix_change_is_visible_within_poll(tmp_path):
+    write_behind = open_store(tmp_path)
+    assert "4" not in write_behind.prefixes()
+    run_in_other_process(set_prefix, tmp_path, 4, "?")
+    assert wait_for(lambda: write_behind.prefixes().get("4") == "?")
+
+def test_full_table(tmp_path):
+    shared = SharedCache(os.path.join(tmp_path, "shared-cache.bin"), capacity=16, poll_interval=POLL)
+    guilds = shared.guilds
+    for guild_id in range(1, 17):
+        guilds[guild_id] = GuildSettings(mod_log_ch=guild_id)
+    # No slot left: the guild still works, just unshared, and unknown guilds miss
+    assert guilds.setdefault(17, GuildSettings(mod_log_ch=17)).mod_log_ch == 17
+    assert guilds.get(17, _MISSING) is _MISSING
+    assert guilds.get(99, _MISSING) is _MISSING
+    assert guilds[16].mod_log_ch == 16
+    # A dropped guild's slot is taken over
+    guilds.pop(5)
+    guilds[17] = GuildSettings(mod_log_ch=17)
+    assert guilds[17].mod_log_ch == 17
+    assert guilds.get(5, _MISSING) is _MISSING
+    assert all(guilds[guild_id].mod_log_ch == guild_id for guild_id in range(1, 17) if guild_id != 5)
@@ -0,0 +1,93 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from utils import database as db
+from utils import storage
+
+_MISSING = object()
+
+class GuildStore:
+    """Awaitable settings accessor for one guild"""
+
+    __slots__ = ("_store", "guild_id")
+
+    def __init__(self, store: "AsyncStore", guild_id: int):
+        self._store = store
+        self.guild_id = int(guild_id)
+
+    async def all(self) -> dict:
+        """All settings of the guild (defaults if nothing is stored)"""
+        data = await self._store._guild_data(self.guild_id)
+        return (data or storage.DEFAULT_GUILD_SETTINGS).to_dict()
+
+    async def get(self, key: str, default=None):
+        """Get one setting"""
+        data = await self._store._guild_data(self.guild_id)
+        return (data or storage.DEFAULT_GUILD_SETTINGS).get(key, default)
+
+    async def set(self, key: str, value):
+        """Set one setting; the disk write happens in the background"""
+        await self.update(**{key: value})
+        return value
+
+    async def snapshot(self) -> storage.GuildSettings:
+        """All settings of the guild as one immutable object"""
+        return await self._store._guild_data(self.guild_id) or storage.DEFAULT_GUILD_SETTINGS
+
+    async def update(self, **changes) -> storage.GuildSettings:
+        """Apply several changes in one write"""
+        await self._store._guild_data(self.guild_id)
+        return db.guild_update(self.guild_id, **changes)
+
+class AsyncStore:
+    """
+    Awaitable storage API, e.g. `await store.guild(guild_id).get("msg_log_ch")`
+
+    Settings already in memory are returned without leaving the event loop.
+    Cold reads run on a small dedicated thread pool, and concurrent reads of
+    the same guild share one load. Writes go to the write-behind layer, which
+    flushes on its own thread.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self._max_workers = max_workers
+        self._executor = None
+        self._loading = {}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            workers = self._max_workers or db._load_config().get("storage", {}).get("io_workers", 4)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-io")
+        return self._executor
+
+    async def run(self, func, *args):
+        """Run blocking storage work on the storage thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def guild(self, guild_id: int) -> GuildStore:
+        return GuildStore(self, guild_id)
+
+    async def _guild_data(self, guild_id: int):
+        write_behind = db.store()
+        data = write_behind.cached_guild(guild_id, _MISSING)
+        if data is not _MISSING:
+            return data
+        future = self._loading.get(guild_id)
+        if future is None:
+            future = self._loading[guild_id] = asyncio.ensure_future(self.run(write_behind.guild, guild_id))
+            future.add_done_callback(lambda _: self._loading.pop(guild_id, None))
+        return await asyncio.shield(future)
+
+    async def prefixes(self) -> dict:
+        """Guild ID (str) to prefix map"""
+        return await self.run(db.store().prefixes)
+
+    async def noprefix(self) -> list:
+        """No-prefix user IDs"""
+        return list(await self.run(db.store().noprefix))
+
+    async def flush(self):
+        """Write pending changes without blocking the loop"""
+        await self.run(db.flush)
+
+store = AsyncStore()
@@ -0,0 +1,132 @@
+import os
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+from utils import database as db
+from utils.prefix import resolver
+from utils.async_storage import store
+
+FORMAT_VERSION = 1
+DEFAULT_DIR = "./backups"
+
+def default_path() -> str:
+    return os.path.join(DEFAULT_DIR, f"backup-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.ndjson.gz")
+
+def _line(record: dict) -> bytes:
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+def export(path: str = None) -> dict:
+    """
+    Stream all bot data into a gzip NDJSON file
+
+    The first lines hold the header, the dev list and the no-prefix list,
+    followed by one line per guild with its settings and prefix. Guild
+    settings are read one at a time straight from the engine, so memory use
+    does not grow with the number of guilds.
+    """
+    path = path or default_path()
+    started = time.perf_counter()
+    write_behind = db.store()
+    # Export what is on disk, including changes still waiting to be written
+    write_behind.flush()
+    engine = write_behind.backend
+    prefixes = dict(write_behind.prefixes())
+    counts = {"guilds": 0, "prefixes": 0, "noprefix": 0, "devs": 0}
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+        f.write(_line({"type": "header", "version": FORMAT_VERSION, "engine": engine.name, "created": datetime.now(timezone.utc).isoformat()}))
+        dev_ids = db.dev_ids()
+        f.write(_line({"type": "devs", "dev_ids": dev_ids}))
+        noprefix = list(write_behind.noprefix())
+        f.write(_line({"type": "noprefix", "users": noprefix}))
+        counts["devs"], counts["noprefix"] = len(dev_ids), len(noprefix)
+        for guild_id in engine.guild_ids():
+            prefix = prefixes.pop(str(guild_id), None)
+            f.write(_line({"type": "guild", "id": guild_id, "settings": engine.load_guild(guild_id), "prefix": prefix}))
+            counts["guilds"] += 1
+            counts["prefixes"] += prefix is not None
+        # Guilds that only have a prefix
+        for guild_id, prefix in prefixes.items():
+            f.write(_line({"type": "guild", "id": int(guild_id), "settings": None, "prefix": prefix}))
+            counts["prefixes"] += 1
+    os.replace(tmp_path, path)
+
+    return {**counts, "path": path, "bytes": os.path.getsize(path), "seconds": time.perf_counter() - started}
+
+def import_batches(path: str, batch_size: int = 500):
+    """
+    Apply a backup made by `export`, one batch of guilds at a time
+
+    A generator: it yields running counts after each batch, so callers can
+    report progress (and, in the bot, hand each step to the storage thread
+    pool). Guilds in the file are upserted; stored guilds that are not in
+    the file are left alone. The dev and no-prefix lists are replaced.
+    """
+    started = time.perf_counter()
+    write_behind = db.store()
+    counts = {"guilds": 0, "prefixes": 0, "noprefix": 0, "devs": 0, "seconds": 0.0}
+    guilds, prefixes = {}, {}
+
+    def apply():
+        write_behind.write_through(guilds, prefixes)
+        counts["guilds"] += sum(data is not None for data in guilds.values())
+        counts["prefixes"] += len(prefixes)
+        guilds.clear()
+        prefixes.clear()
+        counts["seconds"] = time.perf_counter() - started
+        return dict(counts)
+
+    with gzip.open(path, "rt") as f:
+        for number, raw in enumerate(f, start=1):
+            record = json.loads(raw)
+            match record.get("type"):
+                case "header":
+                    if record.get("version", 0) > FORMAT_VERSION:
+                        raise ValueError(f"Backup format v{record['version']} is newer than supported v{FORMAT_VERSION}")
+                case "devs":
+                    db.set_dev_ids(record["dev_ids"])
+                    counts["devs"] = len(record["dev_ids"])
+                case "noprefix":
+                    db.set_noprefix_users(record["users"])
+                    counts["noprefix"] = len(record["users"])
+                case "guild":
+                    if record["settings"] is not None:
+                        guilds[record["id"]] = record["settings"]
+                    if record["prefix"] is not None:
+                        prefixes[str(record["id"])] = record["prefix"]
+                    if len(guilds) + len(prefixes) >= batch_size:
+                        yield apply()
+                case _:
+                    raise ValueError(f"Unknown record on line {number} of {path}")
+
+    yield apply()
+    write_behind.flush()
+    # Recompile prefixes from the restored map
+    resolver.load()
+
+def import_file(path: str, batch_size: int = 500, progress=None) -> dict:
+    """Apply a whole backup, calling `progress(counts)` after each batch"""
+    counts = {}
+    for counts in import_batches(path, batch_size):
+        if progress:
+            progress(counts)
+    return counts
+
+async def export_async(path: str = None) -> dict:
+    """`export` on the storage thread pool"""
+    return await store.run(export, path)
+
+async def import_async(path: str, batch_size: int = 500, progress=None) -> dict:
+    """`import_batches` on the storage thread pool; `progress` is awaited after each batch"""
+    batches = import_batches(path, batch_size)
+    counts = {}
+    while True:
+        step = await store.run(next, batches, None)
+        if step is None:
+            return counts
+        counts = step
+        if progress:
+            await progress(counts)
@@ -0,0 +1,163 @@
+import time
+import discord
+from utils import database as db
+
+class ChannelResolver:
+    """
+    Channel lookups for log and ticket channels
+
+    Tries the gateway cache (`get_channel`) first and only falls back to a
+    REST fetch when the channel isn't there. Channels that don't exist or
+    that the bot may not see or send to are remembered for `negative_ttl`
+    seconds, so a stale setting doesn't cost a REST call per logged event.
+    Channels only REST returned (e.g. threads) are kept the same way, for
+    `fetched_ttl` seconds and at most `max_fetched` of them. Entries are
+    dropped when a channel is deleted or updated, and the whole negative
+    cache when the bot's roles or permissions may have changed.
+    """
+
+    def __init__(self, negative_ttl: float = 300.0, max_negative: int = 10000, fetched_ttl: float = 300.0, max_fetched: int = 1000):
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self.fetched_ttl = fetched_ttl
+        self.max_fetched = max_fetched
+        self.client = None
+        self.hits = 0
+        self.fetches = 0
+        self.negative_hits = 0
+        self.failures = 0
+        # channel ID -> (monotonic expiry, whether the channel no longer exists)
+        self._negative = {}
+        # channel ID -> (monotonic expiry, channel) for channels the gateway cache doesn't have but REST returned
+        self._fetched = {}
+
+    @classmethod
+    def from_config(cls) -> "ChannelResolver":
+        options = db._load_config().get("channels", {})
+        return cls(
+            options.get("negative_ttl", 300.0),
+            options.get("max_negative", 10000),
+            options.get("fetched_ttl", 300.0),
+            options.get("max_fetched", 1000)
+        )
+
+    def bind(self, client):
+        """Use `client` for lookups and keep the caches in step with its channel events"""
+        self.client = client
+        client.add_listener(self._on_channel_changed, "on_guild_channel_delete")
+        client.add_listener(self._on_channel_updated, "on_guild_channel_update")
+        client.add_listener(self._on_channel_changed, "on_thread_delete")
+        client.add_listener(self._on_member_update, "on_member_update")
+        client.add_listener(self._on_permissions_changed, "on_guild_role_update")
+        client.add_listener(self._on_permissions_changed, "on_guild_join")
+
+    async def get(self, channel_id: int):
+        """The channel, or None if it doesn't exist or the bot can't access it"""
+        if not channel_id:
+            return None
+        channel = self.client.get_channel(channel_id) or self._get_fetched(channel_id)
+        if channel is not None:
+            self.hits += 1
+            return channel
+        if self._is_negative(channel_id):
+            return None
+        self.fetches += 1
+        try:
+            channel = await self.client.fetch_channel(channel_id)
+        except discord.NotFound:
+            self.remember_forbidden(channel_id, gone=True)
+            return None
+        except discord.Forbidden:
+            self.remember_forbidden(channel_id)
+            return None
+        if len(self._fetched) >= self.max_fetched:
+            # Oldest insertions first
+            del self._fetched[next(iter(self._fetched))]
+        self._fetched[channel_id] = (time.monotonic() + self.fetched_ttl, channel)
+        return channel
+
+    async def send(self, channel_id: int, *args, **kwargs):
+        """Send to a channel by ID; returns the message, or None if the channel is gone or not allowed"""
+        if self._is_negative(channel_id):
+            return None
+        channel = await self.get(channel_id)
+        if channel is None:
+            return None
+        try:
+            return await channel.send(*args, **kwargs)
+        except discord.NotFound:
+            self.remember_forbidden(channel_id, gone=True)
+            return None
+        except discord.Forbidden:
+            self.remember_forbidden(channel_id)
+            return None
+
+    def _is_negative(self, channel_id: int) -> bool:
+        entry = self._negative.get(channel_id)
+        if entry is None:
+            return False
+        if entry[0] > time.monotonic():
+            self.negative_hits += 1
+            return True
+        del self._negative[channel_id]
+        return False
+
+    def _get_fetched(self, channel_id: int):
+        entry = self._fetched.get(channel_id)
+        if entry is None:
+            return None
+        if entry[0] > time.monotonic():
+            return entry[1]
+        del self._fetched[channel_id]
+        return None
+
+    def is_gone(self, channel_id: int) -> bool:
+        """Whether the last lookup found the channel deleted (not just inaccessible)"""
+        entry = self._negative.get(channel_id)
+        return entry is not None and entry[1] and entry[0] > time.monotonic()
+
+    def remember_forbidden(self, channel_id: int, gone: bool = False):
+        """Skip a channel until the TTL runs out or permissions change; `gone` if it was deleted"""
+        self.failures += 1
+        self._fetched.pop(channel_id, None)
+        if len(self._negative) >= self.max_negative:
+            # Oldest insertions first
+            del self._negative[next(iter(self._negative))]
+        self._negative[channel_id] = (time.monotonic() + self.negative_ttl, gone)
+
+    def invalidate(self, channel_id: int = None):
+        """Forget one channel, or everything when no ID is given"""
+        if channel_id is None:
+            self._negative.clear()
+            self._fetched.clear()
+        else:
+            self._negative.pop(channel_id, None)
+            self._fetched.pop(channel_id, None)
+
+    async def _on_channel_changed(self, channel):
+        self.invalidate(channel.id)
+
+    async def _on_channel_updated(self, before, after):
+        self.invalidate(after.id)
+
+    async def _on_member_update(self, before, after):
+        if after.id == self.client.user.id and before.roles != after.roles:
+            self.invalidate()
+
+    async def _on_permissions_changed(self, *args):
+        self.invalidate()
+
+    def stats(self) -> dict:
+        """Lookup counters and the share answered without REST"""
+        lookups = self.hits + self.negative_hits + self.fetches
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "negative_entries": len(self._negative),
+            "fetched_entries": len(self._fetched),
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0
+        }
+
+channels = ChannelResolver.from_config()
@@ -4,12 +4,12 @@ from discord.ext import commands
 # Is the user a owner
 def is_owner(user_id):
     """Check if user is the bot owner"""
-    return db.is_owner(user_id)
+    return db.permissions().is_owner(user_id)
 
 # Is the user a dev
 def is_dev(user_id):
     """Check if user is a developer or owner"""
-    return db.is_dev(user_id)
+    return db.permissions().is_dev(user_id)
 
 # Command checks
 def owner_only():
@@ -27,5 +27,5 @@ def dev_only():
 def has_noprefix():
     """Command check for users with no-prefix permission"""
     def predicate(ctx):
-        return db.has_noprefix(ctx.author.id)
+        return db.permissions().has_noprefix(ctx.author.id)
     return commands.check(predicate)
\ No newline at end of file
@@ -1,23 +1,96 @@
 import os
 import json
+import copy
+import time
+import threading
+from utils import storage
+from utils.permissions import PermissionIndex
+from utils.runtime import runtime, MessageHandle
+from utils.shared_cache import SharedCache
 
 config_file_path = "./configs/config.json"
-temp_file_path = {}
 
 theme_color = int("22CEEC", 16)
 error_color = None  # Will be set to discord.Color.red() in main.py
 
 # -------------------- CONFIG FILE --------------------
 
+class ConfigStore:
+    """
+    Process-wide cache of the config file
+
+    The file is parsed once and served from memory. At most once every
+    `check_interval` seconds a read stats the file and reparses it if its
+    mtime, inode or size changed, so hand edits are still picked up.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.reads = 0
+        self.reloads = 0
+        self._data = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def _reload(self):
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp != self._stamp or self._data is None:
+                with open(self.path, "r") as config_file:
+                    self._data = json.load(config_file)
+                self._stamp = stamp
+                self.reloads += 1
+            self._checked_at = time.monotonic()
+
+    def get(self) -> dict:
+        """Return the cached config, reloading it if the file changed"""
+        self.reads += 1
+        if self._data is None or time.monotonic() - self._checked_at >= self.check_interval:
+            self._reload()
+        return self._data
+
+    def update(self, mutator):
+        """Apply `mutator` to a copy of the config and persist it to memory and disk together"""
+        with self._lock:
+            self._reload()
+            config_data = copy.deepcopy(self._data)
+            result = mutator(config_data)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as config_file:
+                json.dump(config_data, config_file, indent=4)
+            os.replace(temp_path, self.path)
+            self._data = config_data
+            self._stamp = self._file_stamp()
+            self._checked_at = time.monotonic()
+            return result
+
+    def stats(self) -> dict:
+        """Read and reload counters"""
+        return {"reads": self.reads, "reloads": self.reloads}
+
+_config = ConfigStore(config_file_path)
+
 def _load_config():
-    """Load config data from file"""
-    with open(f"{config_file_path}", "r") as config_file:
-        return json.load(config_file)
+    """Load config data from memory (treat the result as read-only)"""
+    return _config.get()
 
 def _save_config(config_data):
-    """Save config data to file"""
-    with open(f"{config_file_path}", "w") as config_file:
-        json.dump(config_data, config_file, indent=4)
+    """Save config data to memory and file"""
+    def replace(current):
+        current.clear()
+        current.update(config_data)
+    _config.update(replace)
+
+# Config cache stats
+def config_stats():
+    """Get config store read and reload counters"""
+    return _config.stats()
 
 # Owner IDs
 def owner_id():
@@ -28,51 +101,60 @@ def owner_id():
 # Add dev ID
 def add_dev_ids(user_id: int):
     """Add a developer ID to config"""
-    config_data = _load_config()
-    if user_id not in list(config_data["dev_ids"]):
+    def add(config_data):
+        if user_id in config_data["dev_ids"]:
+            return False
         config_data["dev_ids"].append(user_id)
-        _save_config(config_data)
         return True
-    return False
+    if user_id in _load_config()["dev_ids"]:
+        return False
+    added = _config.update(add)
+    _rebuild_permissions()
+    return added
 
 # Remove dev
 def remove_dev_ids(user_id: int):
     """Remove a developer ID from config"""
-    config_data = _load_config()
-    if user_id in list(config_data["dev_ids"]):
+    def remove(config_data):
+        if user_id not in config_data["dev_ids"]:
+            return False
         config_data["dev_ids"].remove(user_id)
-        _save_config(config_data)
         return True
-    return False
+    if user_id not in _load_config()["dev_ids"]:
+        return False
+    removed = _config.update(remove)
+    _rebuild_permissions()
+    return removed
+
+# Replace dev IDs
+def set_dev_ids(user_ids: list):
+    """Replace the whole developer ID list (e.g. when restoring a backup)"""
+    user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+    _config.update(lambda config_data: config_data.update({"dev_ids": user_ids}))
+    _rebuild_permissions()
 
 # Dev IDs
 def dev_ids():
     """Get list of developer IDs"""
-    config_data = _load_config()
-    dev_ids = []
-    for ids in config_data["dev_ids"]:
-        dev_ids.append(ids)
-    return list(dev_ids)
+    return list(_load_config()["dev_ids"])
 
 # Check if user is dev
 def is_dev(user_id):
     """Check if user is a developer"""
-    return user_id in dev_ids() or user_id == owner_id()
+    return permissions().is_dev(user_id)
 
 # Check if user is owner
 def is_owner(user_id):
     """Check if user is the owner"""
-    return user_id == owner_id()
+    return permissions().is_owner(user_id)
 
 # Lockdown
 def lockdown(status: bool = True, status_only: bool = False):
     """Get or set lockdown status"""
-    config_data = _load_config()
     if status_only:
-        return config_data["lockdown"]
+        return _load_config()["lockdown"]
     else:
-        config_data["lockdown"] = status
-        _save_config(config_data)
+        _config.update(lambda config_data: config_data.update({"lockdown": status}))
         return status
 
 # Return owner guild ids if lockdown is enabled
@@ -110,42 +192,73 @@ def discord_api_token():
 # Lavalink
 def lavalink(key: str = None, mode: str = "get", data: str = None):
     """Get or set Lavalink configuration"""
-    config_data = _load_config()
     if mode == "get":
-        return config_data["lavalink"][key]
+        return _load_config()["lavalink"][key]
     elif mode == "set":
-        config_data["lavalink"][key] = data
-        _save_config(config_data)
+        _config.update(lambda config_data: config_data["lavalink"].update({key: data}))
         return data
 
+# -------------------- STORAGE ENGINE --------------------
+
+# Keys of the `storage` config block that tune the in-memory layers, not the engine
+_STORE_OPTIONS = ("flush_interval", "flush_threshold", "io_workers", "debug", "shared_cache")
+
+_backend = None
+_store = None
+_backend_lock = threading.Lock()
+# (kind, callback) pairs to run when another process changes shared data
+_shared_listeners = []
+
+def backend():
+    """Get the storage engine configured by the `storage` config block (SQLite by default)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = _load_config().get("storage", {})
+                _backend = storage.open_backend({key: value for key, value in options.items() if key not in _STORE_OPTIONS})
+    return _backend
+
+def store():
+    """Get the write-behind view of the storage engine"""
+    global _store
+    if _store is None:
+        backend_ = backend()
+        with _backend_lock:
+            if _store is None:
+                options = _load_config().get("storage", {})
+                shared_options = dict(options.get("shared_cache", {}))
+                shared = SharedCache(**shared_options) if shared_options.pop("enabled", False) else None
+                _store = storage.WriteBehind(
+                    backend_,
+                    interval=options.get("flush_interval", 2.0),
+                    max_dirty=options.get("flush_threshold", 100),
+                    debug=options.get("debug", False),
+                    shared=shared
+                )
+                if shared is not None:
+                    for kind, callback in _shared_listeners:
+                        shared.subscribe(kind, callback)
+    return _store
+
+# Shared cache listeners
+def on_shared_change(kind: str, callback):
+    """Call `callback()` when another bot process changes "prefixes" or "noprefix" (shared cache only)"""
+    _shared_listeners.append((kind, callback))
+    if _store is not None and _store.shared is not None:
+        _store.shared.subscribe(kind, callback)
+
+# Flush pending writes
+def flush():
+    """Write all pending settings, prefix and no-prefix changes to disk"""
+    if _store is not None:
+        _store.flush()
+
 # -------------------- PREFIX MANAGEMENT --------------------
 
 def _load_prefixes():
-    """Load server prefixes from file"""
-    try:
-        if not os.path.exists('./data'):
-            os.makedirs('./data')
-        
-        if not os.path.exists('./data/prefixes.json'):
-            with open('./data/prefixes.json', 'w') as f:
-                json.dump({}, f, indent=4)
-                return {}
-        
-        with open('./data/prefixes.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Create the file if it doesn't exist
-        if not os.path.exists('./data'):
-            os.makedirs('./data')
-        
-        with open('./data/prefixes.json', 'w') as f:
-            json.dump({}, f, indent=4)
-        return {}
-
-def _save_prefixes(prefixes):
-    """Save server prefixes to file"""
-    with open('./data/prefixes.json', 'w') as f:
-        json.dump(prefixes, f, indent=4)
+    """Load server prefixes from storage"""
+    return store().prefixes()
 
 def get_prefix(guild_id):
     """Get prefix for a specific guild"""
@@ -155,61 +268,26 @@ def get_prefix(guild_id):
 
 def set_prefix(guild_id, prefix):
     """Set prefix for a specific guild"""
-    guild_id = str(guild_id)  # Convert to string for JSON keys
-    prefixes = _load_prefixes()
-    prefixes[guild_id] = prefix
-    _save_prefixes(prefixes)
+    store().set_prefix(guild_id, prefix)
     return True
 
 def remove_prefix(guild_id):
     """Remove prefix for a specific guild"""
-    guild_id = str(guild_id)  # Convert to string for JSON keys
-    prefixes = _load_prefixes()
-    if guild_id in prefixes:
-        del prefixes[guild_id]
-        _save_prefixes(prefixes)
-        return True
-    return False
+    return store().delete_prefix(guild_id)
 
 # -------------------- NO-PREFIX MANAGEMENT --------------------
 
 def _load_noprefix():
-    """Load no-prefix users from file"""
-    try:
-        if not os.path.exists('./data'):
-            os.makedirs('./data')
-        
-        if not os.path.exists('./data/noprefix.json'):
-            with open('./data/noprefix.json', 'w') as f:
-                json.dump({"users": []}, f, indent=4)
-                return {"users": []}
-        
-        with open('./data/noprefix.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Create the file if it doesn't exist
-        if not os.path.exists('./data'):
-            os.makedirs('./data')
-        
-        with open('./data/noprefix.json', 'w') as f:
-            json.dump({"users": []}, f, indent=4)
-        return {"users": []}
+    """Load no-prefix users from storage"""
+    return {"users": list(store().noprefix())}
 
 def _save_noprefix(data):
-    """Save no-prefix users to file"""
-    with open('./data/noprefix.json', 'w') as f:
-        json.dump(data, f, indent=4)
+    """Save no-prefix users to storage"""
+    store().set_noprefix(data["users"])
 
 def has_noprefix(user_id):
-    """Check if user has no-prefix permission"""
-    user_id = int(user_id)  # Ensure it's an integer
-    data = _load_noprefix()
-    
-    # Always allow owner and devs to use no-prefix
-    if is_owner(user_id) or is_dev(user_id):
-        return True
-        
-    return user_id in data.get("users", [])
+    """Check if user has no-prefix permission (owner and devs always do)"""
+    return permissions().has_noprefix(int(user_id))
 
 def add_noprefix(user_id):
     """Add no-prefix permission for a user"""
@@ -221,6 +299,7 @@ def add_noprefix(user_id):
         
     data["users"].append(user_id)
     _save_noprefix(data)
+    _rebuild_permissions()
     return True
 
 def remove_noprefix(user_id):
@@ -233,8 +312,35 @@ def remove_noprefix(user_id):
         
     data["users"].remove(user_id)
     _save_noprefix(data)
+    _rebuild_permissions()
     return True
 
+def set_noprefix_users(user_ids: list):
+    """Replace the whole no-prefix user list (e.g. when restoring a backup)"""
+    _save_noprefix({"users": list(dict.fromkeys(int(user_id) for user_id in user_ids))})
+    _rebuild_permissions()
+
+# -------------------- PERMISSIONS --------------------
+
+# (config dict the index was built from, index); swapped as one reference
+_permissions = (None, None)
+
+def _rebuild_permissions():
+    """Rebuild the permission index from the current config and no-prefix list"""
+    global _permissions
+    config_data = _load_config()
+    _permissions = (config_data, PermissionIndex.build(config_data, store().noprefix()))
+    return _permissions[1]
+
+on_shared_change("noprefix", _rebuild_permissions)
+
+def permissions() -> PermissionIndex:
+    """Get the owner/dev/no-prefix index, rebuilding it if the config was reloaded"""
+    source, index = _permissions
+    if index is None or source is not _load_config():
+        index = _rebuild_permissions()
+    return index
+
 # -------------------- GUILD CONFIGURATION --------------------
 
 def guild_config(guild_id: int, key: str = "", value: any = None, mode: str = "get"):
@@ -250,42 +356,39 @@ def guild_config(guild_id: int, key: str = "", value: any = None, mode: str = "g
     Returns:
         The current or updated value for the key
     """
-    file_path = f"database/{str(guild_id)}.json"
-    os.makedirs("database", exist_ok=True)
-    data = {}
-
-    try:
-        with open(file_path, "r") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        with open(file_path, "w") as f:
-            data = {
-                "mod_log_ch": None,
-                "mod_cmd_log_ch": None,
-                "msg_log_ch": None,
-                "ticket_cmds": True,
-                "ticket_log_ch": None,
-                "autorole": None,
-            }
-            json.dump(data, f, indent=4)
+    data = store().guild(guild_id) or storage.DEFAULT_GUILD_SETTINGS
 
     if mode == "get":
         return data.get(key)
     elif mode == "set":
-        data[key] = value
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=4)
+        store().set_guild(guild_id, data.replace(**{key: value}))
         return value
 
+# Guild snapshot
+def guild_snapshot(guild_id: int) -> storage.GuildSettings:
+    """Get all settings of a guild in one read"""
+    return store().guild(guild_id) or storage.DEFAULT_GUILD_SETTINGS
+
+# Guild update
+def guild_update(guild_id: int, **changes) -> storage.GuildSettings:
+    """Apply several setting changes in one write"""
+    unknown = set(changes) - set(storage.GuildSettings.FIELDS)
+    if unknown:
+        raise KeyError(f"Unknown guild setting(s): {', '.join(sorted(unknown))}")
+    data = (store().guild(guild_id) or storage.DEFAULT_GUILD_SETTINGS).replace(**changes)
+    store().set_guild(guild_id, data)
+    return data
+
 # Create new db
 def create(guild_id: int):
     """Create new guild database"""
-    guild_config(guild_id=guild_id, mode="get")
+    if store().guild(guild_id) is None:
+        store().set_guild(guild_id, storage.DEFAULT_GUILD_SETTINGS)
 
 # Delete db
 def delete(guild_id: int):
     """Delete guild database"""
-    os.remove(f"database/{str(guild_id)}.json")
+    store().delete_guild(guild_id)
 
 # Mod log channel
 def mod_log_ch(guild_id: int, channel_id: int = None, mode: str = "get"):
@@ -317,47 +420,57 @@ def autorole(guild_id: int, role_id: int = None, mode: str = "get"):
     """Get or set autorole"""
     return guild_config(guild_id, "autorole", role_id, mode)
 
-# -------------------- TEMP FILE --------------------
+# -------------------- RUNTIME STATE --------------------
+
+# Per-guild state that is not persisted, bounded by the `runtime` config block
+def _runtime(name: str, max_items: int = None):
+    options = _load_config().get("runtime", {})
+    return runtime.namespace(name, options.get("ttl", 21600), options.get("max_guilds", 10000), max_items)
 
 # Play channel ID
 def play_ch_id(guild_id: int, channel_id: any = None, mode: str = "get"):
     """Get or set play channel ID"""
     if mode == "get":
-        return temp_file_path.get(f"{str(guild_id)}-play_ch_id", None)
+        return _runtime("play_ch_id").get(guild_id)
     elif mode == "set":
-        temp_file_path.update({f"{str(guild_id)}-play_ch_id": channel_id})
+        _runtime("play_ch_id").set(guild_id, getattr(channel_id, "id", channel_id))
 
-# Play msg ID
+# Play msg
 def play_msg(guild_id: int, msg: any = None, mode: str = "get"):
-    """Get or set play message"""
+    """Get or set play message (stored as a MessageHandle)"""
     match mode:
         case "get":
-            return temp_file_path.get(f"{str(guild_id)}-play_msg", None)
+            return _runtime("play_msg").get(guild_id)
         case "set":
-            temp_file_path.update({f"{str(guild_id)}-play_msg": msg})
+            _runtime("play_msg").set(guild_id, MessageHandle.from_message(msg))
 
-# Queue msg ID
+# Queue msgs
 def queue_msg(guild_id: int, msg: any = None, mode: str = "get"):
-    """Get or set queue message"""
+    """Get, add or clear queue messages (stored as MessageHandles)"""
+    queue_msgs = _runtime("queue_msgs", _load_config().get("runtime", {}).get("max_queue_msgs", 10))
     match mode:
         case "get":
-            if temp_file_path.__contains__(f"{str(guild_id)}-queue_msgs"):
-                return temp_file_path.get(f"{str(guild_id)}-queue_msgs", None)
-            else:
-                return list()
+            return queue_msgs.get(guild_id, ())
         case "set":
-            if temp_file_path.__contains__(f"{str(guild_id)}-queue_msgs"):
-                temp_file_path[f"{str(guild_id)}-queue_msgs"].append(msg)
-            else:
-                temp_file_path.update({f"{str(guild_id)}-queue_msgs": [msg]})
+            queue_msgs.append(guild_id, MessageHandle.from_message(msg))
         case "clear":
-            temp_file_path.update({f"{str(guild_id)}-queue_msgs": []})
+            queue_msgs.pop(guild_id)
 
 # Equalizer
 def equalizer(guild_id: int, name: str = None, mode: str = "get"):
     """Get or set equalizer"""
     match mode:
         case "get":
-            return temp_file_path.get(f"{str(guild_id)}-equalizer", None)
+            return _runtime("equalizer").get(guild_id)
         case "set":
-            temp_file_path.update({f"{str(guild_id)}-equalizer": name})
\ No newline at end of file
+            _runtime("equalizer").set(guild_id, name)
+
+# Drop runtime state
+def clear_runtime(guild_id: int):
+    """Forget a guild's runtime state, e.g. once its player is destroyed"""
+    runtime.drop_guild(guild_id)
+
+# Runtime state stats
+def runtime_stats():
+    """Entries and approximate bytes per runtime namespace"""
+    return runtime.stats()
\ No newline at end of file
@@ -0,0 +1,16 @@
+import aiohttp
+
+_session = None
+
+def session() -> aiohttp.ClientSession:
+    """The process-wide HTTP session; its connection pool is reused by every caller"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300))
+    return _session
+
+async def close():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,180 @@
+import asyncio
+import discord
+from rich import print
+from utils import database as db
+from utils.log_sink import log_sink
+from utils.channels import channels
+from utils.spool import Spool
+from utils.scheduler import scheduler
+
+# Discord limits per message
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+class LogAggregator:
+    """
+    Batches log embeds per channel
+
+    Embeds wait up to `window` seconds in their channel's buffer and go out
+    together, up to `max_embeds` (and Discord's 6000 characters) per
+    message. A full buffer is sent right away, and everything still
+    buffered is sent when the client closes. A batch that fails to send goes
+    back to the front of its buffer and is tried again a window later.
+    `stats()` reports how many REST calls batching saved.
+
+    With a spool (`log_spool` config block), flushed batches are written to
+    disk instead of sent, and the spool's drainer delivers them in order,
+    retrying through outages and resuming after a restart.
+    """
+
+    def __init__(self, enabled: bool = True, window: float = 2.0, max_embeds: int = MAX_EMBEDS, spool_options: dict = None):
+        self.enabled = enabled
+        self.window = window
+        self.max_embeds = max(1, min(max_embeds, MAX_EMBEDS))
+        self.spool = None
+        if spool_options is not None:
+            self.spool = Spool(deliver=self._deliver, **spool_options)
+        self.embeds = 0
+        self.messages = 0
+        self._buffers = {}
+        self._timers = {}
+        # channel ID -> [lock, flushes holding or waiting for it]; dropped once unused
+        self._locks = {}
+        self._tasks = set()
+
+    @classmethod
+    def from_config(cls) -> "LogAggregator":
+        options = db._load_config().get("log_batching", {})
+        spool = db._load_config().get("log_spool", {})
+        spool_options = None
+        if spool.get("enabled", False):
+            spool_options = {
+                "path": spool.get("path", "./data/log-spool"),
+                "segment_bytes": spool.get("segment_bytes", 1048576),
+                "max_bytes": spool.get("max_bytes", 67108864),
+                "checkpoint_every": spool.get("checkpoint_every", 20),
+                "max_retries": spool.get("max_retries", 8),
+                "max_backoff": spool.get("max_backoff", 300.0),
+                "max_pending": spool.get("max_pending", 1000)
+            }
+        return cls(options.get("enabled", True), options.get("window", 2.0), options.get("max_embeds", MAX_EMBEDS), spool_options)
+
+    def bind(self, client):
+        """Send (or spool) what's still buffered before `client` closes"""
+        close = client.close
+
+        async def flush_and_close():
+            await self.flush_all()
+            if self.spool is not None:
+                await self.spool.close()
+            await close()
+
+        client.close = flush_and_close
+
+    async def send(self, channel_id: int, *embeds):
+        """Queue embeds for a log channel"""
+        if not self.enabled:
+            self._buffers.setdefault(channel_id, []).extend(embeds)
+            await self.flush(channel_id)
+            return
+        buffer = self._buffers.setdefault(channel_id, [])
+        buffer.extend(embeds)
+        if len(buffer) >= self.max_embeds:
+            await self.flush(channel_id)
+        elif channel_id not in self._timers:
+            self._timers[channel_id] = asyncio.get_running_loop().call_later(self.window, self._flush_later, channel_id)
+
+    def _flush_later(self, channel_id: int):
+        self._timers.pop(channel_id, None)
+        task = asyncio.create_task(self.flush(channel_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[red][bold]✗[/] Log flush failed: {task.exception()}[/]")
+
+    def _batches(self, embeds: list):
+        batch, chars = [], 0
+        for embed in embeds:
+            if batch and (len(batch) == self.max_embeds or chars + len(embed) > MAX_EMBED_CHARS):
+                yield batch
+                batch, chars = [], 0
+            batch.append(embed)
+            chars += len(embed)
+        if batch:
+            yield batch
+
+    def start(self):
+        """Start delivering spooled logs, including any left from the last run"""
+        if self.spool is not None:
+            self.spool.start()
+
+    async def _deliver(self, channel_id: int, payload: dict) -> bool:
+        embeds = [discord.Embed.from_dict(embed) for embed in payload["embeds"]]
+        if await scheduler.call("background", log_sink.send, channel_id, embeds=embeds, bucket=("channel", channel_id)):
+            return True
+        if channels.is_gone(channel_id):
+            return False
+        # Missing permissions or access can be fixed; have the spool retry
+        raise RuntimeError(f"log channel {channel_id} is not accessible")
+
+    async def flush(self, channel_id: int):
+        """Send (or spool) a channel's buffer now"""
+        timer = self._timers.pop(channel_id, None)
+        if timer is not None:
+            timer.cancel()
+        buffer = self._buffers.pop(channel_id, None)
+        if not buffer:
+            return
+        # One flush per channel at a time keeps the log in order
+        entry = self._locks.setdefault(channel_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await self._flush(channel_id, buffer)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[channel_id]
+
+    async def _flush(self, channel_id: int, buffer: list):
+        sent = 0
+        for batch in self._batches(buffer):
+            if self.spool is not None:
+                if not self.spool.append(channel_id, {"embeds": [embed.to_dict() for embed in batch]}):
+                    sent += len(batch)
+                    continue
+            else:
+                try:
+                    await scheduler.call("background", log_sink.send, channel_id, embeds=batch, bucket=("channel", channel_id))
+                except Exception as e:
+                    # Keep what's unsent ahead of anything buffered since, and try again later
+                    print(f"[red][bold]✗[/] Log batch for {channel_id} failed, retrying in {self.window}s: {e}[/]")
+                    self._buffers[channel_id] = buffer[sent:] + self._buffers.get(channel_id, [])
+                    if channel_id not in self._timers:
+                        self._timers[channel_id] = asyncio.get_running_loop().call_later(self.window, self._flush_later, channel_id)
+                    return
+            sent += len(batch)
+            self.embeds += len(batch)
+            self.messages += 1
+
+    async def flush_all(self):
+        for channel_id in list(self._buffers):
+            await self.flush(channel_id)
+        if self.spool is not None:
+            self.spool.checkpoint()
+
+    def stats(self) -> dict:
+        stats = {
+            "embeds": self.embeds,
+            "messages": self.messages,
+            "rest_calls_saved": self.embeds - self.messages,
+            "buffered": sum(map(len, self._buffers.values()))
+        }
+        if self.spool is not None:
+            stats["spool"] = self.spool.stats()
+        return stats
+
+log_aggregator = LogAggregator.from_config()
@@ -0,0 +1,115 @@
+import time
+import discord
+from utils import database as db, http
+from utils.async_storage import store
+from utils.channels import channels
+from utils.log_webhooks import WebhookStore
+
+class LogSink:
+    """
+    Delivers log messages, through a webhook per log channel when enabled
+
+    Webhook posts go through the shared HTTP session and are rate limited
+    per webhook, apart from the bot's own buckets, so a busy log never
+    slows down command responses. The first post to a channel reuses a
+    webhook the bot already owns there or creates one, and keeps its token
+    in `webhooks_path`. Without the webhooks option, or while a
+    channel can't have one (missing Manage Webhooks), messages are sent
+    by the bot as before.
+    """
+
+    def __init__(self, webhooks: bool = False, webhook_name: str = "Logs", retry_after: float = 600.0,
+                 webhooks_path: str = "./data/log-webhooks.json"):
+        self.webhooks = webhooks
+        self.webhook_name = webhook_name
+        self.retry_after = retry_after
+        self.stored = WebhookStore(webhooks_path)
+        self.client = None
+        self.webhook_posts = 0
+        self.bot_posts = 0
+        # channel ID -> discord.Webhook
+        self._webhooks = {}
+        # channel ID -> monotonic time to try creating a webhook again
+        self._unavailable = {}
+
+    @classmethod
+    def from_config(cls) -> "LogSink":
+        options = db._load_config().get("log_sink", {})
+        return cls(
+            options.get("webhooks", False),
+            options.get("webhook_name", "Logs"),
+            options.get("retry_after", 600.0),
+            options.get("webhooks_path", "./data/log-webhooks.json")
+        )
+
+    def bind(self, client):
+        """Close the shared HTTP session when `client` closes"""
+        self.client = client
+        close = client.close
+
+        async def close_session():
+            await close()
+            await http.close()
+
+        client.close = close_session
+
+    async def send(self, channel_id: int, **kwargs):
+        """Post to a log channel; returns False if it couldn't be delivered"""
+        if self.webhooks:
+            webhook = await self._webhook(channel_id)
+            if webhook is not None:
+                try:
+                    await webhook.send(username=self.client.user.name, avatar_url=self.client.user.display_avatar.url, **kwargs)
+                    self.webhook_posts += 1
+                    return True
+                except (discord.NotFound, discord.Forbidden):
+                    # Deleted (or its channel is gone); fall back and make a new one next time
+                    await self._forget(channel_id)
+        sent = await channels.send(channel_id, **kwargs)
+        if sent is not None:
+            self.bot_posts += 1
+        return sent is not None
+
+    async def _webhook(self, channel_id: int):
+        webhook = self._webhooks.get(channel_id)
+        if webhook is not None:
+            return webhook
+        if self._unavailable.get(channel_id, 0) > time.monotonic():
+            return None
+        channel = await channels.get(channel_id)
+        if channel is None or not hasattr(channel, "webhooks"):
+            return None
+        stored = await store.run(self.stored.get, channel_id)
+        if stored is not None:
+            webhook = discord.Webhook.partial(*stored, session=http.session())
+        else:
+            webhook = await self._create(channel)
+            if webhook is None:
+                self._unavailable[channel_id] = time.monotonic() + self.retry_after
+                return None
+            await store.run(self.stored.set, channel_id, webhook.id, webhook.token)
+        self._webhooks[channel_id] = webhook
+        return webhook
+
+    async def _create(self, channel):
+        """Reuse a webhook the bot owns in `channel`, or create one"""
+        if not channel.permissions_for(channel.guild.me).manage_webhooks:
+            return None
+        try:
+            for webhook in await channel.webhooks():
+                if webhook.token and webhook.user and webhook.user.id == self.client.user.id:
+                    break
+            else:
+                webhook = await channel.create_webhook(name=self.webhook_name, reason="Log delivery")
+        except discord.HTTPException:
+            return None
+        return discord.Webhook.partial(webhook.id, webhook.token, session=http.session())
+
+    async def _forget(self, channel_id: int):
+        self._webhooks.pop(channel_id, None)
+        await store.run(self.stored.forget, channel_id)
+
+    def stats(self) -> dict:
+        return {"webhooks": len(self._webhooks), "webhook_posts": self.webhook_posts, "bot_posts": self.bot_posts}
+
+log_sink = LogSink.from_config()
@@ -0,0 +1,51 @@
+import os
+import json
+import threading
+
+class WebhookStore:
+    """
+    The log webhooks the bot created, by channel ID
+
+    Kept in its own file rather than in the guild settings, since webhook
+    tokens are credentials and the map is only read by the log sink. The
+    file is read once; every change rewrites it atomically.
+    """
+
+    def __init__(self, path: str = "./data/log-webhooks.json"):
+        self.path = path
+        self._webhooks = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._webhooks is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._webhooks = {int(channel_id): tuple(webhook) for channel_id, webhook in json.load(f).items()}
+            except FileNotFoundError:
+                self._webhooks = {}
+        return self._webhooks
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({str(channel_id): list(webhook) for channel_id, webhook in self._webhooks.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, channel_id: int):
+        """(webhook ID, token) for a channel, or None"""
+        with self._lock:
+            return self._load().get(channel_id)
+
+    def set(self, channel_id: int, webhook_id: int, token: str):
+        with self._lock:
+            self._load()[channel_id] = (webhook_id, token)
+            self._save()
+
+    def forget(self, channel_id: int) -> bool:
+        """Drop a channel's webhook; False if there was none"""
+        with self._lock:
+            if self._load().pop(channel_id, None) is None:
+                return False
+            self._save()
+            return True
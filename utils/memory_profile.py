@@ -0,0 +1,105 @@
+import asyncio
+import discord
+from rich import print
+from utils import database as db
+
+# Intents each profile turns off; "presences" is by far the largest and only feeds the status shown by userinfo
+_DISABLED_INTENTS = {
+    "full": (),
+    "balanced": ("presences",),
+    "lean": ("presences", "typing", "dm_typing", "invites", "integrations", "webhooks")
+}
+
+# (member cache, chunking, pycord message cache size)
+# Chunking: "startup" fetches every member of every guild before on_ready, "small" chunks guilds up to
+# `large_threshold` members in the background after on_ready, "lazy" leaves all guilds to `ensure_members`.
+# Message logs use their own cache (utils/message_cache.py), so the lean profile turns pycord's off.
+PROFILES = {
+    "full": ("all", "startup", 1000),
+    "balanced": ("joined", "small", 1000),
+    "lean": ("voice", "lazy", None)
+}
+
+class MemoryProfile:
+    """
+    How much of the gateway's state the client keeps in memory
+
+    Chooses the intents, `MemberCacheFlags` and chunking strategy the client
+    is built with. Guilds that aren't chunked at startup are chunked the
+    first time a command needs their full member list (`ensure_members`).
+    """
+
+    def __init__(self, name: str = "full", large_threshold: int = 1000):
+        if name not in PROFILES:
+            raise ValueError(f"Unknown memory profile: {name!r} (expected one of {', '.join(PROFILES)})")
+        self.name = name
+        self.member_cache, self.chunking, self.max_messages = PROFILES[name]
+        self.large_threshold = large_threshold
+        self.chunked_lazily = 0
+        self._chunking = {}
+
+    @classmethod
+    def from_config(cls) -> "MemoryProfile":
+        options = db._load_config().get("memory_profile", {})
+        return cls(options.get("name", "full"), options.get("large_threshold", 1000))
+
+    def intents(self) -> discord.Intents:
+        intents = discord.Intents.all()
+        for name in _DISABLED_INTENTS[self.name]:
+            setattr(intents, name, False)
+        return intents
+
+    def member_cache_flags(self) -> discord.MemberCacheFlags:
+        if self.member_cache == "all":
+            return discord.MemberCacheFlags.all()
+        flags = discord.MemberCacheFlags.none()
+        # Music needs the members in voice channels
+        flags.voice = True
+        if self.member_cache == "joined":
+            flags.joined = True
+        return flags
+
+    def client_options(self) -> dict:
+        """Keyword arguments for the client constructor"""
+        return {
+            "intents": self.intents(),
+            "member_cache_flags": self.member_cache_flags(),
+            "chunk_guilds_at_startup": self.chunking == "startup",
+            "max_messages": self.max_messages
+        }
+
+    async def ensure_members(self, guild: discord.Guild) -> list:
+        """
+        Every member of `guild`; concurrent callers share one request
+
+        Unless the profile caches all members, they are requested without
+        being added to the member cache, so one command doesn't keep a big
+        guild's member list in memory for good.
+        """
+        if guild.chunked:
+            return guild.members
+        task = self._chunking.get(guild.id)
+        if task is None:
+            task = self._chunking[guild.id] = asyncio.create_task(guild.chunk(cache=self.member_cache == "all"))
+            task.add_done_callback(lambda _: self._chunking.pop(guild.id, None))
+            self.chunked_lazily += 1
+        members = await asyncio.shield(task)
+        return guild.members if members is None else members
+
+    async def chunk_small(self, guilds):
+        """Background chunking of the guilds small enough to be cheap (the "small" strategy)"""
+        if self.chunking != "small":
+            return
+        small = [guild for guild in guilds if not guild.chunked and (guild.member_count or 0) <= self.large_threshold]
+        for guild in small:
+            try:
+                # Cached on purpose: these stay chunked
+                await guild.chunk()
+            except Exception as e:
+                print(f"[red][bold]✗[/] Chunking {guild.id} failed: {e}[/]")
+        print(f"[green][bold]✓[/] Chunked {len(small)} small guild{'' if len(small) == 1 else 's'} ({self.name} memory profile)[/]")
+
+    def stats(self) -> dict:
+        return {"profile": self.name, "chunking": self.chunking, "chunked_lazily": self.chunked_lazily}
+
+memory_profile = MemoryProfile.from_config()
@@ -0,0 +1,109 @@
+import sys
+from collections import OrderedDict
+from utils import database as db
+
+class CachedMessage:
+    """What the message logs need of a message, and nothing else"""
+
+    __slots__ = ("id", "author_id", "channel_id", "content", "attachments", "created_at", "size")
+
+    def __init__(self, id: int, author_id: int, channel_id: int, content: str, attachments: tuple, created_at: float):
+        self.id = id
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.content = content
+        self.attachments = attachments
+        self.created_at = created_at
+        self.size = sys.getsizeof(self) + sys.getsizeof(content) + sys.getsizeof(attachments) + sum(map(sys.getsizeof, attachments))
+
+    @classmethod
+    def from_message(cls, message) -> "CachedMessage":
+        return cls(
+            message.id,
+            message.author.id,
+            message.channel.id,
+            message.content,
+            tuple(attachment.url for attachment in message.attachments),
+            message.created_at.timestamp()
+        )
+
+    def replace(self, content: str = None, attachments: tuple = None) -> "CachedMessage":
+        return CachedMessage(
+            self.id,
+            self.author_id,
+            self.channel_id,
+            self.content if content is None else content,
+            self.attachments if attachments is None else attachments,
+            self.created_at
+        )
+
+    def jump_url(self, guild_id: int) -> str:
+        return f"https://discord.com/channels/{guild_id}/{self.channel_id}/{self.id}"
+
+class _GuildMessages:
+    __slots__ = ("messages", "size")
+
+    def __init__(self):
+        self.messages = OrderedDict()
+        self.size = 0
+
+class MessageCache:
+    """
+    Recent messages of guilds with a message log channel
+
+    Holds `CachedMessage` entries instead of full `discord.Message` objects,
+    so the raw edit/delete events can be logged independently of pycord's
+    own message cache. Every guild has a memory budget of `guild_budget`
+    bytes; once over it, its oldest messages are dropped first.
+    """
+
+    def __init__(self, guild_budget: int = 262144):
+        self.guild_budget = guild_budget
+        self.evicted = 0
+        self._guilds = {}
+
+    @classmethod
+    def from_config(cls) -> "MessageCache":
+        options = db._load_config().get("message_cache", {})
+        return cls(options.get("guild_budget", 262144))
+
+    def add(self, guild_id: int, entry: CachedMessage):
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            guild = self._guilds[guild_id] = _GuildMessages()
+        old = guild.messages.pop(entry.id, None)
+        if old is not None:
+            guild.size -= old.size
+        guild.messages[entry.id] = entry
+        guild.size += entry.size
+        while guild.size > self.guild_budget and len(guild.messages) > 1:
+            _, oldest = guild.messages.popitem(last=False)
+            guild.size -= oldest.size
+            self.evicted += 1
+
+    def get(self, guild_id: int, message_id: int):
+        guild = self._guilds.get(guild_id)
+        return guild.messages.get(message_id) if guild else None
+
+    def pop(self, guild_id: int, message_id: int):
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            return None
+        entry = guild.messages.pop(message_id, None)
+        if entry is not None:
+            guild.size -= entry.size
+        return entry
+
+    def drop_guild(self, guild_id: int):
+        """Forget a guild's messages (left it, or its message log was turned off)"""
+        self._guilds.pop(guild_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "guilds": len(self._guilds),
+            "messages": sum(len(guild.messages) for guild in self._guilds.values()),
+            "bytes": sum(guild.size for guild in self._guilds.values()),
+            "evicted": self.evicted
+        }
+
+message_cache = MessageCache.from_config()
@@ -0,0 +1,55 @@
+import re
+
+class NoPrefixIndex:
+    """
+    Every name a no-prefix user can invoke, mapped straight to its handler
+
+    Built from the loaded cogs, so it has to be rebuilt after extensions are
+    (re)loaded. `lookup` rejects ordinary chat from the first token alone:
+    a token longer than the longest command name is not even read to the
+    end, and everything else costs one dict lookup.
+    """
+
+    def __init__(self, client, utility_commands: list, dev_commands: dict):
+        self.client = client
+        self.utility_commands = utility_commands
+        self.dev_commands = dev_commands
+        self.entries = None
+        self._first_token = None
+
+    def build(self):
+        """(Re)build from the currently loaded cogs"""
+        entries = {}
+        # Lowest priority first; later sources win on a name clash
+        no_prefix_cog = self.client.get_cog("NoPrefixCommands")
+        if no_prefix_cog:
+            for command in no_prefix_cog.get_commands():
+                for name in (command.name, *getattr(command, "aliases", [])):
+                    entries[name.lower()] = ("command", None)
+        for name in self.utility_commands:
+            entries[name] = ("command", None)
+        dev_cog = self.client.get_cog("PrefixDevCommands")
+        for name, method_name in self.dev_commands.items():
+            method = getattr(dev_cog, method_name, None)
+            if method is not None:
+                entries[name] = ("method", method)
+        help_cog = self.client.get_cog("HelpCommands")
+        if help_cog and hasattr(help_cog, "process_noprefix_help"):
+            entries["help"] = ("method", help_cog.process_noprefix_help)
+
+        longest = max(map(len, entries), default=0)
+        self._first_token = re.compile(r"\s*(\S{1,%d})(?:\s|$)" % max(longest, 1))
+        self.entries = entries
+
+    def lookup(self, content: str):
+        """Return (command name, kind, target, rest of the message), or None for non-commands"""
+        if self.entries is None:
+            self.build()
+        found = self._first_token.match(content)
+        if found is None:
+            return None
+        name = found.group(1).lower()
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        return (name, *entry, content[found.end():].strip())
@@ -0,0 +1,29 @@
+class PermissionIndex:
+    """
+    Immutable snapshot of owner, dev and no-prefix user IDs
+
+    Owners count as devs and devs count as no-prefix users, so each check is
+    a single frozenset lookup. Never mutate an index; build a new one and
+    swap the reference instead.
+    """
+
+    __slots__ = ("owners", "devs", "noprefix")
+
+    def __init__(self, owners=(), devs=(), noprefix=()):
+        self.owners = frozenset(owners)
+        self.devs = frozenset(devs) | self.owners
+        self.noprefix = frozenset(noprefix) | self.devs
+
+    @classmethod
+    def build(cls, config_data: dict, noprefix_users):
+        """Build an index from the config dict and the no-prefix user list"""
+        return cls((config_data["owner_id"],), config_data["dev_ids"], noprefix_users)
+
+    def is_owner(self, user_id: int) -> bool:
+        return user_id in self.owners
+
+    def is_dev(self, user_id: int) -> bool:
+        return user_id in self.devs
+
+    def has_noprefix(self, user_id: int) -> bool:
+        return user_id in self.noprefix
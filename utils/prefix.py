@@ -0,0 +1,135 @@
+import re
+import threading
+from utils import database as db
+
+DEFAULT_PREFIX = "!"
+MAX_PREFIXES = 5
+
+class PrefixMatcher:
+    """A guild's prefixes (plus bot mentions) compiled into one regex"""
+
+    __slots__ = ("prefixes", "candidates", "_pattern")
+
+    def __init__(self, prefixes: tuple, mentions: tuple = ()):
+        self.prefixes = prefixes
+        self.candidates = prefixes + mentions
+        # Longest first so "!!" wins over "!"
+        alternatives = sorted(self.candidates, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, alternatives)))
+
+    def match(self, content: str):
+        """Return the prefix `content` starts with, or None"""
+        found = self._pattern.match(content)
+        return found.group(0) if found else None
+
+class PrefixResolver:
+    """
+    In-memory per-guild prefix lookup for the bot's `command_prefix`
+
+    Guild prefixes are read from storage once. Each distinct prefix set is
+    compiled into a single `PrefixMatcher` that is shared by every guild
+    using it, and only guilds with a custom prefix get an entry. `set` and
+    `remove` persist through the database helpers and recompile just the
+    guild that changed.
+    """
+
+    def __init__(self, default: str = DEFAULT_PREFIX):
+        self.default = default
+        self._guilds = None
+        self._matchers = {}
+        self._mentions = ()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(value) -> tuple:
+        """Turn a stored prefix value (str or list) into a tuple of prefixes"""
+        if isinstance(value, str):
+            return (value,)
+        return tuple(dict.fromkeys(p for p in value if p))
+
+    def _matcher(self, prefixes: tuple) -> PrefixMatcher:
+        matcher = self._matchers.get(prefixes)
+        if matcher is None:
+            matcher = self._matchers[prefixes] = PrefixMatcher(prefixes, self._mentions)
+        return matcher
+
+    def load(self, prefix_map: dict = None):
+        """(Re)build every matcher from `prefix_map`, or from storage if omitted"""
+        if prefix_map is None:
+            prefix_map = db._load_prefixes()
+        with self._lock:
+            self._matchers = {}
+            guilds = {}
+            for guild_id, value in prefix_map.items():
+                prefixes = self.normalize(value)
+                if prefixes and prefixes != (self.default,):
+                    guilds[int(guild_id)] = self._matcher(prefixes)
+            self._guilds = guilds
+
+    def bind_user(self, user_id: int):
+        """Accept mentions of the bot user as a prefix everywhere"""
+        mentions = (f"<@{user_id}> ", f"<@!{user_id}> ")
+        if mentions == self._mentions:
+            return
+        with self._lock:
+            self._mentions = mentions
+            self._matchers = {}
+            if self._guilds is not None:
+                self._guilds = {guild_id: self._matcher(matcher.prefixes) for guild_id, matcher in self._guilds.items()}
+
+    def matcher(self, guild_id: int = None) -> PrefixMatcher:
+        """Matcher for a guild (the default matcher for DMs and guilds without a custom prefix)"""
+        if self._guilds is None:
+            self.load()
+        if guild_id is not None:
+            matcher = self._guilds.get(guild_id)
+            if matcher is not None:
+                return matcher
+        return self._matcher((self.default,))
+
+    def get(self, guild_id: int) -> tuple:
+        """The prefixes configured for a guild, without mentions"""
+        return self.matcher(guild_id).prefixes
+
+    def set(self, guild_id: int, value):
+        """Store new prefix(es) for a guild and recompile only that guild"""
+        prefixes = self.normalize(value)
+        if not prefixes:
+            raise ValueError("At least one prefix is required")
+        db.set_prefix(guild_id, prefixes[0] if len(prefixes) == 1 else list(prefixes))
+        if self._guilds is None:
+            self.load()
+        with self._lock:
+            if prefixes == (self.default,):
+                self._guilds.pop(int(guild_id), None)
+            else:
+                self._guilds[int(guild_id)] = self._matcher(prefixes)
+
+    def remove(self, guild_id: int):
+        """Forget a guild's prefix(es)"""
+        db.remove_prefix(guild_id)
+        if self._guilds is not None:
+            with self._lock:
+                self._guilds.pop(int(guild_id), None)
+
+    def match(self, message):
+        """Return the prefix `message` was invoked with, or None"""
+        return self.matcher(message.guild.id if message.guild else None).match(message.content)
+
+    def __call__(self, bot, message):
+        """
+        `command_prefix` callable
+
+        Returns just the prefix the compiled matcher found, so the library
+        only has to skip that one. Without a match the full tuple is
+        returned (it rejects empty iterables) and its `startswith` check fails.
+        """
+        if not self._mentions and bot.user is not None:
+            self.bind_user(bot.user.id)
+        matcher = self.matcher(message.guild.id if message.guild else None)
+        prefix = matcher.match(message.content)
+        return (prefix,) if prefix is not None else matcher.candidates
+
+resolver = PrefixResolver()
+# Recompile when another bot process changes prefixes
+db.on_shared_change("prefixes", resolver.load)
@@ -0,0 +1,172 @@
+import time
+import random
+import asyncio
+from rich import print
+from utils import database as db
+from utils.runtime import Namespace
+
+# Upper bounds of the account age histogram, in seconds
+AGE_BUCKETS = ((3600, "< 1 hour"), (86400, "< 1 day"), (604800, "< 1 week"), (2592000, "< 30 days"), (31536000, "< 1 year"), (None, "older"))
+
+class RateWindow:
+    """Events in the last `size` seconds, counted in one-second buckets"""
+
+    __slots__ = ("counts", "total", "second")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0
+        self.second = 0
+
+    def _advance(self, second: int):
+        # Clears at most `size` buckets, however long the window was idle
+        size = len(self.counts)
+        for skipped in range(self.second + 1, min(second, self.second + size) + 1):
+            self.total -= self.counts[skipped % size]
+            self.counts[skipped % size] = 0
+        self.second = max(self.second, second)
+
+    def add(self, now: float) -> int:
+        second = int(now)
+        self._advance(second)
+        self.counts[second % len(self.counts)] += 1
+        self.total += 1
+        return self.total
+
+    def rate(self, now: float) -> int:
+        self._advance(int(now))
+        return self.total
+
+class Digest:
+    """Summary of the joins and leaves seen in digest mode since the last report"""
+
+    __slots__ = ("counts", "samples", "seen", "ages", "started")
+
+    def __init__(self):
+        self.counts = {"join": 0, "leave": 0}
+        self.samples = []
+        self.seen = 0
+        self.ages = [0] * len(AGE_BUCKETS)
+        self.started = time.time()
+
+    def add(self, kind: str, member, sample_size: int):
+        self.counts[kind] += 1
+        # Reservoir sampling keeps an even sample in constant space
+        self.seen += 1
+        sample = (kind, member.id, str(member))
+        if len(self.samples) < sample_size:
+            self.samples.append(sample)
+        else:
+            index = random.randrange(self.seen)
+            if index < sample_size:
+                self.samples[index] = sample
+        age = time.time() - member.created_at.timestamp()
+        for index, (limit, _) in enumerate(AGE_BUCKETS):
+            if limit is None or age < limit:
+                self.ages[index] += 1
+                break
+
+    def histogram(self) -> list:
+        """(label, count) for every non-empty account age bucket"""
+        return [(label, count) for (_, label), count in zip(AGE_BUCKETS, self.ages) if count]
+
+class GuildActivity:
+    __slots__ = ("joins", "leaves", "digest", "task")
+
+    def __init__(self, window: int):
+        self.joins = RateWindow(window)
+        self.leaves = RateWindow(window)
+        self.digest = None
+        self.task = None
+
+class RaidMonitor:
+    """
+    Switches join/leave logging to periodic digests during raids
+
+    Joins and leaves are counted per guild over a sliding window of
+    `window` seconds (constant time per event and constant memory per
+    guild). When either rate reaches `threshold`, the guild goes into digest
+    mode: events are folded into a `Digest` that is reported every
+    `interval` seconds. Once both rates are below half the threshold, the
+    last digest is reported and per-event logging resumes. Idle guilds are
+    forgotten after `idle_ttl` seconds, and at most `max_guilds` are tracked;
+    guilds in digest mode are held apart until their digest task ends, so
+    eviction never starts a second one.
+    """
+
+    def __init__(self, enabled: bool = True, threshold: int = 10, window: int = 10, interval: float = 30.0, sample_size: int = 10, idle_ttl: float = 600.0, max_guilds: int = 10000):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.window = window
+        self.interval = interval
+        self.sample_size = sample_size
+        self.digests = 0
+        self.folded = 0
+        # Coroutine function (guild_id, digest, ended) set by the mod logs
+        self.report = None
+        self._guilds = Namespace("raid", idle_ttl, max_guilds)
+        # guild ID -> GuildActivity while its digest task runs
+        self._raids = {}
+
+    @classmethod
+    def from_config(cls) -> "RaidMonitor":
+        options = db._load_config().get("raid_digest", {})
+        return cls(
+            options.get("enabled", True),
+            options.get("threshold", 10),
+            options.get("window", 10),
+            options.get("interval", 30.0),
+            options.get("sample_size", 10),
+            options.get("idle_ttl", 600.0),
+            options.get("max_guilds", 10000)
+        )
+
+    def record(self, guild_id: int, kind: str, member) -> bool:
+        """Count a join or leave; True if it should be logged on its own, False if a digest covers it"""
+        if not self.enabled:
+            return True
+        activity = self._raids.get(guild_id) or self._guilds.get(guild_id)
+        if activity is None:
+            activity = GuildActivity(self.window)
+        # Re-set on every event so active guilds are never the ones evicted
+        self._guilds.set(guild_id, activity)
+        now = time.monotonic()
+        rate = (activity.joins if kind == "join" else activity.leaves).add(now)
+        if activity.digest is None:
+            if rate < self.threshold:
+                return True
+            activity.digest = Digest()
+            activity.task = asyncio.create_task(self._run(guild_id, activity))
+            self._raids[guild_id] = activity
+        activity.digest.add(kind, member, self.sample_size)
+        self.folded += 1
+        return False
+
+    async def _run(self, guild_id: int, activity: GuildActivity):
+        """Report digests until the raid is over"""
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            ended = max(activity.joins.rate(now), activity.leaves.rate(now)) < self.threshold / 2
+            digest = activity.digest
+            activity.digest = None if ended else Digest()
+            if digest.seen or ended:
+                self.digests += 1
+                try:
+                    await self.report(guild_id, digest, ended)
+                except Exception as e:
+                    print(f"[red][bold]✗[/] Raid digest for {guild_id} failed: {e}[/]")
+            if ended:
+                activity.task = None
+                del self._raids[guild_id]
+                return
+
+    def stats(self) -> dict:
+        return {
+            "tracked_guilds": len(self._guilds),
+            "in_digest": len(self._raids),
+            "digests": self.digests,
+            "events_folded": self.folded
+        }
+
+raid_monitor = RaidMonitor.from_config()
@@ -0,0 +1,127 @@
+import time
+from discord.ext import commands
+from utils import database as db
+
+# Limits used when the config has no `ratelimit` block
+DEFAULT_RULES = {
+    "prefix": {"rate": 5, "per": 5.0, "burst": 5, "key": "user"},
+    "noprefix": {"rate": 5, "per": 5.0, "burst": 5, "key": "user"},
+    "music_search": {"rate": 20, "per": 10.0, "burst": 10, "key": "guild"},
+    # Separate from /play, so typing a query never uses up the play bucket
+    "music_autocomplete": {"rate": 20, "per": 10.0, "burst": 10, "key": "guild"},
+    "purge": {"rate": 1, "per": 5.0, "burst": 2, "key": "channel"},
+    "mass": {"rate": 1, "per": 10.0, "burst": 2, "key": "guild"}
+}
+
+_BUCKET_TYPES = {"user": commands.BucketType.user, "guild": commands.BucketType.guild, "channel": commands.BucketType.channel}
+
+class Rule:
+    """`rate` requests per `per` seconds, up to `burst` at once, counted per `key` (user, guild or channel)"""
+
+    __slots__ = ("rate", "per", "burst", "key", "interval", "tolerance")
+
+    def __init__(self, rate: int, per: float, burst: int = None, key: str = "user"):
+        if key not in _BUCKET_TYPES:
+            raise ValueError(f"Unknown rate limit key: {key!r}")
+        self.rate = rate
+        self.per = per
+        self.burst = burst or rate
+        self.key = key
+        self.interval = per / rate
+        self.tolerance = self.interval * (self.burst - 1)
+
+    def cooldown(self, retry_after: float) -> commands.CommandOnCooldown:
+        """The error the command error handlers already answer"""
+        return commands.CommandOnCooldown(commands.Cooldown(self.rate, self.per), retry_after, _BUCKET_TYPES[self.key])
+
+class RateLimiter:
+    """
+    Token buckets per command category
+
+    Each bucket is stored as a single float, the time it will be full again
+    (GCRA, equivalent to a token bucket), in one dict per category. A full
+    bucket holds no information, so buckets whose time has passed are
+    dropped by a sweep every `sweep_interval` seconds, done inline by the
+    next `hit`. Allowed and rejected requests are counted per category.
+    """
+
+    def __init__(self, rules: dict, enabled: bool = True, sweep_interval: float = 60.0):
+        self.enabled = enabled
+        self.sweep_interval = sweep_interval
+        self.rules = {category: Rule(**options) for category, options in rules.items()}
+        self._buckets = {category: {} for category in self.rules}
+        self.allowed = dict.fromkeys(self.rules, 0)
+        self.rejected = dict.fromkeys(self.rules, 0)
+        self.swept = 0
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    @classmethod
+    def from_config(cls) -> "RateLimiter":
+        options = db._load_config().get("ratelimit", {})
+        return cls(
+            options.get("rules", DEFAULT_RULES),
+            options.get("enabled", True),
+            options.get("sweep_interval", 60.0)
+        )
+
+    @staticmethod
+    def key_of(rule: Rule, source) -> int:
+        """Bucket key of a message, context or interaction"""
+        if rule.key == "channel":
+            channel = getattr(source, "channel", None)
+            return channel.id if channel is not None else source.channel_id
+        if rule.key == "guild":
+            guild = getattr(source, "guild", None)
+            if guild is not None:
+                return guild.id
+        # User buckets, and guild buckets outside of guilds
+        user = getattr(source, "author", None) or source.user
+        return user.id
+
+    def hit(self, category: str, source) -> float:
+        """Take a token; return 0 if allowed, else seconds until the next one"""
+        rule = self.rules.get(category)
+        if rule is None or not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+        buckets = self._buckets[category]
+        key = self.key_of(rule, source)
+        full_at = buckets.get(key, now)
+        if full_at < now:
+            full_at = now
+        if full_at - now > rule.tolerance:
+            self.rejected[category] += 1
+            return full_at - rule.tolerance - now
+        buckets[key] = full_at + rule.interval
+        self.allowed[category] += 1
+        return 0.0
+
+    def sweep(self, now: float = None):
+        """Drop full buckets"""
+        now = time.monotonic() if now is None else now
+        for category, buckets in self._buckets.items():
+            full = [key for key, full_at in buckets.items() if full_at <= now]
+            for key in full:
+                del buckets[key]
+            self.swept += len(full)
+        self._next_sweep = now + self.sweep_interval
+
+    def stats(self) -> dict:
+        """Per category: live buckets, allowed and rejected requests"""
+        return {
+            category: {"buckets": len(self._buckets[category]), "allowed": self.allowed[category], "rejected": self.rejected[category]}
+            for category in self.rules
+        }
+
+limiter = RateLimiter.from_config()
+
+def limit(category: str):
+    """Command check: reject with CommandOnCooldown once the category's limit is hit"""
+    def predicate(ctx):
+        retry_after = limiter.hit(category, ctx)
+        if retry_after:
+            raise limiter.rules[category].cooldown(retry_after)
+        return True
+    return commands.check(predicate)
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import asyncio
+from rich import print
+from utils import database as db
+from utils.async_storage import store
+
+_MISSING = object()
+
+class Reconciler:
+    """
+    Removes stored data of guilds the bot is no longer in
+
+    Stored guild IDs (settings and prefixes) are streamed against the set of
+    live guild IDs. A guild only counts as orphaned once it has been missing
+    for `grace_days` across runs; first sightings are remembered in
+    `state_path`, and a guild that shows up again is forgotten. Orphans are
+    then archived (one JSON line each in `archive_path`) or deleted, in
+    batches of `batch_size` so the storage thread is never held for long.
+    """
+
+    def __init__(self, enabled: bool = False, grace_days: float = 7, mode: str = "archive", batch_size: int = 100,
+                 state_path: str = "./data/orphans.json", archive_path: str = "./data/orphans-archive.ndjson"):
+        if mode not in ("archive", "delete"):
+            raise ValueError(f"Unknown reconcile mode: {mode}")
+        self.enabled = enabled
+        self.grace = grace_days * 86400
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.state_path = state_path
+        self.archive_path = archive_path
+        self.task = None
+        self.result = None
+
+    @classmethod
+    def from_config(cls) -> "Reconciler":
+        options = db._load_config().get("reconcile", {})
+        return cls(
+            options.get("enabled", False),
+            options.get("grace_days", 7),
+            options.get("mode", "archive"),
+            options.get("batch_size", 100),
+            options.get("state_path", "./data/orphans.json"),
+            options.get("archive_path", "./data/orphans-archive.ndjson")
+        )
+
+    def start(self, guild_ids) -> asyncio.Task:
+        """Start reconciling in the background (once; later calls return the same task)"""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(frozenset(guild_ids)))
+        return self.task
+
+    # Orphan first-seen times, persisted between runs
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r") as f:
+                return {int(guild_id): seen for guild_id, seen in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def _save_state(self, state: dict):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({str(guild_id): seen for guild_id, seen in state.items()}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def scan(self, live: frozenset) -> list:
+        """Update the orphan state and return the guild IDs whose grace period is over"""
+        write_behind = db.store()
+        now = time.time()
+        previous = self._load_state()
+        state = {}
+        stored = set(write_behind.guild_ids())
+        stored.update(int(guild_id) for guild_id in write_behind.prefixes())
+        for guild_id in stored:
+            if guild_id not in live:
+                state[guild_id] = previous.get(guild_id, now)
+        self._save_state(state)
+        return sorted(guild_id for guild_id, seen in state.items() if now - seen >= self.grace)
+
+    def forget(self, guild_ids: list):
+        """Drop removed guilds from the orphan state"""
+        removed = set(guild_ids)
+        self._save_state({guild_id: seen for guild_id, seen in self._load_state().items() if guild_id not in removed})
+
+    def remove(self, guild_ids: list) -> dict:
+        """Archive or delete one batch of orphans"""
+        write_behind = db.store()
+        reclaimed = {"guilds": 0, "prefixes": 0, "bytes": 0}
+        lines = []
+        stored = []
+        for guild_id in guild_ids:
+            settings = write_behind.cached_guild(guild_id, _MISSING)
+            if settings is _MISSING:
+                settings = write_behind.backend.load_guild(guild_id)
+            elif settings is not None:
+                settings = settings.to_dict()
+            prefix = write_behind.prefixes().get(str(guild_id))
+            record = json.dumps({"guild_id": guild_id, "settings": settings, "prefix": prefix})
+            lines.append(record + "\n")
+            stored.append((guild_id, settings is not None))
+            reclaimed["bytes"] += len(record)
+        if self.mode == "archive":
+            # The archive must be on disk before anything is deleted; a failed write raises here
+            os.makedirs(os.path.dirname(self.archive_path) or ".", exist_ok=True)
+            with open(self.archive_path, "a") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        for guild_id, has_settings in stored:
+            if has_settings:
+                write_behind.delete_guild(guild_id)
+                reclaimed["guilds"] += 1
+            if write_behind.delete_prefix(guild_id):
+                reclaimed["prefixes"] += 1
+        write_behind.flush()
+        return reclaimed
+
+    async def run(self, live: frozenset) -> dict:
+        started = time.perf_counter()
+        if not live:
+            # Not a trustworthy view of our guilds; never treat everything as orphaned
+            return None
+        orphans = await store.run(self.scan, live)
+        totals = {"guilds": 0, "prefixes": 0, "bytes": 0}
+        for start in range(0, len(orphans), self.batch_size):
+            reclaimed = await store.run(self.remove, orphans[start:start + self.batch_size])
+            for key, value in reclaimed.items():
+                totals[key] += value
+        if orphans:
+            await store.run(self.forget, orphans)
+            action = "Archived" if self.mode == "archive" else "Deleted"
+            print(
+                f"[green][bold]✓[/] {action} data of {len(orphans)} orphaned guild{'' if len(orphans) == 1 else 's'}: "
+                f"{totals['guilds']} settings, {totals['prefixes']} prefixes, {totals['bytes'] / 1024:.1f} KiB "
+                f"in {time.perf_counter() - started:.2f}s[/]"
+            )
+        self.result = {"orphans": len(orphans), **totals}
+        return self.result
@@ -0,0 +1,115 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+class MessageHandle(NamedTuple):
+    """Lightweight reference to a sent message"""
+    channel_id: int
+    message_id: int
+
+    @classmethod
+    def from_message(cls, message) -> "MessageHandle":
+        return cls(message.channel.id, message.id)
+
+    def resolve(self, client):
+        """`discord.PartialMessage` for this handle; no API call is made"""
+        return client.get_partial_messageable(self.channel_id).get_partial_message(self.message_id)
+
+class Namespace:
+    """
+    One kind of per-guild runtime state with a TTL and an entry cap
+
+    Entries are kept in write order, so expired entries and the overflow
+    over `max_entries` are always at the front and are dropped in O(1)
+    each as new ones come in.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int, max_items: int = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self.expired = 0
+        self.evicted = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, guild_id: int, default=None):
+        entry = self._entries.get(int(guild_id))
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del self._entries[int(guild_id)]
+            self.expired += 1
+            return default
+        return entry[1]
+
+    def set(self, guild_id: int, value):
+        guild_id = int(guild_id)
+        self._entries[guild_id] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(guild_id)
+        self.sweep()
+
+    def append(self, guild_id: int, item):
+        """Add to a guild's tuple of items, keeping only the newest `max_items`"""
+        items = self.get(guild_id, ()) + (item,)
+        if self.max_items is not None:
+            items = items[-self.max_items:]
+        self.set(guild_id, items)
+
+    def pop(self, guild_id: int, default=None):
+        entry = self._entries.pop(int(guild_id), None)
+        return default if entry is None else entry[1]
+
+    def sweep(self):
+        """Drop expired entries and anything over the entry cap"""
+        now = time.monotonic()
+        while self._entries:
+            guild_id, (expires, _) = next(iter(self._entries.items()))
+            if expires <= now:
+                self.expired += 1
+            elif len(self._entries) > self.max_entries:
+                self.evicted += 1
+            else:
+                break
+            del self._entries[guild_id]
+
+    def stats(self) -> dict:
+        """Entry count, approximate memory in bytes and eviction counters"""
+        size = sys.getsizeof(self._entries)
+        for guild_id, entry in self._entries.items():
+            size += sys.getsizeof(guild_id) + sys.getsizeof(entry) + sys.getsizeof(entry[1])
+            if isinstance(entry[1], tuple):
+                size += sum(sys.getsizeof(item) for item in entry[1])
+        return {"entries": len(self._entries), "bytes": size, "expired": self.expired, "evicted": self.evicted}
+
+class RuntimeState:
+    """Namespaced per-guild state that only lives as long as the process (and its TTL)"""
+
+    def __init__(self):
+        self.namespaces = {}
+
+    def namespace(self, name: str, ttl: float, max_entries: int, max_items: int = None) -> Namespace:
+        """Get or create a namespace"""
+        namespace = self.namespaces.get(name)
+        if namespace is None:
+            namespace = self.namespaces[name] = Namespace(name, ttl, max_entries, max_items)
+        return namespace
+
+    def drop_guild(self, guild_id: int):
+        """Forget everything stored for a guild"""
+        for namespace in self.namespaces.values():
+            namespace.pop(guild_id)
+
+    def sweep(self):
+        for namespace in self.namespaces.values():
+            namespace.sweep()
+
+    def stats(self) -> dict:
+        """Per-namespace stats"""
+        return {name: namespace.stats() for name, namespace in self.namespaces.items()}
+
+runtime = RuntimeState()
@@ -0,0 +1,180 @@
+import time
+import asyncio
+import discord
+from collections import deque
+from utils import database as db
+
+# Lanes in priority order: interaction responses, moderation actions, then logs and cosmetic edits
+LANES = ("interaction", "moderation", "background")
+DEFAULT_LANE_LIMITS = {"interaction": 8, "moderation": 4, "background": 2}
+
+class Job:
+    __slots__ = ("lane", "bucket", "func", "args", "kwargs", "future", "queued", "attempts")
+
+    def __init__(self, lane: str, bucket, func, args: tuple, kwargs: dict, future: asyncio.Future):
+        self.lane = lane
+        self.bucket = bucket
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.queued = time.monotonic()
+        self.attempts = 0
+
+class Scheduler:
+    """
+    Runs outbound REST calls by priority lane
+
+    A call site opts in by awaiting `call(lane, func, *args, bucket=...)`
+    instead of `func(*args)`. Whenever a slot frees up it goes to the
+    oldest waiting call of the highest lane, so interaction responses are
+    never stuck behind log posts. Each lane runs at most its limit at once,
+    and all lanes together at most `concurrency`, of which `reserved` slots
+    are always kept for interaction responses. Calls sharing a `bucket` (e.g.
+    `("channel", id)`, mirroring Discord's rate limit buckets) run one at a
+    time, in order; a bucket that still gets a 429 is held back for
+    `rate_limit_backoff` seconds and its call retried, up to `max_attempts`
+    tries. Without the `scheduler` config block's `enabled`, calls run
+    directly.
+    """
+
+    def __init__(self, enabled: bool = False, concurrency: int = 10, lanes: dict = None, reserved: int = 2,
+                 rate_limit_backoff: float = 5.0, max_attempts: int = 3):
+        self.enabled = enabled
+        self.concurrency = concurrency
+        self.limits = {**DEFAULT_LANE_LIMITS, **(lanes or {})}
+        self.reserved = min(reserved, concurrency - 1)
+        self.rate_limit_backoff = rate_limit_backoff
+        self.max_attempts = max_attempts
+        self.rate_limited = 0
+        self._queues = {lane: deque() for lane in LANES}
+        self._running = dict.fromkeys(LANES, 0)
+        self._total = 0
+        # Buckets with a call in flight
+        self._busy = set()
+        # bucket -> monotonic time it may be used again
+        self._blocked = {}
+        self._timer = None
+        self._tasks = set()
+        self.started = dict.fromkeys(LANES, 0)
+        self.completed = dict.fromkeys(LANES, 0)
+        self.waited = dict.fromkeys(LANES, 0.0)
+        self.max_wait = dict.fromkeys(LANES, 0.0)
+
+    @classmethod
+    def from_config(cls) -> "Scheduler":
+        options = db._load_config().get("scheduler", {})
+        return cls(
+            options.get("enabled", False),
+            options.get("concurrency", 10),
+            options.get("lanes", DEFAULT_LANE_LIMITS),
+            options.get("reserved", 2),
+            options.get("rate_limit_backoff", 5.0),
+            options.get("max_attempts", 3)
+        )
+
+    async def call(self, lane: str, func, *args, bucket=None, **kwargs):
+        """Await `func(*args, **kwargs)` once `lane` gets a slot; returns its result"""
+        if not self.enabled:
+            return await func(*args, **kwargs)
+        if lane not in self._queues:
+            raise ValueError(f"Unknown scheduler lane: {lane!r}")
+        job = Job(lane, bucket, func, args, kwargs, asyncio.get_running_loop().create_future())
+        self._queues[lane].append(job)
+        self._pump()
+        return await job.future
+
+    def _pump(self):
+        """Start every waiting call that has a free slot and bucket"""
+        now = time.monotonic()
+        wake = None
+        for lane in LANES:
+            queue = self._queues[lane]
+            skipped = deque()
+            # Lower lanes leave `reserved` slots free unless interaction responses already hold them
+            capacity = self.concurrency
+            if lane != LANES[0]:
+                capacity -= max(0, self.reserved - self._running[LANES[0]])
+            while queue and self._total < capacity and self._running[lane] < self.limits[lane]:
+                job = queue.popleft()
+                if job.future.done():
+                    # The caller was cancelled while waiting
+                    continue
+                if job.bucket is not None:
+                    if job.bucket in self._busy:
+                        skipped.append(job)
+                        continue
+                    until = self._blocked.get(job.bucket)
+                    if until is not None:
+                        if until > now:
+                            wake = until if wake is None else min(wake, until)
+                            skipped.append(job)
+                            continue
+                        del self._blocked[job.bucket]
+                self._start(job, now)
+            # Skipped calls were queued first, so they stay in front
+            skipped.extend(queue)
+            self._queues[lane] = skipped
+        if wake is not None and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(wake - now, self._wake)
+
+    def _wake(self):
+        self._timer = None
+        self._pump()
+
+    def _start(self, job: Job, now: float):
+        self._running[job.lane] += 1
+        self._total += 1
+        if job.bucket is not None:
+            self._busy.add(job.bucket)
+        wait = now - job.queued
+        self.started[job.lane] += 1
+        self.waited[job.lane] += wait
+        self.max_wait[job.lane] = max(self.max_wait[job.lane], wait)
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Job):
+        try:
+            job.attempts += 1
+            result = await job.func(*job.args, **job.kwargs)
+        except discord.HTTPException as e:
+            if e.status == 429 and job.bucket is not None and job.attempts < self.max_attempts:
+                # The library already retried it; give the bucket a rest and try again
+                self.rate_limited += 1
+                self._blocked[job.bucket] = time.monotonic() + self.rate_limit_backoff
+                job.queued = time.monotonic()
+                self._queues[job.lane].appendleft(job)
+            elif not job.future.done():
+                job.future.set_exception(e)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.completed[job.lane] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._running[job.lane] -= 1
+            self._total -= 1
+            self._busy.discard(job.bucket)
+            self._pump()
+
+    def stats(self) -> dict:
+        """Queue depth, running calls and wait times per lane"""
+        stats = {
+            lane: {
+                "queued": len(self._queues[lane]),
+                "running": self._running[lane],
+                "completed": self.completed[lane],
+                "avg_wait": self.waited[lane] / self.started[lane] if self.started[lane] else 0.0,
+                "max_wait": self.max_wait[lane]
+            }
+            for lane in LANES
+        }
+        stats["rate_limited"] = self.rate_limited
+        stats["blocked_buckets"] = len(self._blocked)
+        return stats
+
+scheduler = Scheduler.from_config()
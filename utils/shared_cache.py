@@ -0,0 +1,236 @@
+import os
+import mmap
+import time
+import struct
+import threading
+import contextlib
+from rich import print
+from utils.storage import GuildSettings
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX; the shared cache is unavailable
+    fcntl = None
+
+MAGIC = b"DCBSHC01"
+HEADER_SIZE = 64
+# magic, slot layout, capacity, then one change counter per kind
+_HEADER = struct.Struct("<8sQQ")
+_COUNTER = struct.Struct("<Q")
+COUNTERS = {"guilds": 24, "prefixes": 32, "noprefix": 40}
+# seqlock counter, kind << 24 | settings flags, guild ID, then GuildSettings.IDS (0 means None)
+_SLOT = struct.Struct(f"<IIQ{len(GuildSettings.IDS)}Q")
+_SEQ = struct.Struct("<I")
+SLOT_LAYOUT = _SLOT.size
+
+# Slot kinds; a guild ID of 0 marks a never used slot
+STALE = 0    # Known guild, value must be reloaded from the engine
+ABSENT = 1   # Guild has no stored settings
+PRESENT = 2
+EXTRA = 3    # Settings with keys a slot can't hold; each process keeps its own copy for the slot's seq
+
+_MISSING = object()
+# Reads of a slot that stays mid-write this long come from a writer that died; treat it as stale
+_MAX_SPINS = 1000
+# Slots looked at per lookup; a guild whose run of slots is taken this far is not shared
+MAX_PROBE = 32
+
+class SharedGuilds:
+    """
+    Dict-like guild settings table living in the shared memory map
+
+    An open-addressing hash table of fixed-size slots. Readers never lock:
+    every slot carries a seqlock counter that writers make odd while they
+    write, and readers retry when it changed under them. Writers serialize
+    on an exclusive `flock` of the backing file. A slot is never emptied, so
+    probe chains stay valid; dropping a guild marks its slot stale, and a
+    new guild may take over a stale slot. Lookups probe at most `MAX_PROBE`
+    slots, so even a full table costs a bounded number of reads.
+    """
+
+    def __init__(self, cache: "SharedCache"):
+        self._cache = cache
+        # guild ID -> (slot seq, GuildSettings) for EXTRA slots
+        self._local = {}
+
+    def _read(self, index: int):
+        mm, offset = self._cache._mm, HEADER_SIZE + index * _SLOT.size
+        for _ in range(_MAX_SPINS):
+            slot = _SLOT.unpack_from(mm, offset)
+            if slot[0] & 1 == 0 and _SEQ.unpack_from(mm, offset)[0] == slot[0]:
+                return slot
+            time.sleep(0)
+        return (slot[0], STALE << 24) + slot[2:]
+
+    def _find(self, guild_id: int):
+        """Slot index and contents for `guild_id`, or the free or stale slot it would go in"""
+        capacity = self._cache.capacity
+        index = (guild_id * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF) % capacity
+        free = None
+        for _ in range(min(capacity, MAX_PROBE)):
+            slot = self._read(index)
+            if slot[2] == guild_id:
+                return index, slot
+            if slot[2] == 0:
+                # End of the chain: the guild isn't further along
+                return free or (index, slot)
+            if free is None and slot[1] >> 24 == STALE:
+                free = index, slot
+            index = (index + 1) % capacity
+        return free or (None, None)
+
+    def get(self, guild_id: int, default=None):
+        _, slot = self._find(guild_id)
+        if slot is None or slot[2] != guild_id:
+            return default
+        kind = slot[1] >> 24
+        if kind == PRESENT:
+            return GuildSettings.from_packed(slot[1] & 0xFFFFFF, slot[3:])
+        if kind == EXTRA:
+            # Valid only while no process has written the slot since
+            local = self._local.get(guild_id)
+            return local[1] if local is not None and local[0] == slot[0] else default
+        return None if kind == ABSENT else default
+
+    def __contains__(self, guild_id: int):
+        return self.get(guild_id, _MISSING) is not _MISSING
+
+    def __getitem__(self, guild_id: int):
+        value = self.get(guild_id, _MISSING)
+        if value is _MISSING:
+            raise KeyError(guild_id)
+        return value
+
+    def __setitem__(self, guild_id: int, value: GuildSettings):
+        self._write(guild_id, value)
+
+    def setdefault(self, guild_id: int, value: GuildSettings):
+        """Store `value` unless another process stored one first; return what is stored"""
+        return self._write(guild_id, value, keep_existing=True)
+
+    def pop(self, guild_id: int, default=None):
+        """Forget a guild's cached value (every process reloads it on next use)"""
+        value = self.get(guild_id, default)
+        self._write(guild_id, _MISSING)
+        return value
+
+    def _write(self, guild_id: int, value, keep_existing: bool = False):
+        if value is _MISSING:
+            kind, flags, ids = STALE, 0, (0,) * len(GuildSettings.IDS)
+        elif value is not None and value._extra:
+            # Settings with keys GuildSettings doesn't know can't be packed; other processes go to the engine
+            kind, flags, ids = EXTRA, 0, (0,) * len(GuildSettings.IDS)
+        elif value is None:
+            kind, flags, ids = ABSENT, 0, (0,) * len(GuildSettings.IDS)
+        else:
+            kind, flags, ids = PRESENT, value.flags, tuple(getattr(value, key) or 0 for key in GuildSettings.IDS)
+        cache = self._cache
+        with cache.write_lock():
+            index, slot = self._find(guild_id)
+            if index is None:
+                # No free slot within reach: keep working without sharing this guild
+                return None if value is _MISSING else value
+            if value is _MISSING and slot[2] != guild_id:
+                # Nothing shared to forget
+                return None
+            if keep_existing and slot[2] == guild_id and slot[1] >> 24 == EXTRA and kind == EXTRA:
+                # Just loaded from the engine: keep a local copy without invalidating everyone else's
+                self._local[guild_id] = (slot[0], value)
+                return value
+            if keep_existing and slot[2] == guild_id and slot[1] >> 24 not in (STALE, EXTRA):
+                return self.get(guild_id)
+            offset = HEADER_SIZE + index * _SLOT.size
+            seq = slot[0] + (slot[0] & 1)
+            _SEQ.pack_into(cache._mm, offset, seq + 1)
+            _SLOT.pack_into(cache._mm, offset, seq + 1, kind << 24 | flags, guild_id, *ids)
+            _SEQ.pack_into(cache._mm, offset, seq + 2)
+            cache._bump("guilds")
+            if kind == EXTRA:
+                self._local[guild_id] = (seq + 2, value)
+            else:
+                self._local.pop(guild_id, None)
+        return None if value is _MISSING else value
+
+class SharedCache:
+    """
+    Settings cache shared by every bot process on one host
+
+    Guild settings live in a memory-mapped file (`SharedGuilds`), so a write
+    from one process is visible to the others on their next lookup, with no
+    IPC per lookup. Prefixes and no-prefix users are small whole maps: each
+    has a change counter in the file header that writers bump after flushing
+    to the engine. A poll thread checks the counters every `poll_interval`
+    seconds and calls the subscribers of the kinds another process changed,
+    which bounds how stale those maps can be to flush interval plus poll
+    interval. The config file is already shared through its mtime check.
+    """
+
+    def __init__(self, path: str = "./data/shared-cache.bin", capacity: int = 262144, poll_interval: float = 0.5):
+        if fcntl is None:
+            raise RuntimeError("The shared settings cache needs a POSIX system (fcntl)")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.Lock()
+        with self.write_lock():
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size and _HEADER.unpack(header)[:2] == (MAGIC, SLOT_LAYOUT):
+                capacity = _HEADER.unpack(header)[2]
+            else:
+                # New (or incompatible) file: start with an empty table
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, HEADER_SIZE + capacity * _SLOT.size)
+                os.pwrite(self._fd, _HEADER.pack(MAGIC, SLOT_LAYOUT, capacity), 0)
+        self.capacity = capacity
+        self._mm = mmap.mmap(self._fd, HEADER_SIZE + capacity * _SLOT.size)
+        self.guilds = SharedGuilds(self)
+        self._seen = {kind: self.counter(kind) for kind in COUNTERS}
+        self._subscribers = {kind: [] for kind in COUNTERS}
+        self._thread = threading.Thread(target=self._poll, name="shared-cache-poll", daemon=True)
+        self._thread.start()
+
+    @contextlib.contextmanager
+    def write_lock(self):
+        """Exclusive across threads and processes"""
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def counter(self, kind: str) -> int:
+        return _COUNTER.unpack_from(self._mm, COUNTERS[kind])[0]
+
+    def _bump(self, kind: str) -> int:
+        # Caller holds the write lock
+        value = self.counter(kind) + 1
+        _COUNTER.pack_into(self._mm, COUNTERS[kind], value)
+        return value
+
+    def bump(self, kind: str):
+        """Tell the other processes that `kind` changed in the engine"""
+        with self.write_lock():
+            self._seen[kind] = self._bump(kind)
+
+    def subscribe(self, kind: str, callback):
+        """Call `callback()` (on the poll thread) when another process bumps `kind`"""
+        self._subscribers[kind].append(callback)
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            for kind, callbacks in self._subscribers.items():
+                value = self.counter(kind)
+                if value == self._seen[kind]:
+                    continue
+                self._seen[kind] = value
+                for callback in callbacks:
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"[red][bold]✗[/] Shared cache refresh of {kind} failed: {e}[/]")
+
+    def stats(self) -> dict:
+        return {"capacity": self.capacity, **{kind: self.counter(kind) for kind in COUNTERS}}
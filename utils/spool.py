@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import asyncio
+from collections import deque, OrderedDict
+from rich import print
+
+class _Channel:
+    """A channel's records waiting for delivery, oldest first"""
+
+    __slots__ = ("queue", "task", "down")
+
+    def __init__(self):
+        self.queue = deque()
+        self.task = None
+        # Set once a record used up its retries, until a delivery gets through
+        self.down = False
+
+class Spool:
+    """
+    Append-only on-disk queue of outbound deliveries
+
+    Records are JSON lines in numbered segment files of about
+    `segment_bytes` each. `append` only writes to the newest segment and
+    returns. A background reader hands records to one queue per channel, and
+    each channel delivers its own records in order through
+    `deliver(channel_id, payload)`, so a failing channel never holds up the
+    others. `deliver` returns True once delivered, False if the record can
+    never be delivered (the channel is gone) and it is dropped, and raises
+    to have it retried with exponential backoff. A record that fails
+    `max_retries` times is dropped and its channel counts as down: later
+    records get one attempt each until one gets through.
+
+    The checkpoint is the oldest record not delivered yet, saved every
+    `checkpoint_every` deliveries and on `checkpoint()`, so after a restart
+    delivery resumes there (a record may be delivered twice, never
+    skipped). Segments before it are deleted. At most `max_pending` records
+    are read ahead, and new records are refused while the spool holds
+    `max_bytes`.
+    """
+
+    def __init__(self, path: str, deliver, segment_bytes: int = 1048576, max_bytes: int = 67108864,
+                 checkpoint_every: int = 20, max_retries: int = 8, max_backoff: float = 300.0, max_pending: int = 1000):
+        self.path = path
+        self.deliver = deliver
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.checkpoint_every = checkpoint_every
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.max_pending = max_pending
+        self.checkpoint_path = os.path.join(path, "checkpoint.json")
+        self.appended = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.retries = 0
+        self.task = None
+        os.makedirs(path, exist_ok=True)
+
+        checkpoint = self._read_checkpoint()
+        segments = self._segments()
+        self._read_segment = checkpoint.get("segment", segments[0] if segments else 0)
+        # Nothing left on disk means nothing left to resume
+        self._read_offset = checkpoint.get("offset", 0) if segments else 0
+        self._first_segment = segments[0] if segments else self._read_segment
+        # Always write to a fresh segment, so a record torn by a crash is never extended
+        self._write_segment = max(segments, default=self._read_segment - 1) + 1
+        self._writer = None
+        self._size = sum(os.path.getsize(self._segment_path(segment)) for segment in segments)
+        # (segment, offset) of every record read, in file order -> its append time, or None once delivered
+        self._pending = OrderedDict()
+        self._channels = {}
+        self._since_checkpoint = 0
+        self._wakeup = None
+        self._room = None
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"{segment:08d}.log")
+
+    def _segments(self) -> list:
+        return sorted(int(name[:-4]) for name in os.listdir(self.path) if name.endswith(".log") and name[:-4].isdigit())
+
+    def _read_checkpoint(self) -> dict:
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _position(self) -> tuple:
+        """Where delivery resumes: the oldest record not delivered yet"""
+        return next(iter(self._pending), (self._read_segment, self._read_offset))
+
+    def checkpoint(self):
+        """Persist the delivery position and delete the segments before it"""
+        segment, offset = self._position()
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"segment": segment, "offset": offset}, f)
+        os.replace(temp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+        while self._first_segment < segment:
+            path = self._segment_path(self._first_segment)
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+                os.remove(path)
+            self._first_segment += 1
+
+    def start(self) -> asyncio.Task:
+        """Start draining in the background (once)"""
+        if self.task is None:
+            self._wakeup = asyncio.Event()
+            self._room = asyncio.Event()
+            self.task = asyncio.create_task(self._drain())
+        return self.task
+
+    async def close(self):
+        """Stop delivering and persist the position; undelivered records stay for the next start"""
+        tasks = [channel.task for channel in self._channels.values() if channel.task is not None]
+        if self.task is not None:
+            tasks.append(self.task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+        self._channels.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._write_segment += 1
+        self.checkpoint()
+        # Read again from the checkpoint if started again
+        self._read_segment, self._read_offset = self._position()
+        self._pending.clear()
+
+    def append(self, channel_id: int, payload: dict) -> bool:
+        """Queue a delivery; False if the spool is full"""
+        line = (json.dumps({"channel": channel_id, "time": time.time(), "payload": payload}, separators=(",", ":")) + "\n").encode()
+        if self._size + len(line) > self.max_bytes:
+            self.rejected += 1
+            return False
+        if self._writer is None or self._writer.tell() >= self.segment_bytes:
+            if self._writer is not None:
+                self._writer.close()
+                self._write_segment += 1
+            self._writer = open(self._segment_path(self._write_segment), "ab")
+        self._writer.write(line)
+        # Out of our buffer and into the OS, which keeps it if the process dies
+        self._writer.flush()
+        self._size += len(line)
+        self.appended += 1
+        self.start()
+        self._wakeup.set()
+        return True
+
+    def _next_record(self):
+        """Read the next record; None when caught up with the writer"""
+        while True:
+            try:
+                with open(self._segment_path(self._read_segment), "rb") as f:
+                    f.seek(self._read_offset)
+                    line = f.readline()
+            except FileNotFoundError:
+                line = b""
+            if line.endswith(b"\n"):
+                return line
+            if self._read_segment >= self._write_segment:
+                return None
+            # Older segment done (a torn last record is skipped)
+            self._read_segment += 1
+            self._read_offset = 0
+
+    async def _drain(self):
+        """Hand records to their channel's queue"""
+        while True:
+            if len(self._pending) >= self.max_pending:
+                self._room.clear()
+                await self._room.wait()
+                continue
+            line = self._next_record()
+            if line is None:
+                if self._since_checkpoint:
+                    self.checkpoint()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            position = (self._read_segment, self._read_offset)
+            self._read_offset += len(line)
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self._pending[position] = record["time"]
+            channel = self._channels.get(record["channel"])
+            if channel is None:
+                channel = self._channels[record["channel"]] = _Channel()
+            channel.queue.append((position, record))
+            if channel.task is None:
+                channel.task = asyncio.create_task(self._run_channel(record["channel"], channel))
+
+    async def _run_channel(self, channel_id: int, channel: _Channel):
+        while channel.queue:
+            position, record = channel.queue[0]
+            await self._deliver(channel, record)
+            channel.queue.popleft()
+            self._done(position)
+        channel.task = None
+        if not channel.down:
+            del self._channels[channel_id]
+
+    async def _deliver(self, channel: _Channel, record: dict):
+        attempts = 1 if channel.down else self.max_retries + 1
+        for attempt in range(attempts):
+            try:
+                delivered = await self.deliver(record["channel"], record["payload"])
+            except Exception as e:
+                if attempt + 1 == attempts:
+                    if not channel.down:
+                        print(f"[red][bold]✗[/] Log channel {record['channel']} unreachable, dropping its logs until it recovers: {e}[/]")
+                    channel.down = True
+                    self.dropped += 1
+                    return
+                self.retries += 1
+                await asyncio.sleep(min(self.max_backoff, 2 ** attempt))
+            else:
+                channel.down = False
+                if delivered:
+                    self.delivered += 1
+                else:
+                    self.dropped += 1
+                return
+
+    def _done(self, position: tuple):
+        self._pending[position] = None
+        while self._pending and next(iter(self._pending.values())) is None:
+            self._pending.popitem(last=False)
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+        self._room.set()
+
+    def stats(self) -> dict:
+        """Backlog and delivery counters"""
+        segment, offset = self._position()
+        oldest = next(iter(self._pending.values()), None)
+        return {
+            "backlog_bytes": max(0, self._size - (offset if segment == self._first_segment else 0)),
+            "segments": self._write_segment - self._first_segment + 1,
+            "pending": len(self._pending),
+            "oldest_pending_s": time.time() - oldest if oldest else 0.0,
+            "channels_waiting": sum(1 for channel in self._channels.values() if channel.queue),
+            "channels_down": sum(1 for channel in self._channels.values() if channel.down),
+            "appended": self.appended,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "retries": self.retries
+        }
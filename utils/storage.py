@@ -0,0 +1,627 @@
+import os
+import json
+import sqlite3
+import threading
+import contextlib
+import atexit
+import asyncio
+import warnings
+from rich import print
+
+_MISSING = object()
+
+# Settings every guild starts with
+DEFAULT_GUILD_CONFIG = {
+    "mod_log_ch": None,
+    "mod_cmd_log_ch": None,
+    "msg_log_ch": None,
+    "ticket_cmds": True,
+    "ticket_log_ch": None,
+    "autorole": None,
+}
+
+class GuildSettings:
+    """
+    Compact in-memory form of one guild's settings (treat as immutable)
+
+    Channel and role IDs are plain ints, and on/off toggles share a single
+    `flags` int. `from_dict`/`to_dict` convert from and to the stored JSON
+    schema; keys this class does not know are kept aside so they survive a
+    round trip.
+    """
+
+    IDS = ("mod_log_ch", "mod_cmd_log_ch", "msg_log_ch", "ticket_log_ch", "autorole")
+    FLAGS = {"ticket_cmds": 1 << 0}
+    FIELDS = tuple(DEFAULT_GUILD_CONFIG)
+    DEFAULT_FLAGS = sum(bit for key, bit in FLAGS.items() if DEFAULT_GUILD_CONFIG[key])
+
+    __slots__ = IDS + ("flags", "_extra")
+
+    def __init__(self, flags: int = DEFAULT_FLAGS, extra: dict = None, **ids):
+        for key in self.IDS:
+            value = ids.pop(key, None)
+            object.__setattr__(self, key, None if value is None else int(value))
+        if ids:
+            raise KeyError(f"Unknown guild setting(s): {', '.join(sorted(ids))}")
+        object.__setattr__(self, "flags", flags)
+        object.__setattr__(self, "_extra", extra or None)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("GuildSettings is immutable; use replace()")
+
+    @property
+    def ticket_cmds(self) -> bool:
+        return bool(self.flags & self.FLAGS["ticket_cmds"])
+
+    def __eq__(self, other):
+        if not isinstance(other, GuildSettings):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"GuildSettings({', '.join(f'{key}={self.get(key)!r}' for key in self.FIELDS)})"
+
+    @classmethod
+    def from_dict(cls, data: dict = None) -> "GuildSettings":
+        """Build from a stored settings dict (None means defaults)"""
+        if not data:
+            return cls()
+        flags = cls.DEFAULT_FLAGS
+        for key, bit in cls.FLAGS.items():
+            if key in data:
+                flags = flags | bit if data[key] else flags & ~bit
+        ids = {key: data[key] for key in cls.IDS if key in data}
+        extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+        return cls(flags, extra, **ids)
+
+    @classmethod
+    def from_packed(cls, flags: int, ids: tuple) -> "GuildSettings":
+        """Build from `flags` and the IDs in `IDS` order (0 means None), e.g. from shared memory"""
+        self = object.__new__(cls)
+        for key, value in zip(cls.IDS, ids):
+            object.__setattr__(self, key, value or None)
+        object.__setattr__(self, "flags", flags)
+        object.__setattr__(self, "_extra", None)
+        return self
+
+    def to_dict(self) -> dict:
+        """Settings in the stored JSON schema"""
+        data = {key: self.get(key) for key in self.FIELDS}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def get(self, key: str, default=None):
+        """Dict-style read of one setting"""
+        if key in self.FLAGS:
+            return bool(self.flags & self.FLAGS[key])
+        if key in self.IDS:
+            return getattr(self, key)
+        return self._extra.get(key, default) if self._extra else default
+
+    def replace(self, **changes) -> "GuildSettings":
+        """Copy with some settings changed"""
+        data = self.to_dict()
+        data.update(changes)
+        return GuildSettings.from_dict(data)
+
+DEFAULT_GUILD_SETTINGS = GuildSettings()
+
+# -------------------- JSON ENGINE --------------------
+
+class JSONBackend:
+    """
+    Legacy file layout
+
+    One `database/<guild_id>.json` file per guild plus `data/prefixes.json`
+    and `data/noprefix.json`.
+    """
+
+    name = "json"
+
+    def __init__(self, database_dir: str = "./database", data_dir: str = "./data"):
+        self.database_dir = database_dir
+        self.data_dir = data_dir
+        self.prefixes_path = os.path.join(data_dir, "prefixes.json")
+        self.noprefix_path = os.path.join(data_dir, "noprefix.json")
+        os.makedirs(database_dir, exist_ok=True)
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _guild_path(self, guild_id):
+        return os.path.join(self.database_dir, f"{int(guild_id)}.json")
+
+    def _read(self, path, default):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return default
+
+    def _write(self, path, data):
+        # Write to a temp file and rename over the target so a crash never leaves a torn file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_path, path)
+
+    # Guild settings
+    def load_guild(self, guild_id):
+        return self._read(self._guild_path(guild_id), None)
+
+    def save_guild(self, guild_id, data: dict):
+        self._write(self._guild_path(guild_id), data)
+
+    def delete_guild(self, guild_id):
+        try:
+            os.remove(self._guild_path(guild_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def guild_ids(self):
+        with os.scandir(self.database_dir) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if ext == ".json" and name.isdigit():
+                    yield int(name)
+
+    # Prefixes
+    def load_prefixes(self) -> dict:
+        return self._read(self.prefixes_path, {})
+
+    def save_prefix(self, guild_id, prefix):
+        prefixes = self.load_prefixes()
+        prefixes[str(guild_id)] = prefix
+        self._write(self.prefixes_path, prefixes)
+
+    def delete_prefix(self, guild_id):
+        prefixes = self.load_prefixes()
+        if prefixes.pop(str(guild_id), None) is None:
+            return False
+        self._write(self.prefixes_path, prefixes)
+        return True
+
+    # No-prefix users
+    def load_noprefix(self) -> list:
+        return self._read(self.noprefix_path, {"users": []}).get("users", [])
+
+    def save_noprefix(self, users: list):
+        self._write(self.noprefix_path, {"users": list(users)})
+
+    def apply(self, guilds: dict, prefixes: dict, noprefix: list = None):
+        """Write a batch of changes; a value of None deletes that guild/prefix"""
+        for guild_id, data in guilds.items():
+            if data is None:
+                self.delete_guild(guild_id)
+            else:
+                self.save_guild(guild_id, data)
+        if prefixes:
+            current = self.load_prefixes()
+            for guild_id, prefix in prefixes.items():
+                if prefix is None:
+                    current.pop(str(guild_id), None)
+                else:
+                    current[str(guild_id)] = prefix
+            self._write(self.prefixes_path, current)
+        if noprefix is not None:
+            self.save_noprefix(noprefix)
+
+    def close(self):
+        pass
+
+# -------------------- SQLITE ENGINE --------------------
+
+class SQLiteBackend:
+    """
+    Single-file SQLite engine
+
+    Runs in WAL mode so readers never block the writer. All statements are
+    module constants with bound parameters, so sqlite3's statement cache
+    prepares each one once per connection. Prefix values are stored JSON
+    encoded so a guild can keep either one prefix or a list of them.
+    """
+
+    name = "sqlite"
+    SCHEMA_VERSION = 1
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS guilds (guild_id INTEGER PRIMARY KEY, data TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS prefixes (guild_id INTEGER PRIMARY KEY, prefix TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS noprefix (user_id INTEGER PRIMARY KEY)",
+    )
+    GET_GUILD = "SELECT data FROM guilds WHERE guild_id = ?"
+    SET_GUILD = "INSERT INTO guilds (guild_id, data) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data"
+    DELETE_GUILD = "DELETE FROM guilds WHERE guild_id = ?"
+    GUILD_IDS = "SELECT guild_id FROM guilds"
+    GET_PREFIXES = "SELECT guild_id, prefix FROM prefixes"
+    SET_PREFIX = "INSERT INTO prefixes (guild_id, prefix) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET prefix = excluded.prefix"
+    DELETE_PREFIX = "DELETE FROM prefixes WHERE guild_id = ?"
+    GET_NOPREFIX = "SELECT user_id FROM noprefix"
+    CLEAR_NOPREFIX = "DELETE FROM noprefix"
+    ADD_NOPREFIX = "INSERT OR IGNORE INTO noprefix (user_id) VALUES (?)"
+
+    def __init__(self, path: str = "./data/bot.db"):
+        self.path = path
+        self.created = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            self._upgrade(self._conn.execute("PRAGMA user_version").fetchone()[0])
+
+    def _upgrade(self, version):
+        if version < 1:
+            # v1: prefixes hold JSON so several prefixes per guild fit in one row
+            with self.transaction():
+                rows = self._conn.execute(self.GET_PREFIXES).fetchall()
+                self._conn.executemany(self.SET_PREFIX, ((guild_id, json.dumps(prefix)) for guild_id, prefix in rows))
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def transaction(self):
+        """Context manager grouping several writes into one commit"""
+        return _Transaction(self)
+
+    # Guild settings
+    def load_guild(self, guild_id):
+        rows = self._execute(self.GET_GUILD, (int(guild_id),))
+        return json.loads(rows[0][0]) if rows else None
+
+    def save_guild(self, guild_id, data: dict):
+        self._execute(self.SET_GUILD, (int(guild_id), json.dumps(data)))
+
+    def delete_guild(self, guild_id):
+        with self._lock:
+            return self._conn.execute(self.DELETE_GUILD, (int(guild_id),)).rowcount > 0
+
+    def guild_ids(self):
+        for (guild_id,) in self._execute(self.GUILD_IDS):
+            yield guild_id
+
+    # Prefixes
+    def load_prefixes(self) -> dict:
+        return {str(guild_id): json.loads(prefix) for guild_id, prefix in self._execute(self.GET_PREFIXES)}
+
+    def save_prefix(self, guild_id, prefix):
+        self._execute(self.SET_PREFIX, (int(guild_id), json.dumps(prefix)))
+
+    def delete_prefix(self, guild_id):
+        with self._lock:
+            return self._conn.execute(self.DELETE_PREFIX, (int(guild_id),)).rowcount > 0
+
+    # No-prefix users
+    def load_noprefix(self) -> list:
+        return [user_id for (user_id,) in self._execute(self.GET_NOPREFIX)]
+
+    def save_noprefix(self, users: list):
+        with self.transaction():
+            self._conn.execute(self.CLEAR_NOPREFIX)
+            self._conn.executemany(self.ADD_NOPREFIX, ((int(user_id),) for user_id in users))
+
+    def apply(self, guilds: dict, prefixes: dict, noprefix: list = None):
+        """Write a batch of changes in one transaction; a value of None deletes that guild/prefix"""
+        with self.transaction():
+            for guild_id, data in guilds.items():
+                if data is None:
+                    self._conn.execute(self.DELETE_GUILD, (int(guild_id),))
+                else:
+                    self._conn.execute(self.SET_GUILD, (int(guild_id), json.dumps(data)))
+            for guild_id, prefix in prefixes.items():
+                if prefix is None:
+                    self._conn.execute(self.DELETE_PREFIX, (int(guild_id),))
+                else:
+                    self._conn.execute(self.SET_PREFIX, (int(guild_id), json.dumps(prefix)))
+            if noprefix is not None:
+                self._conn.execute(self.CLEAR_NOPREFIX)
+                self._conn.executemany(self.ADD_NOPREFIX, ((int(user_id),) for user_id in noprefix))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class _Transaction:
+    def __init__(self, backend: SQLiteBackend):
+        self.backend = backend
+
+    def __enter__(self):
+        self.backend._lock.acquire()
+        self.backend._conn.execute("BEGIN")
+        return self.backend
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.backend._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.backend._lock.release()
+
+# -------------------- WRITE-BEHIND --------------------
+
+class WriteBehind:
+    """
+    In-memory view of a storage engine with coalesced background writes
+
+    Reads and writes hit memory. Writes mark their key dirty; a daemon thread
+    flushes every `interval` seconds, or as soon as `max_dirty` keys are
+    pending, writing only the latest value of each key in one batch. Call
+    `flush()` before the process exits or execs.
+
+    With a `shared` cache (utils.shared_cache) guild settings are kept in
+    memory shared with other bot processes instead of a private dict, and
+    prefix/no-prefix changes made by other processes are reloaded.
+    """
+
+    def __init__(self, backend, interval: float = 2.0, max_dirty: int = 100, debug: bool = False, shared=None):
+        self.backend = backend
+        self.debug = debug
+        self.interval = interval
+        self.max_dirty = max_dirty
+        self.shared = shared
+        self.flushes = 0
+        self.coalesced = 0
+        self._guilds = {} if shared is None else shared.guilds
+        self._prefixes = None
+        self._noprefix = None
+        self._dirty_guilds = {}
+        self._dirty_prefixes = {}
+        self._dirty_noprefix = False
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="storage-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+        if shared is not None:
+            shared.subscribe("prefixes", self._reload_prefixes)
+            shared.subscribe("noprefix", self._reload_noprefix)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[red][bold]✗[/] Storage flush failed: {e}[/]")
+
+    def _mark(self, dirty: dict, key, value):
+        if key in dirty:
+            self.coalesced += 1
+        dirty[key] = value
+        if self.pending() >= self.max_dirty:
+            self._wake.set()
+
+    def pending(self) -> int:
+        """Number of keys waiting to be written"""
+        return len(self._dirty_guilds) + len(self._dirty_prefixes) + int(self._dirty_noprefix)
+
+    def _check_blocking(self, what):
+        # Debug mode: flag engine reads made straight from a running event loop
+        if not self.debug:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        warnings.warn(f"Blocking storage read ({what}) on the event loop thread; use utils.async_storage instead", stacklevel=4)
+
+    # Guild settings
+    def cached_guild(self, guild_id, default=None):
+        """Get a guild's settings only if they are already in memory"""
+        return self._guilds.get(int(guild_id), default)
+
+    def guild(self, guild_id) -> GuildSettings:
+        """Get the stored settings of a guild, or None"""
+        guild_id = int(guild_id)
+        cached = self._guilds.get(guild_id, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        self._check_blocking(f"guild {guild_id}")
+        # Read outside the lock so a slow disk only stalls this caller
+        loaded = self.backend.load_guild(guild_id)
+        loaded = None if loaded is None else GuildSettings.from_dict(loaded)
+        with self._lock:
+            return self._guilds.setdefault(guild_id, loaded)
+
+    def set_guild(self, guild_id, data):
+        """Replace a guild's settings (a GuildSettings or a settings dict)"""
+        guild_id = int(guild_id)
+        if not isinstance(data, GuildSettings):
+            data = GuildSettings.from_dict(data)
+        with self._lock:
+            self._guilds[guild_id] = data
+            self._mark(self._dirty_guilds, guild_id, data)
+
+    def delete_guild(self, guild_id):
+        guild_id = int(guild_id)
+        with self._lock:
+            self._guilds[guild_id] = None
+            self._mark(self._dirty_guilds, guild_id, None)
+
+    def guild_ids(self):
+        """Stored guild IDs, including unflushed ones"""
+        with self._lock:
+            pending = dict(self._dirty_guilds)
+        for guild_id in self.backend.guild_ids():
+            if pending.pop(guild_id, True) is not None:
+                yield guild_id
+        for guild_id, data in pending.items():
+            if data is not None:
+                yield guild_id
+
+    # Prefixes
+    def prefixes(self) -> dict:
+        """Guild ID (str) to prefix map (treat as read-only)"""
+        if self._prefixes is None:
+            self._check_blocking("prefixes")
+            loaded = self.backend.load_prefixes()
+            with self._lock:
+                if self._prefixes is None:
+                    self._prefixes = loaded
+        return self._prefixes
+
+    def _reload_prefixes(self):
+        # Another process changed prefixes; keep our own unflushed changes on top
+        loaded = self.backend.load_prefixes()
+        with self._lock:
+            for guild_id, prefix in self._dirty_prefixes.items():
+                if prefix is None:
+                    loaded.pop(guild_id, None)
+                else:
+                    loaded[guild_id] = prefix
+            self._prefixes = loaded
+
+    def set_prefix(self, guild_id, prefix):
+        with self._lock:
+            self.prefixes()[str(guild_id)] = prefix
+            self._mark(self._dirty_prefixes, str(guild_id), prefix)
+
+    def delete_prefix(self, guild_id):
+        with self._lock:
+            if self.prefixes().pop(str(guild_id), None) is None:
+                return False
+            self._mark(self._dirty_prefixes, str(guild_id), None)
+            return True
+
+    # No-prefix users
+    def noprefix(self) -> list:
+        """No-prefix user IDs (treat as read-only)"""
+        if self._noprefix is None:
+            self._check_blocking("no-prefix users")
+            loaded = list(self.backend.load_noprefix())
+            with self._lock:
+                if self._noprefix is None:
+                    self._noprefix = loaded
+        return self._noprefix
+
+    def _reload_noprefix(self):
+        loaded = list(self.backend.load_noprefix())
+        with self._lock:
+            if not self._dirty_noprefix:
+                self._noprefix = loaded
+
+    def set_noprefix(self, users: list):
+        with self._lock:
+            self._noprefix = list(users)
+            if self._dirty_noprefix:
+                self.coalesced += 1
+            self._dirty_noprefix = True
+            if self.pending() >= self.max_dirty:
+                self._wake.set()
+
+    def flush(self):
+        """Write every pending change to the engine"""
+        with self._flush_lock:
+            with self._lock:
+                if not self.pending():
+                    return
+                guilds, self._dirty_guilds = self._dirty_guilds, {}
+                prefixes, self._dirty_prefixes = self._dirty_prefixes, {}
+                noprefix = list(self._noprefix) if self._dirty_noprefix else None
+                self._dirty_noprefix = False
+            try:
+                self.backend.apply({guild_id: None if data is None else data.to_dict() for guild_id, data in guilds.items()}, prefixes, noprefix)
+            except Exception:
+                # Put the batch back unless a newer value replaced it meanwhile
+                with self._lock:
+                    for guild_id, data in guilds.items():
+                        self._dirty_guilds.setdefault(guild_id, data)
+                    for guild_id, prefix in prefixes.items():
+                        self._dirty_prefixes.setdefault(guild_id, prefix)
+                    self._dirty_noprefix = self._dirty_noprefix or noprefix is not None
+                raise
+            self.flushes += 1
+            if self.shared is not None:
+                # Let other processes reload what is now on disk
+                if prefixes:
+                    self.shared.bump("prefixes")
+                if noprefix is not None:
+                    self.shared.bump("noprefix")
+
+    def write_through(self, guilds: dict, prefixes: dict):
+        """
+        Write a large batch straight to the engine without caching it
+
+        Pending changes are flushed first so the batch wins. Cached copies of
+        the written guilds are dropped and reloaded on next use.
+        """
+        self.flush()
+        self.backend.apply(guilds, prefixes)
+        with self._lock:
+            for guild_id in guilds:
+                self._guilds.pop(int(guild_id), None)
+            if self._prefixes is not None:
+                for guild_id, prefix in prefixes.items():
+                    if prefix is None:
+                        self._prefixes.pop(str(guild_id), None)
+                    else:
+                        self._prefixes[str(guild_id)] = prefix
+        if self.shared is not None and prefixes:
+            self.shared.bump("prefixes")
+
+    def stats(self) -> dict:
+        """Flush and coalescing counters"""
+        return {"pending": self.pending(), "flushes": self.flushes, "coalesced": self.coalesced}
+
+# -------------------- ENGINE SELECTION --------------------
+
+engines = {
+    "json": JSONBackend,
+    "sqlite": SQLiteBackend,
+}
+
+def open_backend(options: dict = None):
+    """
+    Open the storage engine described by the `storage` config block
+
+    A freshly created SQLite database is filled from the legacy JSON files
+    on first open.
+    """
+    options = dict(options or {})
+    engine = options.pop("engine", "sqlite")
+    if engine not in engines:
+        raise ValueError(f"Unknown storage engine: {engine}")
+    backend = engines[engine](**options)
+    if getattr(backend, "created", False):
+        migrate(JSONBackend(), backend)
+    return backend
+
+# -------------------- MIGRATION --------------------
+
+def migrate(source, target) -> dict:
+    """Copy every guild config, prefix and no-prefix user from `source` into `target`"""
+    counts = {"guilds": 0, "prefixes": 0, "noprefix": 0}
+    batch = getattr(target, "transaction", None)
+    with batch() if batch else contextlib.nullcontext():
+        for guild_id in source.guild_ids():
+            data = source.load_guild(guild_id)
+            if data is not None:
+                target.save_guild(guild_id, data)
+                counts["guilds"] += 1
+        for guild_id, prefix in source.load_prefixes().items():
+            target.save_prefix(guild_id, prefix)
+            counts["prefixes"] += 1
+    users = source.load_noprefix()
+    target.save_noprefix(users)
+    counts["noprefix"] = len(users)
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import the legacy JSON files into the SQLite engine")
+    parser.add_argument("--database-dir", default="./database")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--db", default="./data/bot.db")
+    args = parser.parse_args()
+
+    target = SQLiteBackend(args.db)
+    counts = migrate(JSONBackend(args.database_dir, args.data_dir), target)
+    target.close()
+    print(f"Migrated {counts['guilds']} guild(s), {counts['prefixes']} prefix(es) and {counts['noprefix']} no-prefix user(s) into {args.db}")
@@ -0,0 +1,77 @@
+import time
+import asyncio
+from rich import print
+from utils import database as db
+from utils.async_storage import store
+
+class WarmUp:
+    """
+    Preloads guild settings into memory after startup
+
+    Runs as a background task so commands are served while it works. Guilds
+    are loaded biggest first by `concurrency` workers, paced to at most
+    `rate` guilds per second, and progress is printed every `report_every`
+    guilds. Prefixes are a single map and are already loaded in `on_ready`.
+    """
+
+    def __init__(self, enabled: bool = False, concurrency: int = 4, rate: float = 200, report_every: int = 1000):
+        self.enabled = enabled
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.report_every = report_every
+        self.done = 0
+        self.total = 0
+        self.elapsed = None
+        self.task = None
+
+    @classmethod
+    def from_config(cls) -> "WarmUp":
+        options = db._load_config().get("warmup", {})
+        return cls(
+            options.get("enabled", False),
+            options.get("concurrency", 4),
+            options.get("rate", 200),
+            options.get("report_every", 1000)
+        )
+
+    @staticmethod
+    def order(guilds) -> list:
+        """Most active first, using member count as the activity measure"""
+        return sorted(guilds, key=lambda guild: guild.member_count or 0, reverse=True)
+
+    def start(self, guilds) -> asyncio.Task:
+        """Start warming up in the background (once; later calls return the same task)"""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(self.order(guilds)))
+        return self.task
+
+    async def run(self, guilds: list):
+        started = time.perf_counter()
+        self.total = len(guilds)
+        print(f"[yellow][bold]![/] Warming up settings of {self.total} guild{'' if self.total == 1 else 's'}[/]")
+        pending = iter(guilds)
+        interval = 1 / self.rate if self.rate else 0
+        next_slot = [time.monotonic()]
+
+        async def worker():
+            for guild in pending:
+                if interval:
+                    # Reserve the next free slot before sleeping so workers don't bunch up
+                    wait = next_slot[0] - time.monotonic()
+                    next_slot[0] = max(next_slot[0], time.monotonic()) + interval
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                try:
+                    await store.guild(guild.id).snapshot()
+                except Exception as e:
+                    print(f"[red][bold]✗[/] Warm-up failed for guild {guild.id}: {e}[/]")
+                self.done += 1
+                if self.report_every and self.done % self.report_every == 0 and self.done < self.total:
+                    print(f"[yellow][bold]![/] Warm-up: {self.done}/{self.total} guilds[/]")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, self.total) or 1)))
+        self.elapsed = time.perf_counter() - started
+        print(f"[green][bold]✓[/] Warmed up {self.done} guild{'' if self.done == 1 else 's'} in {self.elapsed:.2f}s[/]")
+
+    def stats(self) -> dict:
+        return {"done": self.done, "total": self.total, "elapsed": self.elapsed, "running": bool(self.task and not self.task.done())}